@@ -1,55 +1,170 @@
-import sys, os, random, pygame
-sys.path.append(os.path.join("objects"))
-import SudokuSquare
+"""Replay the assignments of a solve on a pygame board
+
+The board is drawn once, and after that each assignment only redraws the
+squares whose value changed: the square backgrounds and the digit glyphs are
+rendered once into cached surfaces, so a redraw is two blits per square and
+the display is updated with the dirty rectangles alone.
+
+With `headless=True` the SDL dummy video driver is used, so replays render
+without a display (e.g. on a CI machine), and every frame can be written to
+a PNG (or BMP/TGA) file.
+
+Example
+-------
+
+    $ python PySudoku.py --headless --frames replay/ --fps 0
+"""
+import argparse
+import os
+import sys
+
+from contextlib import contextmanager
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "objects"))
+
+import pygame
+
+from SudokuSquare import AAfilledRoundedRect
 from utils import *
-from GameResources import *
 
 
-def play(values, result, history):
-    assignments = reconstruct(result, history)
-    pygame.init()
+BACKGROUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images", "sudoku-board-bare.jpg")
+SQUARE_SIZE = (45, 40)
+GIVEN_COLOR, EMPTY_COLOR, TEXT_COLOR = (2, 204, 186), (255, 255, 255), (255, 255, 255)
+
+
+def square_position(x, y):
+    """Return the top left corner of the square in column x and row y"""
+    return (x * 57 + (38, 99, 159)[x // 3],
+            y * 57 + (35, 100, 165)[y // 3])
+
+
+@contextmanager
+def video_driver(name):
+    """Set the SDL video driver for the duration of a with block (SDL reads
+    it when the display is initialized) and restore the environment after;
+    None leaves the driver alone"""
+    previous = os.environ.get('SDL_VIDEODRIVER')
+    if name is not None:
+        os.environ['SDL_VIDEODRIVER'] = name
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop('SDL_VIDEODRIVER', None)
+        else:
+            os.environ['SDL_VIDEODRIVER'] = previous
+
+
+class Renderer(object):
+    """Draws a 9x9 board on the display surface, one changed square at a time
+
+    Parameters
+    ----------
+    headless(bool)
+        (optional) render with the SDL dummy video driver instead of a window
+    """
+    def __init__(self, headless=False):
+        with video_driver('dummy' if headless else None):
+            pygame.init()
+            self.screen = pygame.display.set_mode((700, 700))
+        self.background = pygame.image.load(BACKGROUND).convert()
+        self.rects = {}
+        for y, row in enumerate(rows):
+            for x, col in enumerate(cols):
+                self.rects[row + col] = pygame.Rect(square_position(x, y), SQUARE_SIZE)
+        self.tiles = {color: self._tile(color) for color in (GIVEN_COLOR, EMPTY_COLOR)}
+        font = pygame.font.SysFont('opensans', 21)
+        self.glyphs = {d: font.render(d, 1, TEXT_COLOR) for d in digits}
+        self.shown = {}
+
+    def _tile(self, color):
+        tile = pygame.Surface(SQUARE_SIZE, pygame.SRCALPHA)
+        AAfilledRoundedRect(tile, tile.get_rect(), color)
+        return tile
 
-    size = width, height = 700, 700
-    screen = pygame.display.set_mode(size)
+    def draw_square(self, box, value):
+        """Draw one square and return its rectangle"""
+        rect = self.rects[box]
+        self.screen.blit(self.background, rect, rect)
+        solved = len(value) == 1 and value in self.glyphs
+        self.screen.blit(self.tiles[GIVEN_COLOR if solved else EMPTY_COLOR], rect)
+        if solved:
+            self.screen.blit(self.glyphs[value], rect.move(17, 4).topleft)
+        self.shown[box] = value
+        return rect
 
-    background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
+    def draw(self, values):
+        """Draw the whole board and return the rectangle of the screen"""
+        self.screen.blit(self.background, (0, 0))
+        for box in boxes:
+            self.draw_square(box, values[box])
+        return [self.screen.get_rect()]
 
+    def update(self, values):
+        """Redraw the squares that changed since the last draw and return
+        their rectangles"""
+        return [self.draw_square(box, values[box]) for box in boxes if values[box] != self.shown.get(box)]
+
+
+def play(values, history, fps=5, headless=False, frames=None, image_format='png'):
+    """Replay the assignments of a solve, one frame per assignment
+
+    Parameters
+    ----------
+    values(dict)
+        the starting puzzle in the form {'box_name': '123456789', ...}; it is
+        not modified
+
+    history(Recorder)
+        the recorder that logged the assignments while the puzzle was solved
+
+    fps(int)
+        (optional) frames per second, or 0 to render as fast as possible
+
+    headless(bool)
+        (optional) render without a display and return after the last frame
+        instead of waiting for the window to be closed
+
+    frames(string)
+        (optional) a directory to write each frame to as frame_NNNNN.<format>
+
+    image_format(string)
+        (optional) the file format of the frames; encoding a 700x700 PNG
+        takes about 0.2s, so 'bmp' or 'tga' are much faster for long replays
+
+    Returns
+    -------
+    int
+        the number of frames rendered
+    """
+    values = dict(values)
+    assignments = reconstruct(history)
+    renderer = Renderer(headless)
     clock = pygame.time.Clock()
+    if frames:
+        os.makedirs(frames, exist_ok=True)
 
+    dirty = renderer.draw(values)
+    count = 0
     while True:
         pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                string_number = values[rows[y] + cols[x]]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
-        clock.tick(5)
-
-        if len(assignments) == 0:
+        pygame.display.update(dirty)
+        if frames:
+            name = 'frame_{:05d}.{}'.format(count, image_format)
+            pygame.image.save(renderer.screen, os.path.join(frames, name))
+        count += 1
+        if fps:
+            clock.tick(fps)
+        if count > len(assignments):
             break
-        box, value = assignments.pop()
+        box, value = assignments[count - 1]
         values[box] = value
+        dirty = renderer.update(values)
+
+    if headless:
+        pygame.quit()
+        return count
 
     # leave game showing until closed by user
     while True:
@@ -57,3 +172,30 @@ def play(values, result, history):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('grid', nargs='?',
+                        default='2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3',
+                        help="Puzzle grid string ('.' for the empty boxes)")
+    parser.add_argument('--headless', action='store_true', help="Render without a display")
+    parser.add_argument('--frames', default=None, metavar='DIR', help="Write every frame to DIR")
+    parser.add_argument('--format', dest='image_format', choices=('png', 'bmp', 'tga'), default='png',
+                        help="File format of the frames (default: png)")
+    parser.add_argument('--fps', type=int, default=5, help="Frames per second, 0 for no limit (default: 5)")
+    args = parser.parse_args(argv)
+
+    from solution import solve
+    recorder = Recorder()
+    result = solve(args.grid, recorder=recorder)
+    if not result:
+        print('unsolvable')
+        return
+    count = play(grid2values(args.grid), recorder, args.fps, args.headless, args.frames,
+                 args.image_format)
+    print("{} frames".format(count))
+
+
+if __name__ == "__main__":
+    main()
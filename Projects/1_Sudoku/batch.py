@@ -0,0 +1,210 @@
+"""Solve a stream of Sudoku puzzles over a pool of worker processes
+
+Puzzles are read one grid per line (empty boxes may be written as '.' or
+'0'; blank lines and lines starting with '#' are skipped) from a file or
+stdin. By default they are 81-character diagonal sudokus, like the puzzles
+of `solution.py` and the default corpora of `generate.py`; --no-diagonal
+solves standard puzzles without the diagonal units, and --order solves 4x4
+to 25x25 boards. Chunks of puzzles are handed to a `multiprocessing` pool with
+a bounded number of chunks in flight, so arbitrarily large inputs stream in
+constant memory, and the solutions are written in input order, one grid per
+line ('unsolvable' or 'invalid' when there is no solution to write).
+
+When the input is exhausted the throughput and the p50/p99 latency of the
+individual solves are reported on stderr.
+
+Example
+-------
+
+    $ python batch.py puzzles.txt > solutions.txt
+    $ cat puzzles.txt | python batch.py --processes 4 --chunksize 500
+    $ python batch.py --no-diagonal standard.txt
+"""
+import argparse
+import math
+import os
+import sys
+
+from collections import deque, namedtuple
+from itertools import islice
+from multiprocessing import Pool
+from timeit import default_timer as timer
+
+import bitboard
+
+from utils import make_tables
+
+
+Stats = namedtuple('Stats', ['puzzles', 'seconds', 'p50', 'p99'])
+
+_TABLES = {}
+
+
+def board_tables(order=3, diagonal=True):
+    """Return the UnitTables of a board, built once per process (see
+    `utils.make_tables`)"""
+    if (order, diagonal) not in _TABLES:
+        _TABLES[order, diagonal] = make_tables(order, diagonal)
+    return _TABLES[order, diagonal]
+
+
+def solve_grid(grid, tables=None):
+    """Solve a single puzzle grid
+
+    Parameters
+    ----------
+    grid : str
+        the puzzle with '.' for the empty boxes
+
+    tables : UnitTables
+        (optional) tables of the board; a diagonal 9x9 sudoku by default
+
+    Returns
+    -------
+    tuple
+        (solution, seconds) where solution is the solved grid string, or
+        None if the grid is malformed or has no solution
+    """
+    start = timer()
+    tables = tables or board_tables()
+    if not is_valid_grid(grid, tables):
+        return None, timer() - start
+    masks = bitboard.search_trail(bitboard.grid2masks(grid, tables), tables)
+    solution = bitboard.masks2grid(masks, tables) if masks else None
+    return solution, timer() - start
+
+
+def is_valid_grid(grid, tables=None):
+    """Return True if grid has one digit or '.' for every box on the board"""
+    tables = tables or board_tables()
+    return len(grid) == len(tables.boxes) and set(grid) <= set(tables.digits + '.')
+
+
+def solve_chunk(grids, order=3, diagonal=True):
+    """Solve a list of puzzle grids on a board (see `solve_grid`)"""
+    tables = board_tables(order, diagonal)
+    return [solve_grid(grid, tables) for grid in grids]
+
+
+def read_grids(lines):
+    """Yield the puzzle grids in an iterable of text lines"""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line.replace('0', '.')
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size consecutive items from an iterable"""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def solve_stream(grids, processes=None, chunksize=200, backlog=4, order=3, diagonal=True):
+    """Solve an iterable of puzzle grids on a process pool
+
+    Parameters
+    ----------
+    grids : iterable
+        puzzle grid strings; the iterable is consumed lazily
+
+    processes : int
+        number of worker processes (defaults to the number of CPUs)
+
+    chunksize : int
+        number of puzzles sent to a worker in each task
+
+    backlog : int
+        number of chunks queued per worker process; reading stops while
+        this many chunks are waiting to be written
+
+    order : int
+        block size of the board (3 for the standard 9x9 board)
+
+    diagonal : bool
+        if True the puzzles are diagonal sudokus
+
+    Yields
+    ------
+    tuple
+        (grid, solution, seconds) for each input grid in input order
+        (see `solve_grid`)
+    """
+    limit = backlog * (processes or os.cpu_count() or 1)
+    with Pool(processes) as pool:
+        pending = deque()
+        for chunk in chunked(grids, chunksize):
+            pending.append((chunk, pool.apply_async(solve_chunk, (chunk, order, diagonal))))
+            while len(pending) >= limit:
+                yield from _finish(*pending.popleft())
+        while pending:
+            yield from _finish(*pending.popleft())
+
+
+def _finish(chunk, result):
+    for grid, (solution, seconds) in zip(chunk, result.get()):
+        yield grid, solution, seconds
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0 <= q <= 100) of a sorted list using the
+    nearest-rank method"""
+    if not values:
+        return 0.
+    rank = max(1, math.ceil(q * len(values) / 100))
+    return values[rank - 1]
+
+
+def solve_file(infile, outfile, processes=None, chunksize=200, order=3, diagonal=True):
+    """Solve every puzzle in a text stream and write the solutions in order
+    (see `solve_stream` for the board settings)
+
+    Returns
+    -------
+    Stats
+        the number of puzzles, wall-clock seconds, and the median and 99th
+        percentile solve latency in seconds
+    """
+    tables = board_tables(order, diagonal)
+    latencies = []
+    start = timer()
+    for grid, solution, seconds in solve_stream(read_grids(infile), processes, chunksize,
+                                                order=order, diagonal=diagonal):
+        if solution is None:
+            solution = 'unsolvable' if is_valid_grid(grid, tables) else 'invalid'
+        outfile.write(solution + '\n')
+        latencies.append(seconds)
+    elapsed = timer() - start
+    latencies.sort()
+    return Stats(len(latencies), elapsed, percentile(latencies, 50), percentile(latencies, 99))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('infile', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                        help="File with one puzzle per line (default: stdin)")
+    parser.add_argument('-o', '--outfile', type=argparse.FileType('w'), default=sys.stdout,
+                        help="File to write the solutions (default: stdout)")
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('-c', '--chunksize', type=int, default=200,
+                        help="Number of puzzles per worker task (default: 200)")
+    parser.add_argument('--order', type=int, default=3, choices=range(2, 6),
+                        help="Block size of the board (default: 3)")
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help="Solve standard instead of diagonal sudokus")
+    args = parser.parse_args(argv)
+
+    stats = solve_file(args.infile, args.outfile, args.processes, args.chunksize, args.order,
+                       args.diagonal)
+    args.outfile.flush()
+    rate = stats.puzzles / stats.seconds if stats.seconds else 0.
+    print("Solved {} puzzles in {:.3f}s ({:.1f} puzzles/sec); latency p50 {:.3f}ms p99 {:.3f}ms".format(
+        stats.puzzles, stats.seconds, rate, 1000 * stats.p50, 1000 * stats.p99), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""Benchmarks for the Sudoku search engine
+
+Compares the copying depth first search (`bitboard.search`) with the
+in-place search that restores the board from an undo trail
+(`bitboard.search_trail`) on the same puzzles. For each mode it reports the
+mean time per puzzle, the number of nodes visited, the number of 81-entry
+boards allocated, and the peak memory traced by `tracemalloc`.
+
+With --strategies it instead compares the branching heuristics in
+`ordering.STRATEGIES` by time, nodes expanded and backtracks, and with
+--sizes it compares both search modes on 4x4 through 25x25 boards with and
+without diagonal units. --backends compares the bitboard search with the
+exact cover search in `dlx.py`, --pipeline profiles the propagation
+techniques in `propagation.py`, --vectorized compares propagating the
+puzzles one at a time with the batch propagation in `vectorized.py`, and
+--cache compares solving the puzzles with the hits and misses of a
+`canonical.SolveCache`.
+
+Example
+-------
+
+    $ python benchmark.py --puzzles 200 --clues 22 --seed 0
+    $ python benchmark.py --strategies mrv degree lcv unit
+    $ python benchmark.py --sizes 2 3 4 5 --puzzles 20
+    $ python benchmark.py --backends --clues 17
+    $ python benchmark.py --pipeline --clues 20
+    $ python benchmark.py --vectorized --puzzles 5000 --clues 36
+    $ python benchmark.py --cache --puzzles 500
+"""
+import argparse
+import random
+import tracemalloc
+
+from collections import Counter, defaultdict
+from timeit import default_timer as timer
+
+import bitboard
+import canonical
+import dlx
+import ordering
+import propagation
+
+from solution import tables
+from utils import make_tables
+
+
+SOLVED_GRID = '267945381853716249491823576576438192384192657129657438642379815935281764718564923'
+
+
+def sample_grids(count, clues, seed=None, board=None):
+    """Make puzzles by relabeling the digits of a solved sudoku and keeping a
+    random subset of the boxes
+
+    Puzzles with few clues may have several solutions, which still makes
+    them useful for comparing how the search engines explore the tree.
+
+    Parameters
+    ----------
+    count : int
+        number of puzzles
+
+    clues : int
+        number of boxes given in each puzzle
+
+    seed : int
+        (optional) random seed
+
+    board : UnitTables
+        (optional) tables of the board (see `utils.make_tables`); the puzzles
+        are diagonal 9x9 sudokus by default, and other boards start from the
+        solution the search finds for the empty board
+    """
+    if board is None:
+        solved, symbols = SOLVED_GRID, bitboard.DIGITS
+    else:
+        empty = bitboard.grid2masks('.' * len(board.boxes), board)
+        solved = bitboard.masks2grid(bitboard.search_trail(empty, board), board)
+        symbols = board.digits
+    rng = random.Random(seed)
+    grids = []
+    for _ in range(count):
+        digits = list(symbols)
+        rng.shuffle(digits)
+        relabel = dict(zip(symbols, digits))
+        keep = set(rng.sample(range(len(solved)), clues))
+        grids.append(''.join(relabel[d] if i in keep else '.' for i, d in enumerate(solved)))
+    return grids
+
+
+def time_search(search_masks, grids, board=tables):
+    """Return the seconds taken to solve every grid with a bitboard search"""
+    boards = [bitboard.grid2masks(grid, board) for grid in grids]
+    start = timer()
+    for masks in boards:
+        search_masks(masks, board)
+    return timer() - start
+
+
+def count_search(search_masks, grids):
+    """Solve every grid with a bitboard search function
+
+    Returns
+    -------
+    tuple
+        (solutions, stats, peak) with the solved grid strings, the node,
+        board and trail counters, and the largest peak memory traced while
+        solving a single grid, in bytes
+    """
+    stats = Counter()
+    solutions = [bitboard.masks2grid(search_masks(bitboard.grid2masks(grid), tables, stats=stats))
+                 for grid in grids]
+
+    peak = 0
+    tracemalloc.start()
+    for grid in grids:
+        masks = bitboard.grid2masks(grid)
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        search_masks(masks, tables)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return solutions, stats, peak
+
+
+def compare_search(grids, repeat=5):
+    """Print a comparison of the copying and trail-based searches
+
+    The two modes are timed alternately and the best of repeat passes is
+    reported for each, which keeps the comparison fair on a noisy machine.
+    """
+    modes = [("copy", bitboard.search), ("trail", bitboard.search_trail)]
+    results = [count_search(search_masks, grids) for _, search_masks in modes]
+    assert results[0][0] == results[1][0], "search modes returned different solutions"
+
+    seconds = [float('inf')] * len(modes)
+    for _ in range(repeat):
+        for i, (_, search_masks) in enumerate(modes):
+            seconds[i] = min(seconds[i], time_search(search_masks, grids))
+
+    n = len(grids)
+    print("{:<8} {:>12} {:>12} {:>12} {:>12}".format("mode", "ms/puzzle", "nodes", "boards", "peak KiB"))
+    for (name, _), elapsed, (_, stats, peak) in zip(modes, seconds, results):
+        print("{:<8} {:>12.3f} {:>12d} {:>12d} {:>12.1f}".format(
+            name, 1000 * elapsed / n, stats['nodes'], stats['boards'], peak / 1024))
+    print("trail entries: {}  speedup: {:.2f}x".format(results[1][1]['trail'], seconds[0] / seconds[1]))
+
+
+def compare_strategies(grids, strategies=None):
+    """Print the time, nodes expanded and backtracks of each branching strategy"""
+    print("{:<8} {:>12} {:>12} {:>12}".format("strategy", "ms/puzzle", "nodes", "backtracks"))
+    for strategy in map(ordering.get_strategy, strategies or list(ordering.STRATEGIES)):
+        start = timer()
+        stats = ordering.compare(grids, tables, [strategy])[strategy.name]
+        elapsed = timer() - start
+        print("{:<8} {:>12.3f} {:>12d} {:>12d}".format(
+            strategy.name, 1000 * elapsed / len(grids), stats['nodes'], stats['backtracks']))
+
+
+def compare_backends(grids, repeat=3):
+    """Print the time per puzzle, nodes and backtracks of the bitboard search and
+    the exact cover (dancing links) search on the same puzzles
+
+    The puzzles may have several solutions, so the backends are only checked
+    to agree on the number of puzzles they solve.
+    """
+    exact_cover = dlx.ExactCover(tables)
+    backends = [("bitboard", lambda masks, stats=None: bitboard.search_trail(masks, tables, stats)),
+                ("dlx", exact_cover.search)]
+    print("{:<8} {:>12} {:>12} {:>12} {:>12}".format("backend", "ms/puzzle", "nodes", "backtracks", "solved"))
+    for name, search_masks in backends:
+        stats = Counter()
+        solved = sum(1 for grid in grids if search_masks(bitboard.grid2masks(grid), stats=stats))
+        elapsed = float('inf')
+        for _ in range(repeat):
+            boards = [bitboard.grid2masks(grid) for grid in grids]
+            start = timer()
+            for masks in boards:
+                search_masks(masks)
+            elapsed = min(elapsed, timer() - start)
+        print("{:<8} {:>12.3f} {:>12d} {:>12d} {:>12d}".format(
+            name, 1000 * elapsed / len(grids), stats['nodes'], stats['backtracks'], solved))
+
+
+def compare_pipelines(grids):
+    """Print the time per puzzle and nodes of the search with no propagation
+    techniques, each technique on its own and the full pipeline, followed by
+    the time spent and candidates removed by each stage of the full pipeline"""
+    pipelines = [("core", ())] + [(t.name, (t,)) for t in propagation.PIPELINE]
+    pipelines.append(("all", propagation.PIPELINE))
+    print("{:<18} {:>12} {:>12}".format("pipeline", "ms/puzzle", "nodes"))
+    for name, pipeline in pipelines:
+        stats, profile = Counter(), defaultdict(Counter)
+        start = timer()
+        for grid in grids:
+            bitboard.search_trail(bitboard.grid2masks(grid), tables, stats, pipeline=pipeline,
+                                  profile=profile if name == "all" else None)
+        elapsed = timer() - start
+        print("{:<18} {:>12.3f} {:>12d}".format(name, 1000 * elapsed / len(grids), stats['nodes']))
+    print()
+    print("{:<18} {:>12} {:>12} {:>12}".format("stage", "calls", "ms", "removed"))
+    for name, counts in profile.items():
+        print("{:<18} {:>12d} {:>12.1f} {:>12d}".format(
+            name, counts['calls'], 1000 * counts['seconds'], counts['removed']))
+
+
+def compare_vectorized(grids, repeat=3):
+    """Print the time per puzzle of propagating and of solving the puzzles
+    one at a time and as a single NumPy batch"""
+    import vectorized
+    solver = vectorized.BatchSolver(tables)
+
+    def reduce_each():
+        for grid in grids:
+            bitboard.reduce_puzzle(bitboard.grid2masks(grid), tables)
+
+    def solve_each():
+        for grid in grids:
+            bitboard.search_trail(bitboard.grid2masks(grid), tables)
+
+    modes = [("reduce_puzzle", reduce_each),
+             ("batch propagate", lambda: solver.propagate(solver.grids2array(grids))),
+             ("search_trail", solve_each),
+             ("batch solve", lambda: solver.solve(grids))]
+    print("{:<18} {:>12}".format("mode", "ms/puzzle"))
+    for name, run in modes:
+        best = float('inf')
+        for _ in range(repeat):
+            start = timer()
+            run()
+            best = min(best, timer() - start)
+        print("{:<18} {:>12.3f}".format(name, 1000 * best / len(grids)))
+    stats = Counter()
+    solver.solve(grids, stats)
+    print("\n{} of {} puzzles solved by propagation alone".format(stats['propagated'], len(grids)))
+
+
+def compare_cache(grids, seed=None, repeat=3):
+    """Print the time per puzzle of solving the puzzles directly and through a
+    canonical.SolveCache: misses on an empty cache, hits on a symmetry and
+    relabeling of each cached puzzle, and hits on the same grid strings"""
+    rng = random.Random(seed)
+    transforms = canonical.symmetries()
+    related = []
+    for grid in grids:
+        digits = list(bitboard.DIGITS)
+        rng.shuffle(digits)
+        relabel = dict(zip(bitboard.DIGITS, digits), **{'.': '.'})
+        related.append(''.join(relabel[grid[i]] for i in rng.choice(transforms)))
+
+    def solve_grid(grid):
+        solved = bitboard.search_trail(bitboard.grid2masks(grid), tables)
+        return solved and bitboard.masks2grid(solved)
+
+    def through(cache, puzzles):
+        for grid in puzzles:
+            cache.solve(grid, solve_grid)
+
+    seconds = defaultdict(lambda: float('inf'))
+    for _ in range(repeat):
+        cache = canonical.SolveCache(maxsize=2 * len(grids))
+        for name, run in (("solve", lambda: [solve_grid(grid) for grid in grids]),
+                          ("miss", lambda: through(cache, grids)),
+                          ("related hit", lambda: through(cache, related)),
+                          ("repeat hit", lambda: through(cache, grids))):
+            start = timer()
+            run()
+            seconds[name] = min(seconds[name], timer() - start)
+    print("{:<18} {:>12} {:>12}".format("mode", "ms/puzzle", "vs solve"))
+    for name, elapsed in seconds.items():
+        print("{:<18} {:>12.4f} {:>11.2f}x".format(name, 1000 * elapsed / len(grids), elapsed / seconds["solve"]))
+
+
+def compare_sizes(orders, count, fraction, seed=None, repeat=3):
+    """Print the time per puzzle of both search modes on boards of several sizes,
+    with and without diagonal units
+
+    Parameters
+    ----------
+    orders : iterable
+        block sizes of the boards (2, 3, 4, 5 for 4x4 through 25x25)
+
+    count : int
+        number of puzzles per board
+
+    fraction : float
+        fraction of the boxes given in each puzzle
+    """
+    print("{:<8} {:<8} {:>12} {:>12} {:>12} {:>12}".format(
+        "board", "diagonal", "copy ms", "trail ms", "nodes", "speedup"))
+    for order in orders:
+        for diagonal in (False, True):
+            board = make_tables(order, diagonal)
+            size = order * order
+            grids = sample_grids(count, int(fraction * size * size), seed, board)
+            stats = Counter()
+            for grid in grids:
+                bitboard.search_trail(bitboard.grid2masks(grid, board), board, stats)
+            seconds = [min(time_search(search_masks, grids, board) for _ in range(repeat))
+                       for search_masks in (bitboard.search, bitboard.search_trail)]
+            print("{:<8} {:<8} {:>12.3f} {:>12.3f} {:>12d} {:>11.2f}x".format(
+                "{0}x{0}".format(size), str(diagonal), 1000 * seconds[0] / count,
+                1000 * seconds[1] / count, stats['nodes'], seconds[0] / seconds[1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--puzzles', type=int, default=200, help="Number of puzzles")
+    parser.add_argument('-c', '--clues', type=int, default=22, help="Number of given boxes per puzzle")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="Random seed for the puzzles")
+    parser.add_argument('--strategies', nargs='*', default=None, metavar='NAME',
+                        help="Compare branching strategies instead of search modes (default: all)")
+    parser.add_argument('--backends', action='store_true',
+                        help="Compare the bitboard and dancing links backends instead")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Profile the propagation techniques in propagation.py instead")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Compare per-puzzle and NumPy batch propagation instead")
+    parser.add_argument('--cache', action='store_true',
+                        help="Compare solving directly with the hits and misses of the solve cache instead")
+    parser.add_argument('--sizes', nargs='*', type=int, default=None, metavar='ORDER',
+                        help="Compare board sizes by block order instead (default: 2 3 4 5)")
+    parser.add_argument('--fraction', type=float, default=0.55,
+                        help="Fraction of given boxes for --sizes (default: 0.55)")
+    args = parser.parse_args(argv)
+    if args.sizes is not None:
+        compare_sizes(args.sizes or [2, 3, 4, 5], args.puzzles, args.fraction, args.seed)
+        return
+    grids = sample_grids(args.puzzles, args.clues, args.seed)
+    if args.backends:
+        compare_backends(grids)
+    elif args.pipeline:
+        compare_pipelines(grids)
+    elif args.vectorized:
+        compare_vectorized(grids)
+    elif args.cache:
+        compare_cache(grids, args.seed)
+    elif args.strategies is None:
+        compare_search(grids)
+    else:
+        compare_strategies(grids, args.strategies)
+
+
+if __name__ == "__main__":
+    main()
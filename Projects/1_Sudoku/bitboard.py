@@ -0,0 +1,868 @@
+"""Bitmask candidate engine for the Sudoku solver
+
+Every box on the board stores the digits that can still be placed there as an
+int whose bits each stand for one digit: on a standard board bit 0 is the
+digit '1' and bit 8 is the digit '9'. A board is a list of such masks in the
+same order as the box names (`utils.boxes` for a standard board).
+
+The strategies in this module work directly on mask lists, so a propagation
+step is a handful of `&`, `|` and table lookups instead of string `replace`
+and `len` calls. The functions in `solution.py` and the helpers below convert
+to and from the dictionary representation used everywhere else.
+
+The board geometry comes from the `utils.UnitTables` passed to each
+function, so the same code solves 4x4, 9x9, 16x16 and 25x25 boards with or
+without diagonal units (see `utils.make_tables`). The conversion helpers
+default to the standard 9x9 board when no tables are given.
+"""
+from collections import deque, namedtuple
+from itertools import islice
+from time import monotonic
+from timeit import default_timer as timer
+
+from utils import boxes, assign_value
+
+
+DIGITS = '123456789'
+ALL_DIGITS = (1 << len(DIGITS)) - 1  # 0b111111111, i.e., '123456789'
+
+# lookup tables indexed by candidate mask (0 through ALL_DIGITS)
+MASK_DIGITS = tuple(''.join(d for i, d in enumerate(DIGITS) if mask >> i & 1)
+                    for mask in range(ALL_DIGITS + 1))
+
+DIGIT_MASK = {d: 1 << i for i, d in enumerate(DIGITS)}
+DIGITS_MASK = {digits: mask for mask, digits in enumerate(MASK_DIGITS)}
+
+
+def digits2mask(digits, symbols=DIGITS):
+    """Convert a string of candidate digits (e.g., '237') to a bitmask"""
+    if symbols == DIGITS and digits in DIGITS_MASK:
+        return DIGITS_MASK[digits]
+    mask = 0
+    for d in digits:
+        mask |= 1 << symbols.index(d)
+    return mask
+
+
+def mask2digits(mask, symbols=DIGITS):
+    """Convert a bitmask to the string of candidate digits it allows"""
+    if symbols == DIGITS:
+        return MASK_DIGITS[mask]
+    return ''.join(d for i, d in enumerate(symbols) if mask >> i & 1)
+
+
+def values2masks(values, tables=None):
+    """Convert the dictionary board representation to a list of bitmasks
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    tables(UnitTables)
+        (optional) the tables of the board; a standard 9x9 board by default
+
+    Returns
+    -------
+    list
+        a list of candidate bitmasks ordered like the boxes of the board
+    """
+    if tables is None:
+        return [digits2mask(values[box]) for box in boxes]
+    return [digits2mask(values[box], tables.digits) for box in tables.boxes]
+
+
+def masks2values(masks, tables=None):
+    """Convert a list of bitmasks to the dictionary board representation
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks ordered like the boxes of the board
+
+    tables(UnitTables)
+        (optional) the tables of the board; a standard 9x9 board by default
+
+    Returns
+    -------
+    dict
+        a dictionary of the form {'box_name': '123456789', ...}
+    """
+    if tables is None:
+        return {box: MASK_DIGITS[mask] for box, mask in zip(boxes, masks)}
+    return {box: mask2digits(mask, tables.digits) for box, mask in zip(tables.boxes, masks)}
+
+
+def grid2masks(grid, tables=None):
+    """Convert a grid string into a list of bitmasks with all digits allowed
+    in the empty boxes
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+        Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    tables(UnitTables)
+        (optional) the tables of the board; a standard 9x9 board by default
+    """
+    if tables is None:
+        return [ALL_DIGITS if c == '.' else DIGIT_MASK[c] for c in grid]
+    full, symbols = tables.full, tables.digits
+    return [full if c == '.' else 1 << symbols.index(c) for c in grid]
+
+
+def masks2grid(masks, tables=None):
+    """Convert a list of bitmasks to a grid string with '.' for unsolved boxes"""
+    symbols = DIGITS if tables is None else tables.digits
+    return ''.join(symbols[mask.bit_length() - 1] if mask and not mask & (mask - 1) else '.'
+                   for mask in masks)
+
+
+def update_values(values, masks):
+    """Copy the candidates from a list of bitmasks into the dictionary board
+    representation through `utils.assign_value` so that the assignments are
+    recorded for visualization
+
+    Returns
+    -------
+    dict
+        The values dictionary updated in place
+    """
+    for box, mask in zip(boxes, masks):
+        assign_value(values, box, MASK_DIGITS[mask])
+    return values
+
+
+def eliminate(masks, tables):
+    """Remove the digit of every solved box from the candidates of its peers
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks; it is updated in place
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    Returns
+    -------
+    list
+        The same list of masks
+    """
+    peers = tables.peers
+    for box, mask in enumerate(masks):
+        if mask and not mask & (mask - 1):
+            keep = ~mask
+            for peer in peers[box]:
+                masks[peer] &= keep
+    return masks
+
+
+def only_choice(masks, tables):
+    """Assign every digit that fits in only one box of a unit to that box
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks; it is updated in place
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    Returns
+    -------
+    list
+        The same list of masks
+    """
+    for unit in tables.units:
+        once = twice = 0
+        for box in unit:
+            mask = masks[box]
+            twice |= once & mask
+            once |= mask
+        single = once & ~twice
+        if single:
+            for box in unit:
+                mask = masks[box] & single
+                if mask:
+                    masks[box] = mask
+    return masks
+
+
+def naked_twins(masks, tables):
+    """Eliminate the digits of every pair of naked twins from the boxes that
+    are peers of both twins
+
+    All of the twins are found before any digits are removed, so the pairs
+    are the ones present in the input (see `solution.naked_twins`).
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks; it is updated in place
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    Returns
+    -------
+    list
+        The same list of masks
+    """
+    peers, popcount = tables.peers, tables.popcount
+    twins = [(boxA, boxB, mask)
+             for boxA, mask in enumerate(masks) if popcount[mask] == 2
+             for boxB in peers[boxA] if boxB > boxA and masks[boxB] == mask]
+    for boxA, boxB, mask in twins:
+        keep = ~mask
+        for peer in set(peers[boxA]).intersection(peers[boxB]):
+            masks[peer] &= keep
+    return masks
+
+
+def propagate(masks, tables, changed=None, trail=None):
+    """Propagate eliminate, only choice and naked twins from the boxes that
+    changed until no strategy removes any more candidates
+
+    A work queue holds the boxes whose candidates changed: a solved box
+    removes its digit from its peers, a box with two candidates looks for
+    its naked twin, and the units containing the box are marked dirty. Once
+    the queue drains, one dirty unit is checked for only choices and for
+    missing digits, which may queue more boxes. The cost is proportional
+    to the candidates actually removed rather than to the number of boxes
+    times the number of rounds.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks; it is updated in place
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    changed(iterable)
+        (optional) indices of the boxes that changed since the board was
+        last reduced; every box is examined if it is not provided
+
+    trail(list)
+        (optional) a list that receives the index and old candidates of every
+        box before it is changed, as two consecutive items (see `undo`)
+
+    Returns
+    -------
+    list or False
+        The same list of masks, or False if the board has no solution
+    """
+    units, members, peers = tables.units, tables.members, tables.peers
+    popcount, full = tables.popcount, tables.full
+    queue = deque(range(len(masks)) if changed is None else changed)
+    queued = [False] * len(masks)
+    for box in queue:
+        queued[box] = True
+    dirty = set()
+
+    while queue or dirty:
+        while queue:
+            box = queue.popleft()
+            queued[box] = False
+            mask = masks[box]
+            dirty.update(members[box])
+            count = popcount[mask]
+            if count == 1:
+                targets = peers[box]
+            elif count == 2:
+                targets = [peer for twin in peers[box] if masks[twin] == mask
+                           for peer in set(peers[box]).intersection(peers[twin])]
+            else:
+                continue
+            keep = ~mask
+            for peer in targets:
+                candidates = masks[peer]
+                if candidates & mask:
+                    if not candidates & keep:
+                        return False
+                    if trail is not None:
+                        trail.append(peer)
+                        trail.append(candidates)
+                    masks[peer] = candidates & keep
+                    if not queued[peer]:
+                        queued[peer] = True
+                        queue.append(peer)
+        if dirty:
+            unit = units[dirty.pop()]
+            once = twice = 0
+            for box in unit:
+                mask = masks[box]
+                twice |= once & mask
+                once |= mask
+            if once != full:
+                return False
+            single = once & ~twice
+            if single:
+                for box in unit:
+                    mask = masks[box]
+                    if mask & single and mask & ~single:
+                        if trail is not None:
+                            trail.append(box)
+                            trail.append(mask)
+                        masks[box] = mask & single
+                        if not queued[box]:
+                            queued[box] = True
+                            queue.append(box)
+    return masks
+
+
+class Technique(namedtuple('Technique', ['name', 'apply'])):
+    """Propagation strategy that runs after eliminate, only choice and naked
+    twins stall (see `reduce_puzzle`)
+
+    Attributes
+    ----------
+    name : str
+        Name used to report the technique (see `propagation.TECHNIQUES`)
+
+    apply : callable
+        apply(masks, tables, trail) removes candidates from masks in place,
+        pushing the index and old candidates of every box it changes on the
+        trail (see `undo`), and returns masks, or False if the board has no
+        solution
+    """
+    __slots__ = ()
+
+
+def reduce_puzzle(masks, tables, changed=None, trail=None, pipeline=(), profile=None, hooks=None):
+    """Reduce a board with the propagation core and a pipeline of techniques
+
+    The boxes that changed are propagated with eliminate, only choice and
+    naked twins (see `propagate`). When that stalls the techniques in the
+    pipeline are tried in order; as soon as one removes a candidate the
+    boxes it changed are propagated and the pipeline starts over from its
+    first technique, so the expensive techniques at the end of the pipeline
+    only run when every cheaper one is stuck.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks; it is updated in place
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    changed(iterable)
+        (optional) indices of the boxes that changed since the board was
+        last reduced; every box is examined if it is not provided
+
+    trail(list)
+        (optional) a list that receives the index and old candidates of every
+        box before it is changed, as two consecutive items (see `undo`)
+
+    pipeline(sequence)
+        (optional) the Techniques to run when propagation stalls, cheapest
+        first (see `propagation.get_pipeline`); by default only the
+        propagation core runs
+
+    profile(dict)
+        (optional) a `collections.defaultdict(Counter)` that receives the
+        'calls', 'seconds' and candidates 'removed' of the propagation core
+        (as 'propagate') and of each technique, by name
+
+    hooks(Hooks)
+        (optional) a `utils.Hooks` that receives the assignments,
+        eliminations, rounds and contradictions of every stage
+
+    Returns
+    -------
+    list or False
+        The same list of masks, or False if the board has no solution
+    """
+    if not pipeline and profile is None and hooks is None:
+        return propagate(masks, tables, changed, trail)
+    log = [] if trail is None else trail
+    popcount = tables.popcount
+    while True:
+        mark = len(log)
+        if profile is None:
+            result = propagate(masks, tables, changed, log)
+        else:
+            start = timer()
+            result = propagate(masks, tables, changed, log)
+            _profile(profile['propagate'], timer() - start, masks, log, mark, popcount)
+        if hooks is not None:
+            hooks.observe('propagate', masks, log, mark, result is False)
+        if result is False:
+            return False
+        for technique in pipeline:
+            mark = len(log)
+            if profile is None:
+                result = technique.apply(masks, tables, log)
+            else:
+                start = timer()
+                result = technique.apply(masks, tables, log)
+                _profile(profile[technique.name], timer() - start, masks, log, mark, popcount)
+            if hooks is not None:
+                hooks.observe(technique.name, masks, log, mark, result is False)
+            if result is False:
+                return False
+            if len(log) > mark:
+                break
+        else:
+            return masks
+        changed = log[mark::2]
+        if trail is None:
+            del log[:]
+
+
+def _profile(counts, seconds, masks, log, mark, popcount):
+    counts['calls'] += 1
+    counts['seconds'] += seconds
+    first = {}
+    for i in range(mark, len(log), 2):
+        first.setdefault(log[i], log[i + 1])
+    counts['removed'] += sum(popcount[old] - popcount[masks[box]] for box, old in first.items())
+
+
+def undo(masks, trail, mark=0):
+    """Restore the candidates recorded on a trail until only its first mark
+    items remain"""
+    for i in range(len(trail) - 2, mark - 1, -2):
+        masks[trail[i]] = trail[i + 1]
+    del trail[mark:]
+    return masks
+
+
+def select_mrv(masks, tables):
+    """Return the index of the first unsolved box with the fewest candidates
+    (the minimum remaining values heuristic), or None if every box is solved"""
+    popcount = tables.popcount
+    best, fewest = None, len(tables.digits) + 1
+    for box, mask in enumerate(masks):
+        count = popcount[mask]
+        if 1 < count < fewest:
+            best, fewest = box, count
+    return best
+
+
+def order_ascending(masks, tables, box):
+    """Return the candidate bits of a box from the lowest digit to the highest"""
+    bits = []
+    candidates = masks[box]
+    while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        bits.append(bit)
+    return bits
+
+
+class Strategy(namedtuple('Strategy', ['name', 'select', 'order'])):
+    """Branching strategy for the depth first searches
+
+    Attributes
+    ----------
+    name : str
+        Name used to report the strategy (see `ordering.STRATEGIES`)
+
+    select : callable
+        select(masks, tables) returns the index of the box to branch on, or
+        None if every box is solved
+
+    order : callable
+        order(masks, tables, box) returns the candidate bits of the box in
+        the order they should be tried
+    """
+    __slots__ = ()
+
+
+MRV = Strategy('mrv', select_mrv, order_ascending)
+
+
+class BudgetExhausted(Exception):
+    """Raised by a search when its Budget runs out
+
+    Attributes
+    ----------
+    reason : str
+        'nodes', 'deadline' or 'cancelled'
+
+    masks : list
+        the board with the most solved boxes reached by the search (see
+        `Budget.best`)
+    """
+    def __init__(self, reason, masks):
+        super().__init__(reason)
+        self.reason = reason
+        self.masks = masks
+
+
+class Budget(object):
+    """Limits on the work done by a search
+
+    The searches call `spend` at every node they visit, which raises
+    `BudgetExhausted` once the node budget is used up, the deadline has
+    passed, or the cancellation token is set. The clock of a relative time
+    limit starts when the Budget is created.
+
+    Parameters
+    ----------
+    nodes(int)
+        (optional) the largest number of nodes the search may visit
+
+    seconds(float)
+        (optional) the time the search may take, from now
+
+    deadline(float)
+        (optional) the `time.monotonic()` value when the search must stop
+
+    token(threading.Event)
+        (optional) a cancellation token; the search stops once it is set,
+        e.g., from another thread
+
+    Attributes
+    ----------
+    spent : int
+        the number of nodes visited so far
+
+    best : list
+        a copy of the reduced board with the most solved boxes visited so far
+        -- the best partial propagation state
+    """
+    def __init__(self, nodes=None, seconds=None, deadline=None, token=None):
+        if seconds is not None:
+            expires = monotonic() + seconds
+            deadline = expires if deadline is None else min(deadline, expires)
+        self.nodes = nodes
+        self.deadline = deadline
+        self.token = token
+        self.spent = 0
+        self.best = None
+        self._solved = -1
+
+    def spend(self, masks):
+        """Count a node with its reduced board (or False for a failed node)
+        and raise BudgetExhausted if a limit has been reached"""
+        self.spent += 1
+        if masks:
+            solved = sum(1 for mask in masks if not mask & (mask - 1))
+            if solved > self._solved:
+                self._solved, self.best = solved, list(masks)
+        if self.nodes is not None and self.spent > self.nodes:
+            raise BudgetExhausted('nodes', self.best)
+        if self.deadline is not None and monotonic() > self.deadline:
+            raise BudgetExhausted('deadline', self.best)
+        if self.token is not None and self.token.is_set():
+            raise BudgetExhausted('cancelled', self.best)
+
+
+class SearchResult(namedtuple('SearchResult', ['status', 'board', 'reason', 'nodes'])):
+    """Outcome of a search with a budget (see `bounded_search`)
+
+    Attributes
+    ----------
+    status : str
+        'solved', 'unsolvable' or 'exhausted'
+
+    board : list or None
+        the solved masks, None for an unsolvable board, or the best partial
+        board (see `Budget.best`) when the budget ran out; `solution.solve`
+        returns a values dictionary in its place
+
+    reason : str or None
+        the limit that was reached ('nodes', 'deadline' or 'cancelled') when
+        the status is 'exhausted'
+
+    nodes : int
+        the number of nodes visited
+    """
+    __slots__ = ()
+
+
+def bounded_search(masks, tables, budget, strategy=MRV, pipeline=(), stats=None, recorder=None,
+                   hooks=None):
+    """Search a board within a Budget and report the outcome
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks, one per box; it is not modified
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    budget(Budget)
+        the node, time and cancellation limits of the search
+
+    See `search` for the other parameters.
+
+    Returns
+    -------
+    SearchResult
+        the status, the solved or partial board, and the work done
+    """
+    start = budget.spent
+    try:
+        solved = search_trail(list(masks), tables, stats, strategy, recorder, pipeline, None, budget,
+                              hooks)
+    except BudgetExhausted as exhausted:
+        return SearchResult('exhausted', exhausted.masks, exhausted.reason, budget.spent - start)
+    if solved is False:
+        return SearchResult('unsolvable', None, None, budget.spent - start)
+    return SearchResult('solved', solved, None, budget.spent - start)
+
+
+def record_changes(recorder, before, masks):
+    """Log every box that is solved in masks but not in before to a Recorder"""
+    for box, (old, mask) in enumerate(zip(before, masks)):
+        if old != mask and not mask & (mask - 1):
+            recorder.record(box, mask.bit_length() - 1)
+
+
+def record_trail(recorder, masks, trail, mark=0):
+    """Log every box on the trail after mark that is now solved to a Recorder,
+    in the order the boxes were first changed"""
+    seen = set()
+    for i in range(mark, len(trail), 2):
+        box = trail[i]
+        mask = masks[box]
+        if box not in seen and not mask & (mask - 1):
+            seen.add(box)
+            recorder.record(box, mask.bit_length() - 1)
+
+
+def search(masks, tables, changed=None, stats=None, strategy=MRV, recorder=None, pipeline=(),
+           profile=None, budget=None, hooks=None):
+    """Depth first search that reduces the puzzle at every node and copies
+    the board for each branch
+
+    Only the box assigned by a branch is queued for propagation in the child
+    node (see `reduce_puzzle`). If a `collections.Counter` is passed as stats,
+    the number of nodes visited, failed branches and boards copied are added
+    to its 'nodes', 'backtracks' and 'boards' counts.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks, one per box
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    changed(iterable)
+        (optional) indices of the boxes that changed since the board was
+        last reduced (see `reduce_puzzle`)
+
+    stats(Counter)
+        (optional) search counters
+
+    strategy(Strategy)
+        (optional) the box selection and value ordering heuristics; by
+        default the first box with the fewest candidates is tried from the
+        lowest digit up (see `ordering.STRATEGIES` for the alternatives)
+
+    recorder(Recorder)
+        (optional) receives the assignments along the path to the solution
+        (see `utils.Recorder`); nothing is recorded if it is None
+
+    pipeline(sequence)
+        (optional) Techniques run at every node when propagation stalls
+
+    profile(dict)
+        (optional) receives the time spent and candidates removed by each
+        propagation technique (see `reduce_puzzle`)
+
+    budget(Budget)
+        (optional) limits on the nodes, time and cancellation of the search;
+        `BudgetExhausted` is raised when one of them is reached (see
+        `bounded_search` for a search that returns a SearchResult instead)
+
+    hooks(Hooks)
+        (optional) a `utils.Hooks` that receives the propagation and search
+        events; nothing is reported if it is None
+
+    Returns
+    -------
+    list or False
+        A list of solved masks, or False if the board has no solution
+    """
+    if stats is not None:
+        stats['nodes'] += 1
+    before = list(masks) if recorder is not None else None
+    masks = reduce_puzzle(masks, tables, changed, None, pipeline, profile, hooks)
+    if budget is not None:
+        budget.spend(masks)
+    if masks is False:
+        return False
+    if recorder is not None:
+        record_changes(recorder, before, masks)
+
+    best = strategy.select(masks, tables)
+    if best is None:
+        return masks
+
+    for bit in strategy.order(masks, tables, best):
+        attempt = list(masks)
+        attempt[best] = bit
+        if stats is not None:
+            stats['boards'] += 1
+        if recorder is not None:
+            mark = recorder.mark()
+            recorder.record(best, bit.bit_length() - 1)
+        if hooks is not None:
+            hooks.fire('branch', best, bit.bit_length() - 1)
+        result = search(attempt, tables, (best,), stats, strategy, recorder, pipeline, profile, budget,
+                        hooks)
+        if result:
+            return result
+        if stats is not None:
+            stats['backtracks'] += 1
+        if hooks is not None:
+            hooks.fire('backtrack', best, bit.bit_length() - 1)
+        if recorder is not None:
+            recorder.rewind(mark)
+    return False
+
+
+def search_trail(masks, tables, stats=None, strategy=MRV, recorder=None, pipeline=(), profile=None,
+                 budget=None, hooks=None):
+    """Depth first search that updates a single board in place
+
+    Instead of copying the board for every branch, the old candidates of each
+    box changed below a branch are pushed on an undo trail and restored when
+    the branch fails. With the same strategy the branching order is the same
+    as `search`, so both functions return the same solution. If a
+    `collections.Counter` is passed as stats, the number of nodes visited,
+    failed branches, and boxes pushed on the trail are added to its 'nodes',
+    'backtracks' and 'trail' counts. See `search` for the other parameters;
+    if the budget runs out, the board is left in the state of the node where
+    the search stopped.
+
+    Returns
+    -------
+    list or False
+        The same list of masks solved in place, or False if the board has no
+        solution
+    """
+    if stats is not None:
+        stats['nodes'] += 1
+    before = list(masks) if recorder is not None else None
+    reduced = reduce_puzzle(masks, tables, None, None, pipeline, profile, hooks)
+    if budget is not None:
+        budget.spend(reduced)
+    if reduced is False:
+        return False
+    if recorder is not None:
+        record_changes(recorder, before, masks)
+    solved = _search_trail(masks, tables, [], stats, strategy, recorder, pipeline, profile, budget,
+                           hooks)
+    return masks if solved else False
+
+
+def _search_trail(masks, tables, trail, stats, strategy, recorder, pipeline, profile, budget,
+                  hooks):
+    best = strategy.select(masks, tables)
+    if best is None:
+        return True
+
+    mark = len(trail)
+    for bit in strategy.order(masks, tables, best):
+        if recorder is not None:
+            recorder_mark = recorder.mark()
+        trail.append(best)
+        trail.append(masks[best])
+        masks[best] = bit
+        if hooks is not None:
+            hooks.fire('branch', best, bit.bit_length() - 1)
+        reduced = reduce_puzzle(masks, tables, (best,), trail, pipeline, profile, hooks)
+        if stats is not None:
+            stats['nodes'] += 1
+            stats['trail'] += (len(trail) - mark) // 2
+        if budget is not None:
+            budget.spend(reduced)
+        if reduced is not False:
+            if recorder is not None:
+                record_trail(recorder, masks, trail, mark)
+            if _search_trail(masks, tables, trail, stats, strategy, recorder, pipeline, profile,
+                             budget, hooks):
+                return True
+        undo(masks, trail, mark)
+        if stats is not None:
+            stats['backtracks'] += 1
+        if hooks is not None:
+            hooks.fire('backtrack', best, bit.bit_length() - 1)
+        if recorder is not None:
+            recorder.rewind(recorder_mark)
+    return False
+
+
+def iter_solutions(masks, tables, stats=None, strategy=MRV, pipeline=()):
+    """Yield every solution of a board lazily
+
+    The board is searched depth first in place with an undo trail like
+    `search_trail`, but each solution is yielded as it is found and the
+    search resumes from there when the next one is requested, so stopping
+    the iteration early costs nothing more than the solutions consumed.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks, one per box; it is not modified
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    stats(Counter)
+        (optional) receives the number of nodes visited as 'nodes' and of
+        failed branches as 'backtracks'
+
+    strategy(Strategy)
+        (optional) the box selection and value ordering heuristics
+
+    pipeline(sequence)
+        (optional) Techniques run at every node when propagation stalls
+        (see `reduce_puzzle`)
+
+    Yields
+    ------
+    list
+        a new list of solved masks for each solution
+    """
+    masks = list(masks)
+    if stats is not None:
+        stats['nodes'] += 1
+    if reduce_puzzle(masks, tables, None, None, pipeline) is not False:
+        yield from _iter_trail(masks, tables, [], stats, strategy, pipeline)
+
+
+def _iter_trail(masks, tables, trail, stats, strategy, pipeline):
+    best = strategy.select(masks, tables)
+    if best is None:
+        yield list(masks)
+        return
+
+    mark = len(trail)
+    for bit in strategy.order(masks, tables, best):
+        trail.append(best)
+        trail.append(masks[best])
+        masks[best] = bit
+        if stats is not None:
+            stats['nodes'] += 1
+        if reduce_puzzle(masks, tables, (best,), trail, pipeline) is not False:
+            yield from _iter_trail(masks, tables, trail, stats, strategy, pipeline)
+        elif stats is not None:
+            stats['backtracks'] += 1
+        undo(masks, trail, mark)
+
+
+def count_solutions(masks, tables, limit=2, stats=None, strategy=MRV):
+    """Count the solutions of a board, stopping as soon as limit are found
+
+    `count_solutions(masks, tables, 2) == 1` checks that a puzzle has a
+    unique solution while exploring at most the tree needed to find a second
+    one (see `iter_solutions` for the parameters).
+
+    Returns
+    -------
+    int
+        the number of solutions, up to limit
+    """
+    return sum(1 for _ in islice(iter_solutions(masks, tables, stats, strategy), limit))
@@ -0,0 +1,365 @@
+"""Symmetry canonicalization and a solve cache for diagonal Sudoku puzzles
+
+Relabeling the digits of a puzzle, or moving its rows and columns around in
+a way that maps every unit onto a unit, gives a puzzle whose solutions are
+the same transformation of the original solutions. `canonicalize` picks one
+representative of all the puzzles related that way.
+
+A `SolveCache` answers any of the related puzzles once one has been solved.
+Canonicalizing costs about as much as solving a 9x9 puzzle, so the cache
+files puzzles under `invariant`, a cheap key made of clue counts that every
+related puzzle shares, and only looks for a symmetry (see `match`) between
+puzzles with the same invariant, stopping at the first one that fits.
+
+Only the transformations that also map the two diagonals onto the diagonals
+are used. Swapping two rows inside a band, for instance, keeps the rows,
+columns and squares but breaks the diagonals, so the two puzzles may have
+different solutions (or none) as diagonal sudokus and must not share a
+cache entry. The band-preserving row permutations p with p(n-1-i) = n-1-p(i)
+are combined with the column permutations p or its mirror image, and with
+the transposition; on a 9x9 board that is a group of 96 transformations
+(see `symmetries`). A 16x16 board has 18432 of them, which makes
+canonicalizing slower than solving, and a 25x25 board has millions, so
+canonicalizing is meant for 9x9 (and 4x4) boards and `symmetries` refuses
+groups larger than MAX_SYMMETRIES.
+
+Example
+-------
+
+    >>> cache = SolveCache(maxsize=1024)
+    >>> cache.solve(grid, solve_grid)
+"""
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from math import factorial
+from itertools import permutations, product
+from operator import itemgetter
+
+from utils import SYMBOLS, make_tables
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+MAX_SYMMETRIES = 20000  # the largest group `symmetries` enumerates (order 4 has 18432)
+
+
+def symmetry_count(order=3):
+    """Return the number of transformations in `symmetries(order)` without
+    building them"""
+    mirrored = len(_mirrored_permutations(order))
+    inner = factorial(order) ** (order // 2) * mirrored ** (order % 2)
+    return 4 * mirrored * inner
+
+
+@lru_cache(maxsize=None)
+def symmetries(order=3):
+    """Return the transformations of an (order^2 x order^2) board that map
+    the rows, columns, squares and both diagonals onto units of the same kind
+
+    A row permutation p that keeps the diagonals commutes with the reversal
+    i -> n-1-i, so it is built directly from its parts: the order of the
+    bands commutes with the reversal of the bands, each band gets any
+    permutation of its rows and the mirror band gets the mirrored one, and
+    the middle band of an odd order gets a permutation that commutes with
+    the reversal itself. There are 96 transformations for order 3 and 18432
+    for order 4 (see `symmetry_count`).
+
+    Returns
+    -------
+    tuple
+        each transformation is a tuple t of box indices; the transformed grid
+        is ''.join(grid[i] for i in t)
+
+    Raises
+    ------
+    ValueError
+        if the group has more than MAX_SYMMETRIES transformations (order 5
+        has millions)
+    """
+    if symmetry_count(order) > MAX_SYMMETRIES:
+        raise ValueError("The symmetries of an order {} board are too many to enumerate".format(order))
+    size = order * order
+    last = order - 1
+    half = order // 2
+    middle = _mirrored_permutations(order) if order % 2 else [()]
+    row_maps = []
+    for band_order in _mirrored_permutations(order):
+        for outer in product(permutations(range(order)), repeat=half):
+            for centre in middle:
+                inner = list(outer) + ([centre] if order % 2 else [])
+                inner += [tuple(last - perm[last - j] for j in range(order)) for perm in reversed(outer)]
+                row_maps.append([band_order[k] * order + i for k, perm in enumerate(inner) for i in perm])
+
+    transforms = set()
+    for p in row_maps:
+        for q in (p, [size - 1 - i for i in p]):
+            transforms.add(tuple(p[r] * size + q[c] for r in range(size) for c in range(size)))
+            transforms.add(tuple(p[c] * size + q[r] for r in range(size) for c in range(size)))
+    return tuple(sorted(transforms))
+
+
+@lru_cache(maxsize=None)
+def _mirrored_permutations(n):
+    # the permutations p of range(n) with p[n-1-i] == n-1-p[i]: the pairs
+    # (i, n-1-i) are permuted and each pair is kept or swapped
+    pairs = [(i, n - 1 - i) for i in range(n // 2)]
+    result = []
+    for moved in permutations(pairs):
+        for flips in product((False, True), repeat=len(pairs)):
+            p = list(range(n))
+            for (i, j), (a, b), flip in zip(pairs, moved, flips):
+                p[i], p[j] = (b, a) if flip else (a, b)
+            result.append(tuple(p))
+    return result
+
+
+def canonicalize(grid, order=3):
+    """Return the canonical form of a puzzle and how to get there
+
+    Every transformation in `symmetries` is applied to the grid and the
+    digits of the result are relabeled '1', '2', ... in the order they first
+    appear; the smallest of those strings is the canonical form, so all the
+    puzzles related by a symmetry and a relabeling share it.
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid with '.' for the empty boxes
+
+    order(int)
+        (optional) the block size of the board; every transformation is
+        tried, so this is only practical for orders 2 and 3
+
+    Returns
+    -------
+    tuple
+        (canonical, transform, labels) where canonical is the canonical grid
+        string, transform the tuple of box indices that produced it, and
+        labels a dict from the digits of grid to their canonical digits
+    """
+    symbols = _symbols(order)
+    # the first rows of a relabeled grid only depend on the first rows of the
+    # transformed grid, so only the transformations with the smallest prefix
+    # are compared in full
+    best, ties = None, []
+    for transform, prefix in zip(symmetries(order), _prefixes(order)):
+        candidate = _relabel(''.join(prefix(grid)), symbols)[0]
+        if best is None or candidate < best:
+            best, ties = candidate, [transform]
+        elif candidate == best:
+            ties.append(transform)
+
+    best = None
+    for transform in ties:
+        candidate, labels = _relabel(''.join([grid[i] for i in transform]), symbols)
+        if best is None or candidate < best[0]:
+            best = (candidate, transform, labels)
+    return best
+
+
+def invariant(grid, order=3):
+    """Return a key that all the puzzles related to grid by a symmetry and a
+    relabeling share
+
+    The key holds the sorted clue counts of the rows and of the columns (as
+    an unordered pair, since the transposition swaps them), of the squares
+    and of the diagonals, and the sorted number of times each digit is
+    given. Puzzles with different keys have different canonical forms;
+    puzzles with the same key usually, but not always, have the same one.
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid with '.' for the empty boxes
+
+    order(int)
+        (optional) the block size of the board
+
+    Returns
+    -------
+    tuple
+        a hashable key
+    """
+    rows, columns, squares, diagonals = [tuple(sorted(get(grid).count('.') for get in getters))
+                                         for getters in _unit_getters(order)]
+    return (tuple(sorted((rows, columns))), squares, diagonals,
+            tuple(sorted(grid.count(d) for d in _symbols(order))))
+
+
+@lru_cache(maxsize=None)
+def _unit_getters(order):
+    # item getters for the rows, columns, squares and diagonals of the board
+    size = order * order
+    getters = [itemgetter(*unit) for unit in make_tables(order, diagonal=True).units]
+    return getters[:size], getters[size:2 * size], getters[2 * size:3 * size], getters[3 * size:]
+
+
+def match(grid, other, order=3):
+    """Return how to turn grid into other with a symmetry and a relabeling
+
+    Only the transformations that move the clues of grid onto the clues of
+    other are relabeled and compared, and the first one that fits is
+    returned, so this is much cheaper than canonicalizing both grids.
+
+    Parameters
+    ----------
+    grid, other(string)
+        strings representing sudoku grids with '.' for the empty boxes
+
+    order(int)
+        (optional) the block size of the boards
+
+    Returns
+    -------
+    tuple or None
+        (transform, labels) such that relabeling ''.join(grid[i] for i in
+        transform) with the dict labels gives other, or None if the puzzles
+        are not related
+    """
+    clues = str.maketrans(dict.fromkeys(_symbols(order), 'x'))
+    pattern, target = grid.translate(clues), tuple(other.translate(clues))
+    band = order ** 3
+    first = target[:band]
+    for transform, prefix, full in zip(symmetries(order), _prefixes(order), _getters(order)):
+        if prefix(pattern) != first or full(pattern) != target:
+            continue
+        labels = {}
+        for d, c in zip(full(grid), other):
+            if labels.setdefault(d, c) != c:
+                break
+        else:
+            labels.pop('.', None)
+            if len(set(labels.values())) == len(labels):
+                return transform, labels
+    return None
+
+
+def _relabel(moved, symbols):
+    labels = {d: symbols[n] for n, d in enumerate(dict.fromkeys(moved.replace('.', '')))}
+    return moved.translate({ord(d): c for d, c in labels.items()}), labels
+
+
+@lru_cache(maxsize=None)
+def _prefixes(order):
+    # item getters for the first band of each transformed grid
+    return tuple(itemgetter(*transform[:order ** 3]) for transform in symmetries(order))
+
+
+@lru_cache(maxsize=None)
+def _getters(order):
+    # item getters for each whole transformed grid
+    return tuple(itemgetter(*transform) for transform in symmetries(order))
+
+
+def _symbols(order):
+    return SYMBOLS[:order * order]
+
+
+class SolveCache(object):
+    """Least recently used cache of solutions for puzzles up to a symmetry
+    and a relabeling
+
+    Puzzles are filed under their `invariant` and a new puzzle is only
+    compared (see `match`) with the cached puzzles that have the same
+    invariant, so a puzzle unlike any in the cache costs little more than
+    solving it. The answers to the most recent grids are remembered as well,
+    so asking for the same grid string again costs a single dictionary
+    lookup.
+
+    Parameters
+    ----------
+    maxsize(int)
+        (optional) the number of puzzles kept, one per set of related puzzles
+
+    order(int)
+        (optional) the block size of the board; only orders 2 and 3 have few
+        enough symmetries to compare puzzles quickly (see `symmetries`)
+    """
+    def __init__(self, maxsize=1024, order=3):
+        self.maxsize = maxsize
+        self.order = order
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()  # grid -> (invariant, solved grid)
+        self._buckets = {}             # invariant -> cached grids with that invariant
+        self._seen = OrderedDict()     # grid -> solved grid for recent grids
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self):
+        """Return the hits, misses, maximum size and current size of the cache"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Remove every entry and reset the statistics"""
+        self._entries.clear()
+        self._buckets.clear()
+        self._seen.clear()
+        self.hits = self.misses = 0
+
+    def solve(self, grid, solve_grid):
+        """Return the solution of a puzzle from the cache, solving and storing
+        it on a miss
+
+        Parameters
+        ----------
+        grid(string)
+            a string representing a sudoku grid with '.' for the empty boxes
+
+        solve_grid(callable)
+            solve_grid(grid) returns the solved grid string, or False if the
+            puzzle has no solution
+
+        Returns
+        -------
+        str or False
+            the solved grid string, or False if the puzzle has no solution
+        """
+        seen = self._seen
+        if grid in seen:
+            self.hits += 1
+            seen.move_to_end(grid)
+            return seen[grid]
+
+        key = invariant(grid, self.order)
+        bucket = self._buckets.setdefault(key, [])
+        for other in bucket:
+            found = match(grid, other, self.order)
+            if found is not None:
+                self.hits += 1
+                self._entries.move_to_end(other)
+                solved = self._entries[other][1]
+                return self._remember(grid, solved and self._restore(solved, *found))
+
+        self.misses += 1
+        solved = solve_grid(grid)
+        self._entries[grid] = (key, solved)
+        bucket.append(grid)
+        if len(self._entries) > self.maxsize:
+            other, (other_key, _) = self._entries.popitem(last=False)
+            self._buckets[other_key].remove(other)
+            if not self._buckets[other_key]:
+                del self._buckets[other_key]
+        return self._remember(grid, solved)
+
+    def _remember(self, grid, solved):
+        self._seen[grid] = solved
+        if len(self._seen) > self.maxsize:
+            self._seen.popitem(last=False)
+        return solved
+
+    def _restore(self, moved, transform, labels):
+        # undo the relabeling and the transformation; digits missing from
+        # the puzzle are free to swap, so any labels do
+        inverse = {c: d for d, c in labels.items()}
+        symbols = _symbols(self.order)
+        spare = iter(s for s in symbols if s not in labels)
+        for c in symbols:
+            if c not in inverse:
+                inverse[c] = next(spare)
+        solved = [None] * len(moved)
+        for i, c in zip(transform, moved):
+            solved[i] = inverse[c]
+        return ''.join(solved)
+
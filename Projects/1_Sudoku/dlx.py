@@ -0,0 +1,216 @@
+"""Exact cover (Dancing Links) backend for the Sudoku solver
+
+A sudoku is an exact cover problem: every candidate (box, digit) pair is a
+row of a 0/1 matrix, and the columns are the constraints that must each be
+met exactly once -- every box holds one digit, and every unit (including the
+diagonal units, when the board has them) holds every digit once. A solution
+is a set of rows with exactly one 1 in every column.
+
+`ExactCover` builds the matrix from the UnitTables of a board and solves it
+with Knuth's Algorithm X on dancing links: the matrix is stored as circular
+doubly linked lists in flat integer arrays, so covering and uncovering a
+column during the search is a handful of index updates. The links for the
+full board are built once; each puzzle starts from a copy of them with the
+rows of excluded candidates unlinked and the given boxes covered.
+
+The search always branches on the column with the fewest remaining rows, so
+it chooses between boxes (the box with the fewest candidates) and units (the
+unit with the fewest places for a digit) with the same rule, and it needs no
+constraint propagation between branches.
+
+Example
+-------
+
+    >>> cover = ExactCover(tables)
+    >>> masks = cover.search(bitboard.grid2masks(grid, tables))
+"""
+from collections import namedtuple
+
+
+Links = namedtuple('Links', ['left', 'right', 'up', 'down', 'column', 'size'])
+
+
+class ExactCover(object):
+    """The exact cover matrix of a sudoku board
+
+    Columns 1 through len(boxes) are the box constraints and the following
+    columns are the (unit, digit) constraints; node 0 is the root header.
+    Row r of the matrix is the candidate digit r % size for box r // size.
+
+    Parameters
+    ----------
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.make_tables`)
+    """
+    def __init__(self, tables):
+        self.tables = tables
+        self.size = size = len(tables.digits)
+        nboxes = len(tables.boxes)
+        self.columns = nboxes + len(tables.units) * size
+        self.rows = [[box + 1] + [1 + nboxes + unit * size + digit for unit in tables.members[box]]
+                     for box in range(nboxes) for digit in range(size)]
+
+        # headers: a circular list of the columns, each column an empty circular list
+        ncols = self.columns
+        left = [ncols] + list(range(ncols))
+        right = list(range(1, ncols + 1)) + [0]
+        up = list(range(ncols + 1))
+        down = list(range(ncols + 1))
+        column = list(range(ncols + 1))
+        size_of = [0] * (ncols + 1)
+        self.row_of = [-1] * (ncols + 1)
+        self.first = []
+        for r, cols in enumerate(self.rows):
+            start = len(column)
+            self.first.append(start)
+            for i, col in enumerate(cols):
+                node = start + i
+                left.append(start + (i - 1) % len(cols))
+                right.append(start + (i + 1) % len(cols))
+                up.append(up[col])
+                down.append(col)
+                down[up[col]] = node
+                up[col] = node
+                column.append(col)
+                size_of[col] += 1
+                self.row_of.append(r)
+        self.links = Links(left, right, up, down, column, size_of)
+
+    def search(self, masks, stats=None, recorder=None):
+        """Solve a board with Algorithm X
+
+        Parameters
+        ----------
+        masks(list)
+            the candidate mask of every box; a box with a single candidate is
+            a given and the rows of all the other candidates are left out
+
+        stats(Counter)
+            (optional) if a `collections.Counter` is passed, the number of
+            rows tried and failed choices are added to its 'nodes' and
+            'backtracks' counts
+
+        recorder(Recorder)
+            (optional) a utils.Recorder that receives the digits chosen by the
+            search, in the order they were chosen
+
+        Returns
+        -------
+        list or False
+            a new list of solved masks, or False if the board has no solution
+        """
+        links = self.prepare(masks)
+        if links is False:
+            return False
+        solution = []
+        if not _search(links, self.row_of, solution, stats):
+            return False
+        size = self.size
+        masks = list(masks)
+        for r in solution:
+            box, digit = divmod(r, size)
+            masks[box] = 1 << digit
+            if recorder is not None:
+                recorder.record(box, digit)
+        return masks
+
+    def prepare(self, masks):
+        """Return a copy of the links with the rows of the candidates excluded
+        by masks unlinked and the columns of the given boxes covered, or False
+        if two givens cover the same constraint"""
+        links = Links(*(list(a) for a in self.links))
+        left, right, up, down, column, size_of = links
+        size, rows, first = self.size, self.rows, self.first
+        full = self.tables.full
+        givens = []
+        for box, mask in enumerate(masks):
+            if mask == full:
+                continue
+            if mask and not mask & (mask - 1):
+                # covering the box column removes the other candidates
+                givens.append(box * size + mask.bit_length() - 1)
+                continue
+            for digit in range(size):
+                if not mask >> digit & 1:
+                    r = box * size + digit
+                    for node in range(first[r], first[r] + len(rows[r])):
+                        down[up[node]] = down[node]
+                        up[down[node]] = up[node]
+                        size_of[column[node]] -= 1
+
+        covered = set()
+        for r in givens:
+            cols = rows[r]
+            if covered.intersection(cols):
+                return False
+            covered.update(cols)
+            for col in cols:
+                _cover(links, col)
+        return links
+
+
+def _cover(links, col):
+    left, right, up, down, column, size_of = links
+    right[left[col]] = right[col]
+    left[right[col]] = left[col]
+    i = down[col]
+    while i != col:
+        j = right[i]
+        while j != i:
+            down[up[j]] = down[j]
+            up[down[j]] = up[j]
+            size_of[column[j]] -= 1
+            j = right[j]
+        i = down[i]
+
+
+def _uncover(links, col):
+    left, right, up, down, column, size_of = links
+    i = up[col]
+    while i != col:
+        j = left[i]
+        while j != i:
+            size_of[column[j]] += 1
+            down[up[j]] = j
+            up[down[j]] = j
+            j = left[j]
+        i = up[i]
+    right[left[col]] = col
+    left[right[col]] = col
+
+
+def _search(links, row_of, solution, stats):
+    right, down, column, size_of = links.right, links.down, links.column, links.size
+    col = right[0]
+    if col == 0:
+        return True
+    best, fewest = col, size_of[col]
+    while col and fewest > 1:
+        if size_of[col] < fewest:
+            best, fewest = col, size_of[col]
+        col = right[col]
+    if fewest == 0:
+        return False
+
+    _cover(links, best)
+    node = down[best]
+    while node != best:
+        if stats is not None:
+            stats['nodes'] += 1
+        solution.append(row_of[node])
+        j = right[node]
+        while j != node:
+            _cover(links, column[j])
+            j = right[j]
+        if _search(links, row_of, solution, stats):
+            return True
+        j = links.left[node]
+        while j != node:
+            _uncover(links, column[j])
+            j = links.left[j]
+        solution.pop()
+        if stats is not None:
+            stats['backtracks'] += 1
+        node = down[node]
+    _uncover(links, best)
+    return False
@@ -0,0 +1,220 @@
+"""Generate reproducible corpora of Sudoku puzzles with unique solutions
+
+Each puzzle starts from a random solved board, found by searching the empty
+board with the candidates of every box tried in a random order. Holes are
+then dug in a random order: a box is emptied only if the puzzle still has a
+unique solution, which is checked by counting solutions with an early exit
+at two (`bitboard.count_solutions`). Digging stops when the puzzle reaches
+the requested number of clues or no more boxes can be removed.
+
+Every puzzle is generated from its own random seed, derived from the corpus
+seed and the position of the puzzle, so a corpus is the same no matter how
+many worker processes generate it. By default the puzzles are diagonal
+sudokus that are valid for the unitlist in `solution.py`; --no-diagonal
+generates standard puzzles, and --order generates 4x4 to 25x25 boards.
+
+The difficulty is controlled by the number of clues and by --min-nodes,
+which only keeps puzzles that need at least that many search nodes (i.e.,
+puzzles where propagation alone stalls).
+
+The corpus is written one grid per line after a '#' header with the
+settings, so it can be read back by `batch.py` and `read_corpus`.
+
+Example
+-------
+
+    $ python generate.py --count 1000 --clues 24 --seed 0 -o corpus.txt
+    $ python generate.py --count 100 --clues 17 --min-nodes 20 --processes 4
+"""
+import argparse
+import random
+import sys
+
+from collections import Counter
+from multiprocessing import Pool
+
+import bitboard
+
+from utils import make_tables
+
+
+MAX_ATTEMPTS = 1000  # puzzles dug per corpus position before giving up on min_nodes
+
+def random_strategy(rng):
+    """Return a branching Strategy that tries the candidates of the box with
+    the fewest candidates in a random order"""
+    def order_random(masks, tables, box):
+        bits = bitboard.order_ascending(masks, tables, box)
+        rng.shuffle(bits)
+        return bits
+    return bitboard.Strategy('random', bitboard.select_mrv, order_random)
+
+
+def random_solution(tables, rng):
+    """Return the masks of a random solved board"""
+    masks = bitboard.grid2masks('.' * len(tables.boxes), tables)
+    return bitboard.search_trail(masks, tables, strategy=random_strategy(rng))
+
+
+def dig(solved, tables, rng, clues=0):
+    """Empty the boxes of a solved board in a random order as long as the
+    puzzle keeps a unique solution
+
+    Parameters
+    ----------
+    solved(list)
+        the masks of a solved board
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.make_tables`)
+
+    rng(Random)
+        the random number generator that orders the boxes
+
+    clues(int)
+        (optional) stop digging when the puzzle has this many clues left
+
+    Returns
+    -------
+    list
+        the masks of a puzzle with a unique solution
+    """
+    masks = list(solved)
+    order = list(range(len(masks)))
+    rng.shuffle(order)
+    given = len(masks)
+    for box in order:
+        if given <= clues:
+            break
+        masks[box] = tables.full
+        if bitboard.count_solutions(masks, tables, 2) == 1:
+            given -= 1
+        else:
+            masks[box] = solved[box]
+    return masks
+
+
+def make_puzzle(args):
+    """Generate the puzzle at an index of a corpus
+
+    Parameters
+    ----------
+    args(tuple)
+        (index, seed, order, diagonal, clues, min_nodes) for the puzzle
+
+    Returns
+    -------
+    str
+        the puzzle grid string
+
+    Raises
+    ------
+    ValueError
+        if none of MAX_ATTEMPTS puzzles needs min_nodes search nodes (e.g.,
+        small boards are always solved in a few nodes)
+    """
+    index, seed, order, diagonal, clues, min_nodes = args
+    tables = _tables(order, diagonal)
+    rng = random.Random('{}:{}'.format(seed, index))
+    for _ in range(MAX_ATTEMPTS):
+        masks = dig(random_solution(tables, rng), tables, rng, clues)
+        if min_nodes:
+            stats = Counter()
+            bitboard.search_trail(list(masks), tables, stats)
+            if stats['nodes'] < min_nodes:
+                continue
+        return bitboard.masks2grid(masks, tables)
+    raise ValueError("No puzzle needing {} search nodes found in {} attempts (order={}, clues={}, "
+                     "diagonal={})".format(min_nodes, MAX_ATTEMPTS, order, clues, diagonal))
+
+
+_TABLES = {}
+
+
+def _tables(order, diagonal):
+    if (order, diagonal) not in _TABLES:
+        _TABLES[order, diagonal] = make_tables(order, diagonal)
+    return _TABLES[order, diagonal]
+
+
+def generate(count, seed=0, order=3, diagonal=True, clues=0, min_nodes=0, processes=None):
+    """Yield the puzzles of a seeded corpus in order
+
+    Parameters
+    ----------
+    count(int)
+        number of puzzles
+
+    seed(int)
+        corpus seed; the same seed and settings always give the same puzzles
+
+    order(int)
+        block size of the board (3 for the standard 9x9 board)
+
+    diagonal(bool)
+        if True the puzzles are diagonal sudokus
+
+    clues(int)
+        stop digging holes when a puzzle has this many clues left; 0 digs
+        until no box can be emptied without losing uniqueness
+
+    min_nodes(int)
+        only keep puzzles that need at least this many search nodes
+
+    processes(int)
+        number of worker processes (defaults to the number of CPUs); 1
+        generates the puzzles in this process
+
+    Yields
+    ------
+    str
+        puzzle grid strings
+    """
+    tasks = ((i, seed, order, diagonal, clues, min_nodes) for i in range(count))
+    if processes == 1:
+        yield from map(make_puzzle, tasks)
+        return
+    with Pool(processes) as pool:
+        yield from pool.imap(make_puzzle, tasks, chunksize=max(1, min(16, count // 64)))
+
+
+def write_corpus(outfile, count, seed=0, order=3, diagonal=True, clues=0, min_nodes=0,
+                 processes=None):
+    """Generate a corpus (see `generate`) and write it to a text stream, one
+    grid per line after a '#' header with the settings"""
+    outfile.write("# count={} seed={} order={} diagonal={} clues={} min_nodes={}\n".format(
+        count, seed, order, diagonal, clues, min_nodes))
+    for grid in generate(count, seed, order, diagonal, clues, min_nodes, processes):
+        outfile.write(grid + '\n')
+
+
+def read_corpus(infile):
+    """Return the puzzle grids of a corpus written by `write_corpus`"""
+    return [line.strip() for line in infile if line.strip() and not line.startswith('#')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--count', type=int, default=100, help="Number of puzzles")
+    parser.add_argument('-c', '--clues', type=int, default=0,
+                        help="Stop digging at this many clues (default: as few as possible)")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="Corpus seed")
+    parser.add_argument('--order', type=int, default=3, help="Block size of the board (default: 3)")
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help="Generate standard instead of diagonal sudokus")
+    parser.add_argument('--min-nodes', type=int, default=0,
+                        help="Only keep puzzles that need at least this many search nodes")
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('-o', '--outfile', type=argparse.FileType('w'), default=sys.stdout,
+                        help="File to write the corpus (default: stdout)")
+    args = parser.parse_args(argv)
+    try:
+        write_corpus(args.outfile, args.count, args.seed, args.order, args.diagonal, args.clues,
+                     args.min_nodes, args.processes)
+    except ValueError as error:
+        parser.error(str(error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Variable and value ordering heuristics for the Sudoku searches
+
+Each strategy pairs a box selection function with a value ordering function
+(see `bitboard.Strategy`) and can be passed to `bitboard.search`,
+`bitboard.search_trail` or `solution.solve` either directly or by its name in
+`STRATEGIES`:
+
+    mrv         first box with the fewest candidates, lowest digit first
+    degree      fewest candidates, ties broken by the most unsolved peers
+    lcv         degree selection, trying the least constraining value first
+    unit        fewest candidates inside the unit with the fewest unsolved
+                boxes (the most constrained unit)
+
+`compare` solves a list of puzzles with several strategies and reports the
+nodes expanded and backtracks of each one.
+"""
+from collections import Counter
+
+from bitboard import MRV, Strategy, grid2masks, order_ascending, search_trail
+
+
+def select_mrv_degree(masks, tables):
+    """Return the unsolved box with the fewest candidates, breaking ties in
+    favor of the box with the most unsolved peers (the degree heuristic)"""
+    peers, popcount = tables.peers, tables.popcount
+    best, fewest, degree = None, None, -1
+    for box, mask in enumerate(masks):
+        count = popcount[mask]
+        if count < 2 or (fewest is not None and count > fewest):
+            continue
+        box_degree = sum(1 for peer in peers[box] if popcount[masks[peer]] > 1)
+        if count != fewest or box_degree > degree:
+            best, fewest, degree = box, count, box_degree
+    return best
+
+
+def select_unit(masks, tables):
+    """Return the unsolved box with the fewest candidates in the unit that has
+    the fewest unsolved boxes"""
+    popcount = tables.popcount
+    best_unit, fewest = None, None
+    for unit in tables.units:
+        unsolved = sum(1 for box in unit if popcount[masks[box]] > 1)
+        if unsolved and (fewest is None or unsolved < fewest):
+            best_unit, fewest = unit, unsolved
+            if unsolved == 1:
+                break
+    if best_unit is None:
+        return None
+    return min((box for box in best_unit if popcount[masks[box]] > 1),
+               key=lambda box: popcount[masks[box]])
+
+
+def order_lcv(masks, tables, box):
+    """Return the candidate bits of a box ordered by the number of unsolved
+    peers that would lose the candidate (the least constraining value first)"""
+    popcount = tables.popcount
+    open_peers = [masks[peer] for peer in tables.peers[box] if popcount[masks[peer]] > 1]
+    return sorted(order_ascending(masks, tables, box),
+                  key=lambda bit: sum(1 for mask in open_peers if mask & bit))
+
+
+STRATEGIES = {strategy.name: strategy for strategy in [
+    MRV,
+    Strategy('degree', select_mrv_degree, order_ascending),
+    Strategy('lcv', select_mrv_degree, order_lcv),
+    Strategy('unit', select_unit, order_ascending),
+]}
+
+
+def get_strategy(strategy):
+    """Return the Strategy for a name in STRATEGIES; Strategy instances (and
+    None, for the default) are returned unchanged"""
+    if strategy is None or isinstance(strategy, Strategy):
+        return strategy or MRV
+    try:
+        return STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError("Unknown strategy '{}'; choose from {}".format(
+            strategy, ", ".join(sorted(STRATEGIES)))) from None
+
+
+def compare(grids, tables, strategies=None, search_masks=search_trail):
+    """Solve every grid with each strategy and count the search effort
+
+    Parameters
+    ----------
+    grids : iterable
+        puzzle grid strings
+
+    tables : UnitTables
+        the integer unit and peer tables of the board
+
+    strategies : iterable
+        (optional) strategy names or Strategy instances; all of STRATEGIES
+        are compared by default
+
+    search_masks : callable
+        bitboard search function used to solve the puzzles
+
+    Returns
+    -------
+    dict
+        a mapping from strategy name to a Counter with the 'nodes' expanded,
+        'backtracks', and 'unsolved' puzzles for that strategy
+    """
+    grids = list(grids)
+    results = {}
+    for strategy in map(get_strategy, strategies or list(STRATEGIES)):
+        stats = Counter()
+        for grid in grids:
+            if search_masks(grid2masks(grid, tables), tables, stats=stats, strategy=strategy) is False:
+                stats['unsolved'] += 1
+        results[strategy.name] = stats
+    return results
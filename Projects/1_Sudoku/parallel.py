@@ -0,0 +1,177 @@
+"""Parallel depth first search for single hard Sudoku puzzles
+
+The top levels of the search tree are expanded breadth first in the calling
+process until there are enough open subproblems for every worker: each one
+is the board after a few branching assignments and the propagation that
+follows them. The subproblems are handed to a `multiprocessing` pool in
+depth first order, and as soon as one worker returns a solution the pool is
+terminated, which cancels the subproblems still running or waiting.
+
+Since the workers race, a puzzle with several solutions may return a
+different one than the sequential search; a puzzle with a unique solution
+always returns that solution.
+
+Example
+-------
+
+    $ python parallel.py '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1'
+"""
+import argparse
+import os
+import sys
+
+from collections import Counter
+from multiprocessing import Pool
+from timeit import default_timer as timer
+
+import bitboard
+
+from solution import tables as default_tables
+from utils import make_tables
+
+
+def split(masks, tables, count, strategy=bitboard.MRV):
+    """Expand the search tree breadth first until it has count open nodes
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks, one per box; it is not modified
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.make_tables`)
+
+    count(int)
+        the number of subproblems wanted; the result may have more (the last
+        level expanded is kept whole) or fewer (if the tree is smaller)
+
+    strategy(Strategy)
+        (optional) the box selection and value ordering heuristics
+
+    Returns
+    -------
+    list
+        the reduced boards of the subproblems in depth first order; a solved
+        board is returned on its own and an empty list means the puzzle has
+        no solution
+    """
+    masks = bitboard.reduce_puzzle(list(masks), tables)
+    if masks is False:
+        return []
+    frontier = [masks]
+    while len(frontier) < count:
+        children = []
+        for masks in frontier:
+            best = strategy.select(masks, tables)
+            if best is None:
+                return [masks]
+            for bit in strategy.order(masks, tables, best):
+                child = list(masks)
+                child[best] = bit
+                if bitboard.reduce_puzzle(child, tables, (best,)) is not False:
+                    children.append(child)
+        frontier = children
+        if not frontier:
+            break
+    return frontier
+
+
+_worker_tables = None
+
+
+def _init_worker(tables):
+    global _worker_tables
+    _worker_tables = tables
+
+
+def solve_subproblem(masks):
+    """Search a subproblem in a worker process
+
+    Returns
+    -------
+    tuple
+        (masks, nodes) with the solved masks or False, and the number of
+        nodes visited
+    """
+    stats = Counter()
+    return bitboard.search_trail(masks, _worker_tables, stats), stats['nodes']
+
+
+def parallel_search(masks, tables, processes=None, tasks=None, stats=None):
+    """Solve a board by searching subproblems on a pool of worker processes
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks, one per box; it is not modified
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.make_tables`)
+
+    processes(int)
+        (optional) number of worker processes (defaults to the number of CPUs)
+
+    tasks(int)
+        (optional) number of subproblems to split the puzzle into; four per
+        worker process by default, so that fast workers take over the
+        subproblems of slow ones
+
+    stats(Counter)
+        (optional) receives the number of 'subproblems' and the 'nodes'
+        visited by the workers that finished before the solution was found
+
+    Returns
+    -------
+    list or False
+        the solved masks, or False if the board has no solution
+    """
+    processes = processes or os.cpu_count() or 1
+    subproblems = split(masks, tables, tasks or 4 * processes)
+    if stats is not None:
+        stats['subproblems'] += len(subproblems)
+    if not subproblems:
+        return False
+    if len(subproblems) == 1 and bitboard.select_mrv(subproblems[0], tables) is None:
+        return subproblems[0]
+
+    with Pool(processes, _init_worker, (tables,)) as pool:
+        for solved, nodes in pool.imap_unordered(solve_subproblem, subproblems):
+            if stats is not None:
+                stats['nodes'] += nodes
+            if solved:
+                return solved  # leaving the block terminates the other workers
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('grid', help="Puzzle grid string ('.' for the empty boxes)")
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('-t', '--tasks', type=int, default=None,
+                        help="Number of subproblems (default: four per process)")
+    parser.add_argument('--order', type=int, default=3, help="Block size of the board (default: 3)")
+    parser.add_argument('--no-diagonal', dest='diagonal', action='store_false',
+                        help="Solve a standard instead of a diagonal sudoku")
+    args = parser.parse_args(argv)
+    if args.order == 3 and args.diagonal:
+        tables = default_tables
+    else:
+        tables = make_tables(args.order, args.diagonal)
+    masks = bitboard.grid2masks(args.grid, tables)
+
+    start = timer()
+    bitboard.search_trail(list(masks), tables)
+    elapsed = timer() - start
+    print("sequential {:.3f}s".format(elapsed), file=sys.stderr)
+
+    stats = Counter()
+    start = timer()
+    solved = parallel_search(masks, tables, args.processes, args.tasks, stats)
+    elapsed = timer() - start
+    print("parallel   {:.3f}s ({} subproblems)".format(elapsed, stats['subproblems']), file=sys.stderr)
+    print(bitboard.masks2grid(solved, tables) if solved else 'unsolvable')
+
+
+if __name__ == "__main__":
+    main()
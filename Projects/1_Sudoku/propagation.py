@@ -0,0 +1,259 @@
+"""Propagation techniques that run when eliminate, only choice and naked twins
+stall
+
+Each technique removes candidates from a list of masks in place, pushes the
+old candidates of every box it changes on an optional undo trail, and
+returns the masks, or False when it finds that the board has no solution.
+`bitboard.reduce_puzzle` runs them as an ordered pipeline (see
+`bitboard.Technique`), and they can be passed to `bitboard.search`,
+`bitboard.search_trail` or `solution.solve` directly or by their names in
+`TECHNIQUES`:
+
+    naked_triples      three boxes of a unit that allow only the same three
+                       digits remove those digits from the rest of the unit
+    naked_quads        naked triples with four digits and four boxes
+    locked_candidates  pointing pairs and box-line reduction: a digit whose
+                       places in one unit all lie in a second unit is
+                       removed from the rest of the second unit
+    hidden_pairs       two digits that fit only in the same two boxes of a
+                       unit remove every other candidate of those boxes
+    hidden_triples     hidden pairs with three digits and three boxes
+    x_wing             a digit that fits in exactly two boxes of each of
+                       two units, pairwise sharing two other units, is
+                       removed from the rest of those two units
+
+The techniques only rely on every unit holding every digit exactly once, so
+they work with any board from `utils.make_tables`, including the diagonal
+units. `PIPELINE` lists them from the cheapest to the most expensive, which
+is the order the pipeline tries them in.
+"""
+from functools import lru_cache
+from itertools import combinations
+
+from bitboard import Technique
+
+
+def locked_candidates(masks, tables, trail=None):
+    """Remove every digit whose places in a unit all lie inside a second unit
+    from the boxes of the second unit outside of the first
+
+    With a square as the first unit this is the pointing pairs strategy, and
+    with a row or column it is box-line reduction.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate bitmasks; it is updated in place
+
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.extract_tables`)
+
+    trail(list)
+        (optional) receives the index and old candidates of every changed box
+        (see `bitboard.undo`)
+
+    Returns
+    -------
+    list or False
+        The same list of masks, or False if the board has no solution
+    """
+    for outside, inside, others in unit_intersections(tables.units):
+        spare = 0
+        for box in outside:
+            spare |= masks[box]
+        locked = 0
+        for box in inside:
+            locked |= masks[box]
+        locked &= ~spare
+        if not locked:
+            continue
+        keep = ~locked
+        for box in others:
+            mask = masks[box]
+            if mask & locked:
+                if not mask & keep:
+                    return False
+                if trail is not None:
+                    trail.append(box)
+                    trail.append(mask)
+                masks[box] = mask & keep
+    return masks
+
+
+@lru_cache(maxsize=None)
+def unit_intersections(units):
+    """Return (outside, inside, others) box tuples for every ordered pair of
+    units that share at least two boxes: the boxes of the first unit outside
+    of the second, the shared boxes, and the boxes of the second unit
+    outside of the first"""
+    pairs = []
+    for a, b in combinations(units, 2):
+        inside = tuple(sorted(set(a).intersection(b)))
+        if len(inside) > 1:
+            a_only = tuple(box for box in a if box not in inside)
+            b_only = tuple(box for box in b if box not in inside)
+            pairs.append((a_only, inside, b_only))
+            pairs.append((b_only, inside, a_only))
+    return tuple(pairs)
+
+
+def naked_subsets(masks, tables, size, trail=None):
+    """Remove the digits of every group of size boxes in a unit that together
+    allow only size digits from the other boxes of the unit
+
+    See `locked_candidates` for the other parameters.
+    """
+    popcount = tables.popcount
+    for unit in tables.units:
+        open_boxes = [box for box in unit if 1 < popcount[masks[box]] <= size]
+        for group in combinations(open_boxes, size):
+            union = 0
+            for box in group:
+                union |= masks[box]
+            count = popcount[union]
+            if count < size:
+                return False
+            if count > size:
+                continue
+            keep = ~union
+            for box in unit:
+                mask = masks[box]
+                if mask & union and box not in group:
+                    if not mask & keep:
+                        return False
+                    if trail is not None:
+                        trail.append(box)
+                        trail.append(mask)
+                    masks[box] = mask & keep
+    return masks
+
+
+def hidden_subsets(masks, tables, size, trail=None):
+    """Restrict every group of size boxes in a unit that are the only places
+    for size digits to those digits
+
+    See `locked_candidates` for the other parameters.
+    """
+    popcount, width = tables.popcount, len(tables.digits)
+    for unit in tables.units:
+        places = [0] * width
+        for i, box in enumerate(unit):
+            mask = masks[box]
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                places[bit.bit_length() - 1] |= 1 << i
+        digits = [digit for digit in range(width) if 1 < popcount[places[digit]] <= size]
+        for group in combinations(digits, size):
+            where = keep = 0
+            for digit in group:
+                where |= places[digit]
+                keep |= 1 << digit
+            count = popcount[where]
+            if count < size:
+                return False
+            if count > size:
+                continue
+            for i, box in enumerate(unit):
+                mask = masks[box]
+                if where >> i & 1 and mask & ~keep:
+                    if not mask & keep:
+                        return False
+                    if trail is not None:
+                        trail.append(box)
+                        trail.append(mask)
+                    masks[box] = mask & keep
+    return masks
+
+
+def x_wing(masks, tables, trail=None):
+    """Remove a digit from two cover units when it fits in exactly two boxes
+    of each of two base units and each cover unit holds one box from each
+
+    In each base unit the digit goes in one of its two boxes, and the two
+    boxes in a cover unit cannot both hold it, so each cover unit gets the
+    digit from one of the four corners and nowhere else. On a standard board
+    the base units are two rows and the cover units two columns (or the
+    other way around).
+
+    See `locked_candidates` for the parameters.
+    """
+    units, members = tables.units, tables.members
+    for digit in range(len(tables.digits)):
+        bit = 1 << digit
+        bases = []
+        for unit in units:
+            where = [box for box in unit if masks[box] & bit]
+            if len(where) == 2:
+                bases.append(where)
+        for (a1, b1), (a2, b2) in combinations(bases, 2):
+            if len({a1, b1, a2, b2}) < 4:
+                continue
+            for (x1, x2), (y1, y2) in (((a1, a2), (b1, b2)), ((a1, b2), (b1, a2))):
+                for c1 in set(members[x1]).intersection(members[x2]):
+                    for c2 in set(members[y1]).intersection(members[y2]):
+                        if c1 == c2:
+                            continue
+                        for box in units[c1] + units[c2]:
+                            mask = masks[box]
+                            if mask & bit and box not in (x1, x2, y1, y2):
+                                if mask == bit:
+                                    return False
+                                if trail is not None:
+                                    trail.append(box)
+                                    trail.append(mask)
+                                masks[box] = mask & ~bit
+    return masks
+
+
+def hidden_pairs(masks, tables, trail=None):
+    """Apply `hidden_subsets` to pairs of digits"""
+    return hidden_subsets(masks, tables, 2, trail)
+
+
+def hidden_triples(masks, tables, trail=None):
+    """Apply `hidden_subsets` to triples of digits"""
+    return hidden_subsets(masks, tables, 3, trail)
+
+
+def naked_triples(masks, tables, trail=None):
+    """Apply `naked_subsets` to triples of boxes"""
+    return naked_subsets(masks, tables, 3, trail)
+
+
+def naked_quads(masks, tables, trail=None):
+    """Apply `naked_subsets` to quads of boxes"""
+    return naked_subsets(masks, tables, 4, trail)
+
+
+# ordered by the measured time per call on random diagonal puzzles
+PIPELINE = (
+    Technique('naked_triples', naked_triples),
+    Technique('naked_quads', naked_quads),
+    Technique('locked_candidates', locked_candidates),
+    Technique('hidden_pairs', hidden_pairs),
+    Technique('hidden_triples', hidden_triples),
+    Technique('x_wing', x_wing),
+)
+
+TECHNIQUES = {technique.name: technique for technique in PIPELINE}
+
+
+def get_pipeline(pipeline):
+    """Return a tuple of Techniques for a pipeline given as 'all' (every
+    technique in PIPELINE), or as a sequence of names in TECHNIQUES or
+    Technique instances; None gives the empty pipeline"""
+    if pipeline is None:
+        return ()
+    if pipeline == 'all':
+        return PIPELINE
+    techniques = []
+    for technique in pipeline:
+        if not isinstance(technique, Technique):
+            try:
+                technique = TECHNIQUES[technique]
+            except KeyError:
+                raise ValueError("Unknown technique '{}'; choose from {}".format(
+                    technique, ", ".join(TECHNIQUES))) from None
+        techniques.append(technique)
+    return tuple(techniques)
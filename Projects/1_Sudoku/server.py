@@ -0,0 +1,193 @@
+"""Long-lived Sudoku solve server speaking JSON lines
+
+Each request is one JSON object per line, read from stdin or from the
+connections to a local (unix domain) socket, and each response is one JSON
+object per line written back in the same order. A warm server keeps the unit
+and peer tables of every board shape it has seen and a `canonical.SolveCache`
+per shape, so a request costs the solve alone instead of starting Python and
+importing the solver.
+
+Request fields (only grid is required):
+
+    id        any JSON value, echoed in the response
+    grid      the puzzle string, '.' or '0' for the empty boxes
+    order     the block size of the board, 2 to 5 (default: 3)
+    diagonal  solve as a diagonal sudoku (default: true)
+    strategy  a branching strategy name from `ordering.STRATEGIES`
+    pipeline  'all' or a list of technique names from `propagation.TECHNIQUES`
+    nodes     a node budget for the search
+    seconds   a time budget for the search
+
+Response fields:
+
+    id        the id of the request, if it had one
+    status    'solved', 'unsolvable', 'exhausted' or 'error'
+    solution  the solved grid string, or the best partial grid when the
+              budget is exhausted
+    reason    why the budget ran out ('nodes' or 'deadline'), or the error
+    nodes     the number of search nodes visited
+    cached    true if the answer came from the solve cache (only 4x4 and
+              9x9 boards are cached)
+    ms        the time spent on the request in milliseconds
+
+Example
+-------
+
+    $ echo '{"id": 1, "grid": "2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3"}' | python server.py
+    $ python server.py --socket /tmp/sudoku.sock
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+
+from collections import Counter
+from timeit import default_timer as timer
+
+import bitboard
+
+from canonical import SolveCache, symmetry_count
+from ordering import get_strategy
+from propagation import get_pipeline
+from solution import tables as default_tables
+from utils import make_tables
+
+
+ORDERS = range(2, 6)  # 4x4 to 25x25 boards
+MAX_CACHE_SYMMETRIES = 100  # canonicalizing tries every symmetry (96 on 9x9, 18432 on 16x16)
+
+
+class Server(object):
+    """Answers solve requests with the tables and caches of earlier requests
+
+    Parameters
+    ----------
+    cache_size(int)
+        (optional) the number of canonical puzzles cached per board shape, or
+        0 to disable the cache; only the shapes with at most
+        MAX_CACHE_SYMMETRIES symmetries (4x4 and 9x9 boards) are cached,
+        since canonicalizing a larger board costs more than solving it
+    """
+    def __init__(self, cache_size=1024):
+        self.cache_size = cache_size
+        self._tables = {(3, True): default_tables}
+        self._caches = {}
+
+    def tables(self, order, diagonal):
+        """Return the (cached) unit tables of a board shape"""
+        key = (order, diagonal)
+        if key not in self._tables:
+            self._tables[key] = make_tables(order, diagonal)
+        return self._tables[key]
+
+    def handle(self, request):
+        """Solve one request (a dict) and return the response (a dict)"""
+        start = timer()
+        try:
+            response = self._solve(request)
+        except (KeyError, TypeError, ValueError) as error:
+            response = {'status': 'error', 'reason': str(error)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        response['ms'] = round(1000 * (timer() - start), 3)
+        return response
+
+    def handle_line(self, line):
+        """Answer one JSON line with a JSON line"""
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            response = {'status': 'error', 'reason': 'invalid JSON: {}'.format(error)}
+        else:
+            response = self.handle(request)
+        return json.dumps(response) + '\n'
+
+    def serve(self, infile, outfile):
+        """Answer every request line of a text stream, flushing each response"""
+        for line in infile:
+            if line.strip():
+                outfile.write(self.handle_line(line))
+                outfile.flush()
+
+    def _solve(self, request):
+        if not isinstance(request, dict):
+            raise TypeError("a request must be a JSON object")
+        order, diagonal = int(request.get('order', 3)), bool(request.get('diagonal', True))
+        if order not in ORDERS:
+            raise ValueError("order must be between {} and {}".format(ORDERS[0], ORDERS[-1]))
+        tables = self.tables(order, diagonal)
+        grid = str(request['grid'])
+        if order == 3:
+            grid = grid.replace('0', '.')
+        if len(grid) != len(tables.boxes) or not set(grid) <= set(tables.digits + '.'):
+            raise ValueError("grid must have one digit or '.' for each of the {} boxes".format(
+                len(tables.boxes)))
+        strategy = get_strategy(request.get('strategy'))
+        pipeline = get_pipeline(request.get('pipeline'))
+        masks = bitboard.grid2masks(grid, tables)
+
+        if request.get('nodes') is not None or request.get('seconds') is not None:
+            budget = bitboard.Budget(request.get('nodes'), request.get('seconds'))
+            result = bitboard.bounded_search(masks, tables, budget, strategy, pipeline)
+            return {'status': result.status,
+                    'solution': result.board and bitboard.masks2grid(result.board, tables),
+                    'reason': result.reason, 'nodes': result.nodes}
+
+        stats = Counter()
+
+        def solve_grid(grid):
+            solved = bitboard.search_trail(masks, tables, stats, strategy, pipeline=pipeline)
+            return solved and bitboard.masks2grid(solved, tables)
+
+        cache = self.cache_size and symmetry_count(order) <= MAX_CACHE_SYMMETRIES
+        if cache:
+            solved = self._cache(order, diagonal).solve(grid, solve_grid)
+        else:
+            solved = solve_grid(grid)
+        return {'status': 'solved' if solved else 'unsolvable', 'solution': solved or None,
+                'nodes': stats['nodes'], 'cached': bool(cache) and not stats['nodes']}
+
+    def _cache(self, order, diagonal):
+        key = (order, diagonal)
+        if key not in self._caches:
+            self._caches[key] = SolveCache(self.cache_size, order)
+        return self._caches[key]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(self.server.solver.handle_line(line.decode()).encode())
+
+
+def serve_socket(path, server=None):
+    """Answer the requests of every connection to a unix domain socket, one
+    connection at a time, until interrupted"""
+    if os.path.exists(path):
+        os.unlink(path)
+    with socketserver.UnixStreamServer(path, _Handler) as listener:
+        listener.solver = server or Server()
+        try:
+            listener.serve_forever()
+        finally:
+            os.unlink(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--socket', default=None, metavar='PATH',
+                        help="Listen on a unix domain socket instead of stdin")
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help="Canonical puzzles cached per board shape, 0 to disable (default: 1024)")
+    args = parser.parse_args(argv)
+    server = Server(args.cache_size)
+    if args.socket:
+        serve_socket(args.socket, server)
+    else:
+        server.serve(sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
 
+from contextlib import nullcontext
+
 from utils import *
 
+import bitboard
+
+from dlx import ExactCover
+from ordering import get_strategy
+from propagation import get_pipeline
+
 
 row_units = [cross(r, cols) for r in rows]
 column_units = [cross(rows, c) for c in cols]
 square_units = [cross(rs, cs) for rs in ('ABC','DEF','GHI') for cs in ('123','456','789')]
 unitlist = row_units + column_units + square_units
 
-# TODO: Update the unit list to add the new diagonal units
-unitlist = unitlist
+diagonal_units = [[r + c for r, c in zip(rows, cols)], [r + c for r, c in zip(rows, cols[::-1])]]
+unitlist = unitlist + diagonal_units
 
 
 # Must be called after all units (including diagonals) are added to the unitlist
-units = extract_units(unitlist, boxes)
-peers = extract_peers(units, boxes)
+tables = extract_tables(unitlist, boxes)
+units = extract_units(unitlist, boxes, tables)
+peers = extract_peers(units, boxes, tables)
+exact_cover = ExactCover(tables)
+
+BACKENDS = ('bitboard', 'dlx')
 
 
 def naked_twins(values):
@@ -53,8 +65,8 @@ def naked_twins(values):
     Pseudocode for this algorithm on github:
     https://github.com/udacity/artificial-intelligence/blob/master/Projects/1_Sudoku/pseudocode.md
     """
-    # TODO: Implement this function!
-    raise NotImplementedError
+    masks = bitboard.naked_twins(bitboard.values2masks(values), tables)
+    return bitboard.update_values(values, masks)
 
 
 def eliminate(values):
@@ -73,8 +85,8 @@ def eliminate(values):
     dict
         The values dictionary with the assigned values eliminated from peers
     """
-    # TODO: Copy your code from the classroom to complete this function
-    raise NotImplementedError
+    masks = bitboard.eliminate(bitboard.values2masks(values), tables)
+    return bitboard.update_values(values, masks)
 
 
 def only_choice(values):
@@ -97,8 +109,8 @@ def only_choice(values):
     -----
     You should be able to complete this function by copying your code from the classroom
     """
-    # TODO: Copy your code from the classroom to complete this function
-    raise NotImplementedError
+    masks = bitboard.only_choice(bitboard.values2masks(values), tables)
+    return bitboard.update_values(values, masks)
 
 
 def reduce_puzzle(values):
@@ -115,19 +127,46 @@ def reduce_puzzle(values):
         The values dictionary after continued application of the constraint strategies
         no longer produces any changes, or False if the puzzle is unsolvable 
     """
-    # TODO: Copy your code from the classroom and modify it to complete this function
-    raise NotImplementedError
+    masks = bitboard.reduce_puzzle(bitboard.values2masks(values), tables)
+    if masks is False:
+        return False
+    return bitboard.update_values(values, masks)
 
 
-def search(values):
+def search(values, trail=False, strategy=None, pipeline=None, budget=None):
     """Apply depth first search to solve Sudoku puzzles in order to solve puzzles
     that cannot be solved by repeated reduction alone.
 
+    The assignments are logged to the active utils.Recorder and the search
+    events are reported to the active utils.Hooks, if there are any.
+
     Parameters
     ----------
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    trail(bool)
+        (optional) if True the search updates a single board in place and
+        undoes its changes on backtrack instead of copying the board for
+        every branch; both modes return the same solution
+
+    strategy(str or Strategy)
+        (optional) the branching heuristics, by name (see `ordering.STRATEGIES`)
+        or as a `bitboard.Strategy`; defaults to the first box with the fewest
+        candidates, lowest digit first
+
+    pipeline(str or list)
+        (optional) the propagation techniques tried when eliminate, only choice
+        and naked twins stall: 'all', or a list of names (see
+        `propagation.TECHNIQUES`); none by default
+
+    budget(Budget)
+        (optional) a bitboard.Budget with a node limit, a deadline and/or a
+        cancellation token; when it is given the search updates a single
+        board in place and returns a bitboard.SearchResult whose board is the
+        values dictionary (solved, or the best partial state when the budget
+        ran out) or None if the puzzle has no solution
+
     Returns
     -------
     dict or False
@@ -138,11 +177,46 @@ def search(values):
     You should be able to complete this function by copying your code from the classroom
     and extending it to call the naked twins strategy.
     """
-    # TODO: Copy your code from the classroom to complete this function
-    raise NotImplementedError
+    if budget is not None:
+        result = bitboard.bounded_search(bitboard.values2masks(values), tables, budget,
+                                         get_strategy(strategy), get_pipeline(pipeline),
+                                         recorder=Recorder.active, hooks=Hooks.active)
+        if result.board is None:
+            return result
+        values.update(bitboard.masks2values(result.board))
+        return result._replace(board=values)
+    search_masks = bitboard.search_trail if trail else bitboard.search
+    masks = search_masks(bitboard.values2masks(values), tables, strategy=get_strategy(strategy),
+                         recorder=Recorder.active, pipeline=get_pipeline(pipeline),
+                         hooks=Hooks.active)
+    if masks is False:
+        return False
+    values.update(bitboard.masks2values(masks))
+    return values
+
+
+def search_dlx(values):
+    """Solve a Sudoku puzzle as an exact cover problem with dancing links (see `dlx.py`)
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    Returns
+    -------
+    dict or False
+        The values dictionary with all boxes assigned or False
+    """
+    masks = exact_cover.search(bitboard.values2masks(values), recorder=Recorder.active)
+    if masks is False:
+        return False
+    values.update(bitboard.masks2values(masks))
+    return values
 
 
-def solve(grid):
+def solve(grid, strategy=None, recorder=None, backend='bitboard', pipeline=None, cache=None,
+          budget=None, hooks=None):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
@@ -152,25 +226,115 @@ def solve(grid):
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+    strategy(str or Strategy)
+        (optional) the branching heuristics used by the search (see `search`)
+
+    recorder(Recorder)
+        (optional) a utils.Recorder that receives the assignments leading to the
+        solution, e.g., for visualization with PySudoku
+
+    backend(str)
+        (optional) 'bitboard' for the constraint propagation search (the
+        default) or 'dlx' for the exact cover search with dancing links; the
+        branching strategy only applies to the bitboard backend
+
+    pipeline(str or list)
+        (optional) the propagation techniques used by the bitboard search (see
+        `search`)
+
+    cache(SolveCache)
+        (optional) a canonical.SolveCache; puzzles that are symmetries or
+        relabelings of a cached puzzle are answered from the cache, and the
+        solutions of the others are stored in it. The cache is not used
+        when a recorder, a budget or hooks are given.
+
+    budget(Budget)
+        (optional) limits on the nodes, time and cancellation of the search;
+        when it is given solve returns a bitboard.SearchResult (see `search`)
+
+    hooks(Hooks)
+        (optional) a utils.Hooks that receives the assignment, elimination,
+        propagation round, branch, backtrack and contradiction events of the
+        bitboard search
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
     """
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend '{}'; choose from {}".format(backend, ", ".join(BACKENDS)))
+    if backend == 'dlx' and (strategy is not None or pipeline is not None or budget is not None or
+                             hooks is not None):
+        raise ValueError("Strategies, pipelines, budgets and hooks only apply to the bitboard backend")
+    if cache is not None and recorder is None and budget is None and hooks is None:
+        def solve_grid(grid):
+            values = solve(grid, strategy, None, backend, pipeline)
+            return values and values2grid(values)
+        solved = cache.solve(grid, solve_grid)
+        return solved and grid2values(solved)
     values = grid2values(grid)
-    values = search(values)
-    return values
+    with nullcontext() if recorder is None else recorder, nullcontext() if hooks is None else hooks:
+        if backend == 'dlx':
+            return search_dlx(values)
+        return search(values, trail=True, strategy=strategy, pipeline=pipeline, budget=budget)
+
+
+def solutions(grid, strategy=None, pipeline=None):
+    """Yield every solution of a Sudoku puzzle lazily, in search order
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    strategy(str or Strategy)
+        (optional) the branching heuristics used by the search (see `search`)
+
+    pipeline(str or list)
+        (optional) the propagation techniques used by the search (see `search`)
+
+    Yields
+    ------
+    dict
+        The dictionary representation of each solved sudoku grid
+    """
+    masks = bitboard.grid2masks(grid)
+    for solved in bitboard.iter_solutions(masks, tables, strategy=get_strategy(strategy),
+                                          pipeline=get_pipeline(pipeline)):
+        yield bitboard.masks2values(solved)
+
+
+def count_solutions(grid, limit=2):
+    """Count the solutions of a Sudoku puzzle, stopping as soon as limit are found
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    limit(int)
+        (optional) the largest count of interest; 2 is enough to tell whether
+        a puzzle has a unique solution
+
+    Returns
+    -------
+    int
+        The number of solutions, up to limit
+    """
+    return bitboard.count_solutions(bitboard.grid2masks(grid), tables, limit)
 
 
 if __name__ == "__main__":
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
+    recorder = Recorder()
+    result = solve(diag_sudoku_grid, recorder=recorder)
     display(result)
 
     try:
         import PySudoku
-        PySudoku.play(grid2values(diag_sudoku_grid), result, history)
+        PySudoku.play(grid2values(diag_sudoku_grid), recorder)
 
     except SystemExit:
         pass
@@ -0,0 +1,52 @@
+import io
+import unittest
+
+import batch
+
+
+class TestBatch(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+    solution = '267945381853716249491823576576438192384192657129657438642379815935281764718564923'
+    unsolvable_grid = '22' + '.' * 79
+
+    def test_read_grids(self):
+        lines = ['# comment\n', '\n', '  ' + self.diagonal_grid.replace('.', '0') + '  \n']
+        self.assertEqual(list(batch.read_grids(lines)), [self.diagonal_grid])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(batch.percentile(values, 50), 50)
+        self.assertEqual(batch.percentile(values, 99), 99)
+        self.assertEqual(batch.percentile([7], 99), 7)
+        self.assertEqual(batch.percentile([], 50), 0.)
+
+    def test_solve_stream_preserves_order(self):
+        grids = [self.diagonal_grid, self.unsolvable_grid, self.solution, '123'] * 3
+        results = list(batch.solve_stream(grids, processes=2, chunksize=1, backlog=1))
+        self.assertEqual([grid for grid, _, _ in results], grids)
+        self.assertEqual([solution for _, solution, _ in results],
+                         [self.solution, None, self.solution, None] * 3)
+
+    def test_solve_file(self):
+        infile = io.StringIO('\n'.join([self.diagonal_grid, self.unsolvable_grid, '123']))
+        outfile = io.StringIO()
+        stats = batch.solve_file(infile, outfile, processes=1)
+        self.assertEqual(outfile.getvalue().split(), [self.solution, 'unsolvable', 'invalid'])
+        self.assertEqual(stats.puzzles, 3)
+        self.assertLessEqual(stats.p50, stats.p99)
+
+    def test_board_options(self):
+        # rows A and B swapped: still a standard sudoku, but no longer a diagonal one
+        standard = self.solution[9:18] + self.solution[:9] + self.solution[18:]
+        grid = '...' + standard[3:]
+        self.assertEqual(batch.solve_grid(grid)[0], None)
+        self.assertEqual(batch.solve_grid(grid, batch.board_tables(diagonal=False))[0], standard)
+        infile = io.StringIO('\n'.join([grid, '12..' + '.' * 12, self.diagonal_grid]))
+        outfile = io.StringIO()
+        batch.solve_file(infile, outfile, processes=1, order=2, diagonal=False)
+        wrong_size, solved, invalid = outfile.getvalue().split()
+        self.assertEqual((wrong_size, len(solved), invalid), ('invalid', 16, 'invalid'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import random
+import unittest
+
+from collections import Counter
+
+import benchmark
+import bitboard
+import solution
+
+from utils import boxes, extract_peers, extract_units, grid2values, values2grid
+
+
+class TestTables(unittest.TestCase):
+    def test_popcount(self):
+        for mask in range(bitboard.ALL_DIGITS + 1):
+            self.assertEqual(solution.tables.popcount[mask], len(bitboard.MASK_DIGITS[mask]))
+
+    def test_digits2mask(self):
+        self.assertEqual(bitboard.digits2mask('237'), 0b1000110)
+        self.assertEqual(bitboard.digits2mask('732'), 0b1000110)
+        self.assertEqual(bitboard.digits2mask(''), 0)
+
+
+class TestAdapters(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_grid_roundtrip(self):
+        self.assertEqual(bitboard.masks2grid(bitboard.grid2masks(self.grid)), self.grid)
+
+    def test_values_roundtrip(self):
+        values = grid2values(self.grid)
+        masks = bitboard.values2masks(values)
+        self.assertEqual(masks, bitboard.grid2masks(self.grid))
+        self.assertEqual(bitboard.masks2values(masks), values)
+        self.assertEqual(values2grid(bitboard.masks2values(masks)), self.grid)
+
+
+class TestUnitTables(unittest.TestCase):
+    def test_tables_match_string_api(self):
+        tables = solution.tables
+        self.assertEqual(len(tables.units), len(solution.unitlist))
+        for i, box in enumerate(boxes):
+            self.assertEqual({boxes[p] for p in tables.peers[i]}, solution.peers[box])
+            self.assertEqual([solution.unitlist[u] for u in tables.members[i]], solution.units[box])
+
+    def test_diagonal_peers(self):
+        self.assertEqual(len(solution.peers['A1']), 26)
+        self.assertEqual(len(solution.peers['E5']), 32)
+        self.assertEqual(len(solution.peers['A2']), 20)
+
+    def test_string_api_without_tables(self):
+        units = extract_units(solution.unitlist, boxes)
+        self.assertEqual(units, solution.units)
+        self.assertEqual(extract_peers(units, boxes), solution.peers)
+
+
+class TestEngine(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_eliminate(self):
+        values = grid2values(self.grid)
+        masks = bitboard.eliminate(bitboard.grid2masks(self.grid), solution.tables)
+        for box, digits in bitboard.masks2values(masks).items():
+            if len(values[box]) == 1:
+                continue
+            for peer in solution.peers[box]:
+                if len(values[peer]) == 1:
+                    self.assertNotIn(values[peer], digits)
+
+    def test_reduce_contradiction(self):
+        grid = '22' + '.' * 79
+        self.assertFalse(bitboard.reduce_puzzle(bitboard.grid2masks(grid), solution.tables))
+
+    def test_reduce_reaches_sweep_fixpoint(self):
+        solved = '267945381853716249491823576576438192384192657129657438642379815935281764718564923'
+        rng = random.Random(0)
+        for _ in range(200):
+            grid = ''.join(d if rng.random() < 0.2 else '.' for d in solved)
+            masks = bitboard.grid2masks(grid)
+            while True:
+                before = list(masks)
+                bitboard.eliminate(masks, solution.tables)
+                bitboard.only_choice(masks, solution.tables)
+                bitboard.naked_twins(masks, solution.tables)
+                if masks == before:
+                    break
+            self.assertEqual(bitboard.reduce_puzzle(bitboard.grid2masks(grid), solution.tables), masks)
+
+    def test_reduce_changed_boxes(self):
+        masks = bitboard.reduce_puzzle(bitboard.grid2masks('12' + '.' * 79), solution.tables)
+        box = next(i for i, mask in enumerate(masks) if solution.tables.popcount[mask] > 1)
+        attempt = list(masks)
+        attempt[box] = masks[box] & -masks[box]
+        expected = bitboard.reduce_puzzle(list(attempt), solution.tables)
+        self.assertEqual(bitboard.reduce_puzzle(attempt, solution.tables, [box]), expected)
+
+    def test_reduce_missing_digit(self):
+        masks = bitboard.grid2masks('.' * 81)
+        for box in range(9):  # no box in row A may hold a 9
+            masks[box] &= ~bitboard.DIGIT_MASK['9']
+        self.assertFalse(bitboard.reduce_puzzle(masks, solution.tables))
+
+    def test_search_trail_matches_copying_search(self):
+        for grid in benchmark.sample_grids(40, 20, seed=0):
+            copy_stats, trail_stats = Counter(), Counter()
+            expected = bitboard.search(bitboard.grid2masks(grid), solution.tables, stats=copy_stats)
+            masks = bitboard.grid2masks(grid)
+            self.assertEqual(bitboard.search_trail(masks, solution.tables, trail_stats), expected)
+            self.assertEqual(copy_stats['nodes'], trail_stats['nodes'])
+            self.assertEqual(trail_stats['boards'], 0)
+
+    def test_undo(self):
+        masks = bitboard.grid2masks('1' + '.' * 80)
+        before = list(masks)
+        trail = [5, masks[5]]
+        masks[5] = 0b11
+        self.assertTrue(bitboard.reduce_puzzle(masks, solution.tables, [5], trail))
+        self.assertNotEqual(masks, before)
+        self.assertEqual(bitboard.undo(masks, trail), before)
+        self.assertEqual(trail, [])
+
+    def test_search_matches_dict_api(self):
+        masks = bitboard.search(bitboard.grid2masks(self.grid), solution.tables)
+        self.assertEqual(bitboard.masks2values(masks), solution.solve(self.grid))
+        self.assertTrue(all(solution.tables.popcount[mask] == 1 for mask in masks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import unittest
+
+from collections import Counter
+
+import bitboard
+import solution
+
+from utils import make_tables
+
+
+class TestBoundedSearch(unittest.TestCase):
+    grid = '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1'
+
+    def setUp(self):
+        self.tables = make_tables(3)
+        self.masks = bitboard.grid2masks(self.grid, self.tables)
+
+    def test_solved_within_budget(self):
+        stats = Counter()
+        expected = bitboard.search_trail(list(self.masks), self.tables, stats)
+        result = bitboard.bounded_search(self.masks, self.tables, bitboard.Budget(nodes=stats['nodes']))
+        self.assertEqual(result, bitboard.SearchResult('solved', expected, None, stats['nodes']))
+
+    def test_node_budget(self):
+        budget = bitboard.Budget(nodes=10)
+        result = bitboard.bounded_search(self.masks, self.tables, budget)
+        self.assertEqual((result.status, result.reason, result.nodes), ('exhausted', 'nodes', 11))
+        given = sum(1 for mask in self.masks if self.tables.popcount[mask] == 1)
+        solved = sum(1 for mask in result.board if self.tables.popcount[mask] == 1)
+        self.assertGreater(solved, given)
+        self.assertEqual(result.board, budget.best)
+        self.assertEqual(self.masks, bitboard.grid2masks(self.grid, self.tables))
+
+    def test_deadline(self):
+        result = bitboard.bounded_search(self.masks, self.tables, bitboard.Budget(seconds=0))
+        self.assertEqual((result.status, result.reason), ('exhausted', 'deadline'))
+
+    def test_cancellation(self):
+        token = threading.Event()
+        token.set()
+        result = bitboard.bounded_search(self.masks, self.tables, bitboard.Budget(token=token))
+        self.assertEqual((result.status, result.reason, result.nodes), ('exhausted', 'cancelled', 1))
+
+    def test_unsolvable(self):
+        masks = bitboard.grid2masks('22' + '.' * 79)
+        result = bitboard.bounded_search(masks, solution.tables, bitboard.Budget(nodes=100))
+        self.assertEqual(result.status, 'unsolvable')
+        self.assertIsNone(result.board)
+
+    def test_copying_search_raises(self):
+        with self.assertRaises(bitboard.BudgetExhausted) as raised:
+            bitboard.search(list(self.masks), self.tables, budget=bitboard.Budget(nodes=3))
+        self.assertEqual(raised.exception.reason, 'nodes')
+
+
+class TestSolveBudget(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_solved(self):
+        result = solution.solve(self.grid, budget=bitboard.Budget(nodes=100, seconds=10))
+        self.assertEqual(result.status, 'solved')
+        self.assertEqual(result.board, solution.solve(self.grid))
+
+    def test_exhausted(self):
+        result = solution.solve('.' * 81, budget=bitboard.Budget(nodes=2))
+        self.assertEqual((result.status, result.reason), ('exhausted', 'nodes'))
+        self.assertEqual(len(result.board), 81)
+
+    def test_dlx_budget(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.grid, backend='dlx', budget=bitboard.Budget(nodes=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
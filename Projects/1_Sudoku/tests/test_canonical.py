@@ -0,0 +1,141 @@
+import random
+import unittest
+
+from timeit import default_timer as timer
+
+import benchmark
+import canonical
+import solution
+
+from utils import make_tables, values2grid
+
+
+def solve_grid(grid):
+    values = solution.solve(grid)
+    return values and values2grid(values)
+
+
+def is_solution(solved, grid):
+    units = solution.tables.units
+    return (all(sorted(solved[box] for box in unit) == list('123456789') for unit in units) and
+            all(g in ('.', s) for g, s in zip(grid, solved)))
+
+
+class TestSymmetries(unittest.TestCase):
+    def test_group(self):
+        transforms = canonical.symmetries()
+        self.assertEqual(len(transforms), 96)
+        self.assertIn(tuple(range(81)), transforms)
+        units = {frozenset(unit) for unit in solution.tables.units}
+        for transform in transforms:
+            self.assertEqual({frozenset(transform[box] for box in unit) for unit in units}, units)
+
+    def test_group_sizes(self):
+        self.assertEqual([canonical.symmetry_count(order) for order in (2, 3, 4, 5)],
+                         [16, 96, 18432, 3686400])
+        units = {frozenset(unit) for unit in make_tables(2, diagonal=True).units}
+        transforms = canonical.symmetries(2)
+        self.assertEqual(len(transforms), 16)
+        for transform in transforms:
+            self.assertEqual({frozenset(transform[box] for box in unit) for unit in units}, units)
+        with self.assertRaises(ValueError):
+            canonical.symmetries(5)
+
+    def test_canonical_form_is_invariant(self):
+        grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        expected = canonical.canonicalize(grid)[0]
+        rng = random.Random(0)
+        for transform in rng.sample(canonical.symmetries(), 20):
+            digits = list('123456789')
+            rng.shuffle(digits)
+            relabel = dict(zip('123456789', digits), **{'.': '.'})
+            other = ''.join(relabel[grid[i]] for i in transform)
+            self.assertEqual(canonical.canonicalize(other)[0], expected)
+
+    def test_invariant_and_match(self):
+        grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        rng = random.Random(2)
+        for transform in rng.sample(canonical.symmetries(), 20):
+            digits = list('123456789')
+            rng.shuffle(digits)
+            relabel = dict(zip('123456789', digits), **{'.': '.'})
+            other = ''.join(relabel[grid[i]] for i in transform)
+            self.assertEqual(canonical.invariant(other), canonical.invariant(grid))
+            moved, labels = canonical.match(grid, other)
+            self.assertEqual(''.join(labels.get(grid[i], '.') for i in moved), other)
+        self.assertNotEqual(canonical.invariant(grid[1:] + '.'), canonical.invariant(grid))
+        swapped = grid[9:18] + grid[:9] + grid[18:]
+        self.assertIsNone(canonical.match(grid, swapped))
+
+
+class TestSolveCache(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_hits_on_symmetric_puzzles(self):
+        cache = canonical.SolveCache()
+        rng = random.Random(1)
+        cache.solve(self.grid, solve_grid)
+        for transform in rng.sample(canonical.symmetries(), 10):
+            other = ''.join(self.grid[i] for i in transform)
+            solved = cache.solve(other, solve_grid)
+            self.assertTrue(is_solution(solved, other))
+        self.assertEqual(cache.info(), canonical.CacheInfo(10, 1, 1024, 1))
+
+    def test_diagonal_breaking_transformation(self):
+        # swapping rows A and B keeps every row, column and square but not the diagonals
+        swapped = self.grid[9:18] + self.grid[:9] + self.grid[18:]
+        cache = canonical.SolveCache()
+        cache.solve(self.grid, solve_grid)
+        self.assertNotEqual(canonical.canonicalize(swapped)[0], canonical.canonicalize(self.grid)[0])
+        self.assertEqual(cache.solve(swapped, solve_grid), solve_grid(swapped))
+        self.assertEqual(cache.info().misses, 2)
+
+    def test_missing_digits(self):
+        cache = canonical.SolveCache()
+        grid = '12' + '.' * 79
+        cache.solve(grid, solve_grid)
+        other = '.' * 79 + '31'
+        self.assertTrue(is_solution(cache.solve(other, solve_grid), other))
+        self.assertEqual(cache.hits, 1)
+
+    def test_unsolvable_and_eviction(self):
+        cache = canonical.SolveCache(maxsize=1)
+        self.assertFalse(cache.solve('22' + '.' * 79, solve_grid))
+        self.assertFalse(cache.solve('33' + '.' * 79, solve_grid))
+        self.assertEqual(cache.hits, 1)
+        cache.solve(self.grid, solve_grid)
+        self.assertEqual(len(cache), 1)
+        self.assertFalse(cache.solve('22' + '.' * 79, solve_grid))
+        self.assertEqual(cache.misses, 3)
+
+    def test_hits_are_cheaper_than_solving(self):
+        grids = benchmark.sample_grids(50, 24, seed=5)
+        rng = random.Random(3)
+        related = [''.join(grid[i] for i in rng.choice(canonical.symmetries())) for grid in grids]
+        cache = canonical.SolveCache()
+        for grid in grids:
+            cache.solve(grid, solve_grid)
+        direct = hits = float('inf')
+        for _ in range(3):
+            start = timer()
+            for grid in related:
+                solve_grid(grid)
+            direct = min(direct, timer() - start)
+            cache._seen.clear()
+            start = timer()
+            for grid in related:
+                cache.solve(grid, solve_grid)
+            hits = min(hits, timer() - start)
+        self.assertEqual(cache.info().misses, len(grids))
+        self.assertLess(hits, direct / 2)
+
+    def test_solve_with_cache(self):
+        cache = canonical.SolveCache()
+        expected = solution.solve(self.grid)
+        self.assertEqual(solution.solve(self.grid, cache=cache), expected)
+        self.assertEqual(solution.solve(self.grid, cache=cache), expected)
+        self.assertEqual(cache.info().hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
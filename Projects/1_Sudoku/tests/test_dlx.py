@@ -0,0 +1,86 @@
+import unittest
+
+from collections import Counter
+
+import benchmark
+import bitboard
+import dlx
+import solution
+
+from utils import Recorder, make_tables
+
+
+class TestExactCover(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def setUp(self):
+        self.cover = dlx.ExactCover(solution.tables)
+
+    def is_solution(self, masks, grid, tables=solution.tables):
+        return (all(tables.popcount[mask] == 1 for mask in masks) and
+                all(sum(masks[box] for box in unit) == tables.full for unit in tables.units) and
+                all(g in ('.', s) for g, s in zip(grid, bitboard.masks2grid(masks, tables))))
+
+    def test_matrix_shape(self):
+        self.assertEqual(self.cover.columns, 81 + 29 * 9)
+        self.assertEqual(len(self.cover.rows), 729)
+        self.assertEqual(len(self.cover.rows[0]), 1 + 4)   # A1 is on a diagonal
+        self.assertEqual(len(self.cover.rows[9]), 1 + 3)   # A2 is not
+
+    def test_matches_bitboard(self):
+        expected = bitboard.search_trail(bitboard.grid2masks(self.grid), solution.tables)
+        self.assertEqual(self.cover.search(bitboard.grid2masks(self.grid)), expected)
+
+    def test_sample_puzzles(self):
+        for grid in benchmark.sample_grids(30, 20, seed=2):
+            stats = Counter()
+            masks = self.cover.search(bitboard.grid2masks(grid), stats)
+            self.assertTrue(self.is_solution(masks, grid))
+            self.assertGreater(stats['nodes'], 0)
+
+    def test_partial_candidates(self):
+        masks = bitboard.reduce_puzzle(bitboard.grid2masks(self.grid), solution.tables)
+        self.assertEqual(self.cover.search(list(masks)), self.cover.search(bitboard.grid2masks(self.grid)))
+
+    def test_links_are_restored(self):
+        before = [list(a) for a in self.cover.links]
+        self.cover.search(bitboard.grid2masks(self.grid))
+        self.assertEqual([list(a) for a in self.cover.links], before)
+
+    def test_unsolvable(self):
+        self.assertFalse(self.cover.search(bitboard.grid2masks('22' + '.' * 79)))
+        masks = bitboard.grid2masks('.' * 81)
+        for box in range(9):  # no box in row A may hold a 9
+            masks[box] &= ~bitboard.DIGIT_MASK['9']
+        self.assertFalse(self.cover.search(masks))
+
+    def test_other_sizes(self):
+        for order in (2, 4):
+            for diagonal in (False, True):
+                tables = make_tables(order, diagonal)
+                grid = '.' * len(tables.boxes)
+                masks = dlx.ExactCover(tables).search(bitboard.grid2masks(grid, tables))
+                self.assertTrue(self.is_solution(masks, grid, tables))
+
+
+class TestSolveBackend(unittest.TestCase):
+    grid = TestExactCover.grid
+
+    def test_backends_agree(self):
+        self.assertEqual(solution.solve(self.grid, backend='dlx'), solution.solve(self.grid))
+
+    def test_recorder(self):
+        recorder = Recorder()
+        values = solution.solve(self.grid, recorder=recorder, backend='dlx')
+        self.assertEqual(len(recorder), self.grid.count('.'))
+        self.assertTrue(all(values[box] == digit for box, digit in recorder))
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.grid, backend='sat')
+        with self.assertRaises(ValueError):
+            solution.solve(self.grid, strategy='lcv', backend='dlx')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import random
+import unittest
+
+import bitboard
+import generate
+import solution
+
+from utils import make_tables
+
+
+class TestCountSolutions(unittest.TestCase):
+    def test_empty_4x4(self):
+        tables = make_tables(2)
+        masks = bitboard.grid2masks('.' * 16, tables)
+        self.assertEqual(bitboard.count_solutions(masks, tables, 1000), 288)
+        self.assertEqual(bitboard.count_solutions(masks, tables, 2), 2)
+        self.assertEqual(masks, bitboard.grid2masks('.' * 16, tables))
+
+    def test_unique_and_unsolvable(self):
+        grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        self.assertEqual(bitboard.count_solutions(bitboard.grid2masks(grid), solution.tables), 1)
+        self.assertEqual(bitboard.count_solutions(bitboard.grid2masks('22' + '.' * 79), solution.tables), 0)
+
+
+class TestGenerate(unittest.TestCase):
+    def test_puzzles_are_unique_and_diagonal(self):
+        grids = list(generate.generate(3, seed=7, processes=1))
+        for grid in grids:
+            masks = bitboard.grid2masks(grid)
+            self.assertEqual(bitboard.count_solutions(masks, solution.tables, 2), 1)
+            self.assertTrue(solution.solve(grid))
+
+    def test_clues(self):
+        for grid in generate.generate(3, seed=1, clues=40, processes=1):
+            self.assertEqual(81 - grid.count('.'), 40)
+
+    def test_dig_is_minimal(self):
+        tables = make_tables(2)
+        rng = random.Random(0)
+        masks = generate.dig(generate.random_solution(tables, rng), tables, rng)
+        for box, mask in enumerate(masks):
+            if mask != tables.full:
+                attempt = list(masks)
+                attempt[box] = tables.full
+                self.assertEqual(bitboard.count_solutions(attempt, tables, 2), 2)
+
+    def test_reproducible_across_processes(self):
+        serial = list(generate.generate(4, seed=3, order=2, diagonal=False, processes=1))
+        parallel = list(generate.generate(4, seed=3, order=2, diagonal=False, processes=2))
+        self.assertEqual(serial, parallel)
+        self.assertNotEqual(serial, list(generate.generate(4, seed=4, order=2, diagonal=False,
+                                                           processes=1)))
+
+    def test_unreachable_min_nodes(self):
+        with self.assertRaisesRegex(ValueError, '20 search nodes'):
+            generate.make_puzzle((0, 0, 2, True, 0, 20))
+
+    def test_corpus_roundtrip(self):
+        outfile = io.StringIO()
+        generate.write_corpus(outfile, 3, seed=2, order=2, processes=1)
+        outfile.seek(0)
+        self.assertEqual(generate.read_corpus(outfile),
+                         list(generate.generate(3, seed=2, order=2, processes=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
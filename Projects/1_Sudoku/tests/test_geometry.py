@@ -0,0 +1,77 @@
+import unittest
+
+import benchmark
+import bitboard
+import solution
+
+from utils import BitCounter, make_tables, make_units, popcount_table
+
+
+def is_solved(masks, tables):
+    """Return True if every unit of the board holds every digit once"""
+    return (all(tables.popcount[mask] == 1 for mask in masks) and
+            all(sum(masks[box] for box in unit) == tables.full for unit in tables.units))
+
+
+class TestMakeUnits(unittest.TestCase):
+    def test_unit_counts(self):
+        for order in (2, 3, 4, 5):
+            size = order * order
+            boxes, unitlist, digits = make_units(order)
+            self.assertEqual(len(boxes), size * size)
+            self.assertEqual(len(unitlist), 3 * size)
+            self.assertEqual(len(digits), size)
+            self.assertTrue(all(len(unit) == size for unit in unitlist))
+            self.assertEqual(len(make_units(order, diagonal=True)[1]), 3 * size + 2)
+
+    def test_default_board_matches_solution(self):
+        tables = make_tables(3, diagonal=True)
+        self.assertEqual(tables.peers, solution.tables.peers)
+        self.assertEqual(tables.full, bitboard.ALL_DIGITS)
+
+    def test_popcount(self):
+        self.assertIsInstance(popcount_table(16), bytes)
+        self.assertEqual(len(popcount_table(16)), 1 << 16)
+        wide = make_tables(5).popcount
+        self.assertIsInstance(wide, BitCounter)
+        for mask in (0, 1, (1 << 25) - 1, 0b1011 << 20):
+            self.assertEqual(wide[mask], bin(mask).count('1'))
+
+    def test_unsupported_size(self):
+        with self.assertRaises(ValueError):
+            make_units(6)
+
+
+class TestLargeBoards(unittest.TestCase):
+    def test_empty_boards_solve(self):
+        for order in (2, 3, 4, 5):
+            for diagonal in (False, True):
+                tables = make_tables(order, diagonal)
+                masks = bitboard.grid2masks('.' * len(tables.boxes), tables)
+                masks = bitboard.search_trail(masks, tables)
+                self.assertTrue(masks, (order, diagonal))
+                self.assertTrue(is_solved(masks, tables), (order, diagonal))
+
+    def test_grid_roundtrip(self):
+        tables = make_tables(4)
+        grid = ''.join(tables.digits[i % 16] if i % 7 else '.' for i in range(256))
+        masks = bitboard.grid2masks(grid, tables)
+        self.assertEqual(bitboard.masks2grid(masks, tables), grid)
+        values = bitboard.masks2values(masks, tables)
+        self.assertEqual(values['P16'], tables.digits[255 % 16])
+        self.assertEqual(bitboard.values2masks(values, tables), masks)
+
+    def test_puzzles_solve_in_both_modes(self):
+        for diagonal in (False, True):
+            tables = make_tables(4, diagonal)
+            for grid in benchmark.sample_grids(3, 140, seed=1, board=tables):
+                expected = bitboard.search(bitboard.grid2masks(grid, tables), tables)
+                self.assertTrue(is_solved(expected, tables))
+                solved = bitboard.masks2grid(expected, tables)
+                self.assertTrue(all(g in ('.', s) for g, s in zip(grid, solved)))
+                masks = bitboard.grid2masks(grid, tables)
+                self.assertEqual(bitboard.search_trail(masks, tables), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from collections import Counter
+
+import bitboard
+import solution
+
+from utils import Hooks, make_tables
+
+
+class TestHooks(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+    hard = '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1'
+    techniques = '..14...52.9.12........3....91....243.5........3....8..............352.6..........'
+
+    def test_search_events_match_stats(self):
+        tables = make_tables(3)
+        for search_masks in (bitboard.search, bitboard.search_trail):
+            hooks, stats = Hooks(), Counter()
+            solved = search_masks(bitboard.grid2masks(self.hard, tables), tables, stats=stats, hooks=hooks)
+            self.assertEqual(solved, search_masks(bitboard.grid2masks(self.hard, tables), tables))
+            self.assertEqual(hooks.counts['branch'], stats['nodes'] - 1)
+            self.assertEqual(hooks.counts['backtrack'], stats['backtracks'])
+            self.assertGreater(hooks.counts['contradiction'], 0)
+
+    def test_propagation_events(self):
+        hooks = Hooks()
+        assigned, removed = {}, Counter()
+        hooks.on('assign', lambda box, digit, stage: assigned.setdefault(box, (digit, stage)))
+        hooks.on('eliminate', lambda box, mask, stage: removed.update({stage: bin(mask).count('1')}))
+        rounds = Counter()
+        hooks.on('round', lambda stage, count: rounds.update({stage: count}))
+        values = solution.solve(self.grid, hooks=hooks)
+        self.assertEqual(hooks.counts['branch'], 0)
+        empty = {i for i, c in enumerate(self.grid) if c == '.'}
+        self.assertEqual(set(assigned), empty)
+        for box, (digit, stage) in assigned.items():
+            self.assertEqual(values[solution.boxes[box]], str(digit + 1))
+            self.assertEqual(stage, 'propagate')
+        self.assertEqual(removed, rounds)
+
+    def test_pipeline_stages(self):
+        hooks = Hooks()
+        stages = set()
+        hooks.on('round', lambda stage, count: count and stages.add(stage))
+        solution.solve(self.techniques, pipeline='all', hooks=hooks)
+        self.assertIn('propagate', stages)
+        self.assertIn('x_wing', stages)
+
+    def test_active_only_during_solve(self):
+        hooks = Hooks()
+        solution.solve(self.grid, hooks=hooks)
+        self.assertIsNone(Hooks.active)
+        count = hooks.counts['round']
+        solution.solve(self.grid)
+        self.assertEqual(hooks.counts['round'], count)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            Hooks().on('nope', print)
+        with self.assertRaises(ValueError):
+            solution.solve(self.grid, backend='dlx', hooks=Hooks())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from collections import Counter
+
+import benchmark
+import bitboard
+import ordering
+import solution
+
+
+def is_solved(masks):
+    return (all(solution.tables.popcount[mask] == 1 for mask in masks)
+            and bitboard.reduce_puzzle(list(masks), solution.tables) == masks)
+
+
+class TestStrategies(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_every_strategy_solves(self):
+        grids = benchmark.sample_grids(20, 20, seed=1)
+        for name, strategy in ordering.STRATEGIES.items():
+            for grid in grids:
+                stats = Counter()
+                masks = bitboard.search_trail(bitboard.grid2masks(grid), solution.tables, stats, strategy)
+                self.assertTrue(is_solved(masks), name)
+                self.assertEqual(bitboard.search(bitboard.grid2masks(grid), solution.tables,
+                                                 strategy=strategy), masks, name)
+                self.assertGreaterEqual(stats['nodes'], 1)
+            self.assertEqual(solution.solve(self.diagonal_grid, strategy=name),
+                             solution.solve(self.diagonal_grid))
+
+    def test_degree_breaks_ties(self):
+        masks = bitboard.grid2masks('.' * 81)
+        for box in (0, 40):
+            masks[box] = 0b11
+        # A1 comes first, but E5 is on both diagonals and has more unsolved peers
+        self.assertEqual(bitboard.select_mrv(masks, solution.tables), 0)
+        self.assertEqual(ordering.select_mrv_degree(masks, solution.tables), 40)
+
+    def test_least_constraining_value(self):
+        masks = bitboard.grid2masks('.' * 81)
+        masks[0] = 0b11
+        for peer in solution.tables.peers[0][:5]:
+            masks[peer] &= ~0b10  # fewer peers lose the digit '2' if it is placed
+        self.assertEqual(ordering.order_lcv(masks, solution.tables, 0), [0b10, 0b1])
+
+    def test_most_constrained_unit(self):
+        masks = bitboard.grid2masks('123456.8.' + '.' * 72)
+        self.assertIn(ordering.select_unit(masks, solution.tables), (6, 8))
+        self.assertIsNone(ordering.select_unit([1] * 81, solution.tables))
+
+    def test_get_strategy(self):
+        self.assertIs(ordering.get_strategy(None), bitboard.MRV)
+        self.assertIs(ordering.get_strategy('lcv'), ordering.STRATEGIES['lcv'])
+        with self.assertRaises(ValueError):
+            ordering.get_strategy('fastest')
+
+    def test_compare(self):
+        results = ordering.compare(benchmark.sample_grids(5, 20, seed=2), solution.tables, ['mrv', 'degree'])
+        self.assertEqual(set(results), {'mrv', 'degree'})
+        for stats in results.values():
+            self.assertGreaterEqual(stats['nodes'], 5)
+            self.assertEqual(stats['unsolved'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from collections import Counter
+
+import bitboard
+import parallel
+import solution
+
+from utils import make_tables
+
+
+class TestSplit(unittest.TestCase):
+    def test_subproblems_partition_the_solutions(self):
+        tables = make_tables(2)
+        masks = bitboard.grid2masks('.' * 16, tables)
+        subproblems = parallel.split(masks, tables, 10)
+        self.assertGreaterEqual(len(subproblems), 10)
+        self.assertEqual(sum(bitboard.count_solutions(sub, tables, 1000) for sub in subproblems), 288)
+
+    def test_unsolvable_and_solved(self):
+        self.assertEqual(parallel.split(bitboard.grid2masks('22' + '.' * 79), solution.tables, 4), [])
+        grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        subproblems = parallel.split(bitboard.grid2masks(grid), solution.tables, 4)
+        self.assertEqual(len(subproblems), 1)
+        self.assertIsNone(bitboard.select_mrv(subproblems[0], solution.tables))
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_hard_puzzle(self):
+        tables = make_tables(3)
+        grid = '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1'
+        masks = bitboard.grid2masks(grid, tables)
+        stats = Counter()
+        solved = parallel.parallel_search(masks, tables, processes=2, tasks=8, stats=stats)
+        self.assertEqual(solved, bitboard.search_trail(list(masks), tables))
+        self.assertGreaterEqual(stats['subproblems'], 8)
+
+    def test_unsolvable(self):
+        masks = bitboard.grid2masks('.' * 81)
+        for box in range(9):  # no box in row A may hold a 9
+            masks[box] &= ~bitboard.DIGIT_MASK['9']
+        self.assertFalse(parallel.parallel_search(masks, solution.tables, processes=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
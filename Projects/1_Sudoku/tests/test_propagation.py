@@ -0,0 +1,130 @@
+import random
+import unittest
+
+from collections import Counter, defaultdict
+
+import benchmark
+import bitboard
+import propagation
+import solution
+
+from utils import make_tables
+
+
+class TestTechniques(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.boards = []
+        for _ in range(200):
+            grid = ''.join(d if rng.random() < 0.3 else '.' for d in benchmark.SOLVED_GRID)
+            self.boards.append(bitboard.propagate(bitboard.grid2masks(grid), solution.tables))
+
+    def test_never_removes_the_solution(self):
+        solved = bitboard.grid2masks(benchmark.SOLVED_GRID)
+        for technique in propagation.PIPELINE:
+            changed = 0
+            for masks in self.boards:
+                result = technique.apply(list(masks), solution.tables)
+                self.assertTrue(all(mask & bit for mask, bit in zip(result, solved)), technique.name)
+                changed += result != masks
+            self.assertGreater(changed, 0, technique.name)
+
+    def test_trail_restores_board(self):
+        for technique in propagation.PIPELINE:
+            for masks in self.boards:
+                trail, attempt = [], list(masks)
+                technique.apply(attempt, solution.tables, trail)
+                self.assertEqual(bitboard.undo(attempt, trail), masks)
+
+    def test_locked_candidates(self):
+        tables = make_tables(3)
+        masks = bitboard.grid2masks('.' * 81, tables)
+        for box in (3, 4, 5, 6, 7, 8):  # no 1 in row A outside of the first square
+            masks[box] &= ~1
+        propagation.locked_candidates(masks, tables)
+        self.assertFalse(any(masks[box] & 1 for box in (9, 10, 11, 18, 19, 20)))
+        self.assertTrue(all(masks[box] & 1 for box in (0, 1, 2, 27)))
+
+    def test_naked_triples(self):
+        tables = make_tables(3)
+        masks = bitboard.grid2masks('.' * 81, tables)
+        masks[0:3] = [0b011, 0b110, 0b101]
+        propagation.naked_triples(masks, tables)
+        self.assertTrue(all(masks[box] == 0b111111000 for box in range(3, 9)))
+
+    def test_hidden_pairs(self):
+        tables = make_tables(3)
+        masks = bitboard.grid2masks('.' * 81, tables)
+        for box in range(2, 9):  # 1 and 2 only fit in A1 and A2
+            masks[box] &= ~0b11
+        propagation.hidden_pairs(masks, tables)
+        self.assertEqual(masks[0:2], [0b11, 0b11])
+
+    def test_hidden_pair_empties_a_box(self):
+        tables = make_tables(3)
+        masks = bitboard.grid2masks('.' * 81, tables)
+        # 1 and 2 only fit in A1 and A2, 3 and 4 only in A2 and A3, so A2 keeps nothing
+        for box, digits in zip(range(9), ['125', '1234', '346'] + ['56789'] * 6):
+            masks[box] = bitboard.digits2mask(digits)
+        self.assertTrue(bitboard.propagate(masks, tables))
+        self.assertIs(propagation.hidden_pairs(masks, tables), False)
+
+    def test_x_wing(self):
+        tables = make_tables(3)
+        masks = bitboard.grid2masks('.' * 81, tables)
+        for row in (0, 8):  # 1 only fits in columns 1 and 9 of rows A and I
+            for col in range(1, 8):
+                masks[9 * row + col] &= ~1
+        propagation.x_wing(masks, tables)
+        for row in range(1, 8):
+            self.assertFalse(masks[9 * row] & 1)
+            self.assertFalse(masks[9 * row + 8] & 1)
+
+
+class TestPipeline(unittest.TestCase):
+    def test_get_pipeline(self):
+        self.assertEqual(propagation.get_pipeline(None), ())
+        self.assertEqual(propagation.get_pipeline('all'), propagation.PIPELINE)
+        self.assertEqual(propagation.get_pipeline(['x_wing']), (propagation.TECHNIQUES['x_wing'],))
+        with self.assertRaises(ValueError):
+            propagation.get_pipeline(['swordfish'])
+
+    def test_pipeline_removes_more_candidates(self):
+        tables, stronger = solution.tables, 0
+        for grid in benchmark.sample_grids(50, 24, seed=4):
+            core = bitboard.reduce_puzzle(bitboard.grid2masks(grid), tables)
+            masks = bitboard.reduce_puzzle(bitboard.grid2masks(grid), tables, pipeline=propagation.PIPELINE)
+            self.assertTrue(all(mask & ~old == 0 for mask, old in zip(masks, core)))
+            stronger += masks != core
+        self.assertGreater(stronger, 0)
+
+    def test_hard_puzzle(self):
+        tables = make_tables(3)
+        grid = '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1'
+        core, full = Counter(), Counter()
+        expected = bitboard.search_trail(bitboard.grid2masks(grid, tables), tables, core)
+        masks = bitboard.search_trail(bitboard.grid2masks(grid, tables), tables, full,
+                                      pipeline=propagation.PIPELINE)
+        self.assertEqual(masks, expected)
+        self.assertLess(full['nodes'], core['nodes'])
+
+    def test_profile(self):
+        profile = defaultdict(Counter)
+        for grid in benchmark.sample_grids(10, 20, seed=4):
+            bitboard.search(bitboard.grid2masks(grid), solution.tables, pipeline=propagation.PIPELINE,
+                            profile=profile)
+        self.assertEqual(set(profile), {'propagate'} | set(propagation.TECHNIQUES))
+        for counts in profile.values():
+            self.assertGreater(counts['calls'], 0)
+            self.assertGreaterEqual(counts['seconds'], 0)
+        self.assertGreater(profile['locked_candidates']['removed'], 0)
+
+    def test_solve_with_pipeline(self):
+        grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        self.assertEqual(solution.solve(grid, pipeline='all'), solution.solve(grid))
+        with self.assertRaises(ValueError):
+            solution.solve(grid, pipeline='all', backend='dlx')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+import solution
+
+from utils import Recorder, grid2values
+
+try:
+    import pygame
+    import PySudoku
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, "pygame is not installed")
+class TestRenderer(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def setUp(self):
+        self.renderer = PySudoku.Renderer(headless=True)
+        self.addCleanup(pygame.quit)
+
+    def pixels(self):
+        return pygame.image.tostring(self.renderer.screen, 'RGB')
+
+    def test_environment_restored(self):
+        self.assertNotIn('SDL_VIDEODRIVER', os.environ)
+        with PySudoku.video_driver('dummy'):
+            self.assertEqual(os.environ['SDL_VIDEODRIVER'], 'dummy')
+        self.assertNotIn('SDL_VIDEODRIVER', os.environ)
+
+    def test_dirty_squares_match_full_redraw(self):
+        values = grid2values(self.grid)
+        self.renderer.draw(values)
+        values = dict(values, A2='5', B1='7')
+        dirty = self.renderer.update(values)
+        self.assertEqual(dirty, [self.renderer.rects['A2'], self.renderer.rects['B1']])
+        self.assertEqual(self.renderer.update(values), [])
+        incremental = self.pixels()
+        self.renderer.draw(values)
+        self.assertEqual(self.pixels(), incremental)
+
+
+@unittest.skipIf(pygame is None, "pygame is not installed")
+class TestPlay(unittest.TestCase):
+    def test_headless_frames(self):
+        grid = TestRenderer.grid
+        recorder = Recorder()
+        solution.solve(grid, recorder=recorder)
+        with tempfile.TemporaryDirectory() as frames:
+            count = PySudoku.play(grid2values(grid), recorder, fps=0, headless=True,
+                                  frames=frames, image_format='bmp')
+            self.assertEqual(count, len(recorder) + 1)
+            self.assertEqual(sorted(os.listdir(frames))[-1], 'frame_{:05d}.bmp'.format(count - 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import benchmark
+import bitboard
+import solution
+
+from utils import Recorder, assign_value, grid2values, reconstruct
+
+
+class TestRecorder(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def assertReplaySolves(self, grid, result, recorder):
+        values = grid2values(grid)
+        steps = reconstruct(recorder)
+        self.assertEqual(len({box for box, _ in steps}), len(steps))
+        for box, value in steps:
+            values[box] = value
+        self.assertEqual(values, result)
+
+    def test_solve_records_path(self):
+        recorder = Recorder()
+        result = solution.solve(self.diagonal_grid, recorder=recorder)
+        self.assertEqual(len(recorder), self.diagonal_grid.count('.'))
+        self.assertReplaySolves(self.diagonal_grid, result, recorder)
+        self.assertIsNone(Recorder.active)
+
+    def test_search_modes_record_path(self):
+        for grid in benchmark.sample_grids(10, 20, seed=3):
+            for search_masks in (bitboard.search, bitboard.search_trail):
+                recorder = Recorder()
+                masks = search_masks(bitboard.grid2masks(grid), solution.tables, recorder=recorder)
+                self.assertReplaySolves(grid, bitboard.masks2values(masks), recorder)
+
+    def test_assign_value(self):
+        values = grid2values(self.diagonal_grid)
+        assign_value(values, 'A2', '6')
+        with Recorder() as recorder:
+            assign_value(values, 'A3', '7')
+            assign_value(values, 'A3', '7')
+            assign_value(values, 'A4', '49')
+            with Recorder() as inner:
+                assign_value(values, 'A5', '4')
+            self.assertIs(Recorder.active, recorder)
+        assign_value(values, 'A6', '5')
+        self.assertEqual(list(recorder), [('A3', '7')])
+        self.assertEqual(list(inner), [('A5', '4')])
+
+    def test_rewind(self):
+        recorder = Recorder()
+        recorder.record(0, 1)
+        mark = recorder.mark()
+        recorder.record(80, 8)
+        self.assertEqual(list(recorder), [('A1', '2'), ('I9', '9')])
+        recorder.rewind(mark)
+        self.assertEqual(list(recorder), [('A1', '2')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import server
+
+
+class TestServer(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+    solved = '267945381853716249491823576576438192384192657129657438642379815935281764718564923'
+
+    def setUp(self):
+        self.server = server.Server()
+
+    def test_solve_and_cache(self):
+        first = self.server.handle({'id': 'a', 'grid': self.grid})
+        self.assertEqual((first['status'], first['solution'], first['id']), ('solved', self.solved, 'a'))
+        self.assertFalse(first['cached'])
+        second = self.server.handle({'grid': self.grid.replace('.', '0')})
+        self.assertEqual(second['solution'], self.solved)
+        self.assertTrue(second['cached'])
+        self.assertIn('ms', second)
+
+    def test_options(self):
+        response = self.server.handle({'grid': '1' + '.' * 15, 'order': 2, 'diagonal': False, 'strategy': 'lcv'})
+        self.assertEqual(response['status'], 'solved')
+        self.assertEqual(len(response['solution']), 16)
+        self.assertEqual(self.server.handle({'grid': '22' + '.' * 79})['status'], 'unsolvable')
+
+    def test_large_boards_skip_the_cache(self):
+        for order in (4, 5):
+            size = order ** 4
+            response = self.server.handle({'grid': '.' * size, 'order': order, 'diagonal': False})
+            self.assertEqual((response['status'], response['cached']), ('solved', False))
+            self.assertEqual(len(response['solution']), size)
+        self.assertEqual(self.server._caches, {})
+
+    def test_invalid_order(self):
+        for order in (-1, 0, 1, 6):
+            response = self.server.handle({'grid': '', 'order': order})
+            self.assertEqual(response['status'], 'error')
+            self.assertIn('order', response['reason'])
+
+    def test_budget(self):
+        response = self.server.handle({'grid': '.' * 81, 'nodes': 2})
+        self.assertEqual((response['status'], response['reason']), ('exhausted', 'nodes'))
+        self.assertTrue(response['solution'].startswith('1'))
+
+    def test_errors(self):
+        for request in ({'grid': '123'}, {}, [1], {'grid': self.grid, 'strategy': 'nope'}):
+            self.assertEqual(self.server.handle(request)['status'], 'error')
+        self.assertEqual(json.loads(self.server.handle_line('{'))['status'], 'error')
+
+    def test_serve_stream(self):
+        lines = '\n'.join(json.dumps({'id': i, 'grid': self.grid}) for i in range(3)) + '\n\n'
+        out = io.StringIO()
+        self.server.serve(io.StringIO(lines), out)
+        responses = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['id'] for r in responses], [0, 1, 2])
+        self.assertEqual({r['solution'] for r in responses}, {self.solved})
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "unix domain sockets are not available")
+    def test_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'sudoku.sock')
+        threading.Thread(target=server.serve_socket, args=(path, self.server), daemon=True).start()
+        for _ in range(100):
+            if os.path.exists(path):
+                break
+            time.sleep(0.01)
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall((json.dumps({'id': 7, 'grid': self.grid}) + '\n').encode())
+            response = json.loads(client.makefile().readline())
+        self.assertEqual((response['id'], response['solution']), (7, self.solved))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from collections import Counter
+from itertools import islice
+
+import bitboard
+import propagation
+import solution
+
+from utils import make_tables
+
+
+class TestIterSolutions(unittest.TestCase):
+    def test_all_solutions_of_4x4(self):
+        tables = make_tables(2)
+        found = [bitboard.masks2grid(masks, tables)
+                 for masks in bitboard.iter_solutions(bitboard.grid2masks('.' * 16, tables), tables)]
+        self.assertEqual(len(found), 288)
+        self.assertEqual(len(set(found)), 288)
+        for grid in found:
+            masks = bitboard.grid2masks(grid, tables)
+            self.assertTrue(all(sum(masks[box] for box in unit) == tables.full for unit in tables.units))
+
+    def test_pipeline_finds_the_same_solutions(self):
+        tables = make_tables(2, diagonal=True)
+        masks = bitboard.grid2masks('.' * 16, tables)
+        self.assertEqual(list(bitboard.iter_solutions(masks, tables)),
+                         list(bitboard.iter_solutions(masks, tables, pipeline=propagation.PIPELINE)))
+
+    def test_lazy(self):
+        masks = bitboard.grid2masks('.' * 81)
+        stats = Counter()
+        first = list(islice(bitboard.iter_solutions(masks, solution.tables, stats), 3))
+        self.assertEqual(len(first), 3)
+        self.assertLess(stats['nodes'], 200)
+        self.assertEqual(masks, bitboard.grid2masks('.' * 81))
+
+
+class TestSolutionAPI(unittest.TestCase):
+    grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_solutions(self):
+        self.assertEqual(list(solution.solutions(self.grid)), [solution.solve(self.grid)])
+        self.assertEqual(list(solution.solutions('22' + '.' * 79)), [])
+
+    def test_first_solution_matches_solve(self):
+        grid = '2' + '.' * 80
+        self.assertEqual(next(solution.solutions(grid)), solution.solve(grid))
+
+    def test_count_solutions(self):
+        self.assertEqual(solution.count_solutions(self.grid), 1)
+        self.assertEqual(solution.count_solutions('.' * 81), 2)
+        self.assertEqual(solution.count_solutions('.' * 81, limit=5), 5)
+        self.assertEqual(solution.count_solutions('22' + '.' * 79), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
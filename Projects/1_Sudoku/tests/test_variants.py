@@ -0,0 +1,100 @@
+import unittest
+
+import bitboard
+import variants
+
+from benchmark import SOLVED_GRID
+from utils import make_tables
+
+
+def is_solution(solved, grid, tables, cages=()):
+    masks = bitboard.grid2masks(solved, tables)
+    return (all(sum(masks[box] for box in unit) == tables.full for unit in tables.units) and
+            all(sum(int(solved[box]) for box in cage.boxes) == cage.total for cage in cages) and
+            all(g in ('.', s) for g, s in zip(grid, solved)))
+
+
+class TestCageCombinations(unittest.TestCase):
+    def test_table(self):
+        table = variants.cage_combinations(9)
+        self.assertEqual(table[2, 3], (0b11,))
+        self.assertEqual(table[2, 17], (0b110000000,))
+        self.assertEqual(len(table[3, 15]), 8)
+        self.assertEqual(table[9, 45], (0b111111111,))
+        self.assertNotIn((2, 2), table)
+        self.assertEqual(sum(len(masks) for masks in table.values()), 511)
+
+    def test_technique(self):
+        tables = make_tables(3)
+        technique = variants.cage_technique(variants.make_cages([(3, ['A1', 'A2'])], tables), tables)
+        masks = bitboard.grid2masks('.' * 81, tables)
+        trail = []
+        technique.apply(masks, tables, trail)
+        self.assertEqual((masks[0], masks[1]), (0b11, 0b11))
+        self.assertEqual(trail, [0, tables.full, 1, tables.full])
+        masks[0] = 0b10
+        technique.apply(masks, tables)
+        self.assertEqual(masks[1], 0b1)
+        masks[1] = 0b10
+        self.assertFalse(technique.apply(masks, tables))
+
+    def test_make_cages_errors(self):
+        tables = make_tables(3)
+        with self.assertRaises(ValueError):
+            variants.make_cages([(2, ['A1', 'A2'])], tables)
+        with self.assertRaises(ValueError):
+            variants.make_cages([(3, ['A1', 'A2']), (10, ['A2', 'A3'])], tables)
+
+
+class TestKiller(unittest.TestCase):
+    def cages(self, tables, width):
+        cages = []
+        for row in 'ABCDEFGHI':
+            for start in range(1, 10, width):
+                names = [row + str(col) for col in range(start, min(start + width, 10))]
+                total = sum(int(SOLVED_GRID[tables.boxes.index(name)]) for name in names)
+                cages.append((total, names))
+        return variants.make_cages(cages, tables)
+
+    def test_killer_without_givens(self):
+        tables = make_tables(3)
+        for width in (2, 3):
+            cages = self.cages(tables, width)
+            solved = variants.solve('.' * 81, tables, cages)
+            self.assertTrue(is_solution(solved, '.' * 81, tables, cages))
+
+    def test_unsolvable(self):
+        tables = make_tables(3)
+        cages = variants.make_cages([(3, ['A1', 'A2'])], tables)
+        self.assertFalse(variants.solve('3' + '.' * 80, tables, cages))
+
+
+class TestJigsaw(unittest.TestCase):
+    # the squares of SOLVED_GRID with C3 and B5 (both 1) swapped between
+    # the first two regions
+    regions = ('aaabbbccc' 'aaababccc' 'aabbbbccc' 'dddeeefff' 'dddeeefff' 'dddeeefff'
+               'ggghhhiii' 'ggghhhiii' 'ggghhhiii')
+
+    def test_tables(self):
+        tables = variants.jigsaw_tables(self.regions)
+        self.assertEqual(len(tables.units), 27)
+        self.assertIn(tables.boxes.index('B5'), tables.peers[tables.boxes.index('A1')])
+        self.assertNotIn(tables.boxes.index('C3'), tables.peers[tables.boxes.index('A1')])
+        self.assertEqual(len(variants.jigsaw_tables(self.regions, diagonal=True).units), 29)
+
+    def test_solve(self):
+        tables = variants.jigsaw_tables(self.regions)
+        grid = ''.join(d if i % 3 else '.' for i, d in enumerate(SOLVED_GRID))
+        solved = variants.solve(grid, tables, pipeline='all')
+        self.assertTrue(is_solution(solved, grid, tables))
+        self.assertTrue(is_solution(SOLVED_GRID, grid, tables))
+
+    def test_bad_regions(self):
+        with self.assertRaises(ValueError):
+            variants.jigsaw_tables('a' * 80)
+        with self.assertRaises(ValueError):
+            variants.jigsaw_tables('a' * 10 + 'b' * 71)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from collections import Counter
+
+import benchmark
+import bitboard
+import solution
+import vectorized
+
+from utils import make_tables
+
+
+@unittest.skipIf(vectorized.np is None, "numpy is not installed")
+class TestBatchSolver(unittest.TestCase):
+    def setUp(self):
+        self.solver = vectorized.BatchSolver(solution.tables)
+
+    def test_propagate_matches_eliminate_and_only_choice(self):
+        grids = benchmark.sample_grids(50, 30, seed=0)
+        candidates, status = self.solver.propagate(self.solver.grids2array(grids))
+        for grid, board, board_status in zip(grids, candidates, status):
+            masks = bitboard.grid2masks(grid)
+            expected = bitboard.reduce_puzzle(list(masks), solution.tables)
+            if board_status == vectorized.CONTRADICTION:
+                self.assertFalse(expected)
+                continue
+            # naked twins only runs per board, so the batch keeps a superset
+            self.assertTrue(all(e & ~m == 0 for e, m in zip(expected, self.solver.array2masks(board))))
+            if board_status == vectorized.SOLVED:
+                self.assertEqual(self.solver.array2masks(board), expected)
+
+    def test_solve(self):
+        grids = benchmark.sample_grids(50, 24, seed=1) + ['22' + '.' * 79]
+        stats = Counter()
+        solved = self.solver.solve(grids, stats)
+        self.assertIsNone(solved[-1])
+        for grid, result in zip(grids, solved[:-1]):
+            masks = bitboard.grid2masks(result)
+            self.assertTrue(all(sum(masks[box] for box in unit) == solution.tables.full
+                                for unit in solution.tables.units))
+            self.assertTrue(all(g in ('.', s) for g, s in zip(grid, result)))
+        self.assertEqual(stats['propagated'] + stats['searched'], 51 - stats['unsolvable'])
+        self.assertGreaterEqual(stats['unsolvable'], 1)
+
+    def test_other_sizes(self):
+        for order in (2, 4):
+            tables = make_tables(order)
+            solver = vectorized.BatchSolver(tables)
+            grids = benchmark.sample_grids(5, int(0.6 * len(tables.boxes)), seed=2, board=tables)
+            for grid, result in zip(grids, solver.solve(grids)):
+                masks = bitboard.grid2masks(result, tables)
+                self.assertTrue(all(sum(masks[box] for box in unit) == tables.full for unit in tables.units))
+                self.assertTrue(all(g in ('.', s) for g, s in zip(grid, result)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,313 @@
 
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict, namedtuple
+from functools import lru_cache
 
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
+digits = '123456789'
 boxes = [r + c for r in rows for c in cols]
-history = {}  # history must be declared here so that it exists in the assign_values scope
+box_index = {box: i for i, box in enumerate(boxes)}
 
 
-def extract_units(unitlist, boxes):
+class Recorder(object):
+    """Compact log of the box assignments made while solving one puzzle
+
+    Each assignment is stored as a (box index, digit index) pair in a flat
+    array, so a solve costs a few bytes per assignment. Searches that
+    backtrack call `mark()` before a branch and `rewind()` when it fails, so
+    after a successful solve the recorder holds the assignments along the
+    path to the solution, in order.
+
+    A recorder is only filled while it is in use: pass it to `solution.solve`
+    (or the bitboard searches), or activate it with a `with` block to log the
+    assignments made through `assign_value`. Nothing is recorded -- and no
+    memory is kept -- when no recorder is in use, and the log is released
+    with the recorder.
+
+    Example
+    -------
+
+    >>> with Recorder() as recorder:
+    ...     assign_value(values, 'A1', '2')
+    >>> list(recorder)
+
+        [('A1', '2')]
+    """
+    active = None  # the recorder that assign_value logs into
+
+    def __init__(self, boxes=boxes, digits=digits):
+        self.boxes = boxes
+        self.digits = digits
+        self._steps = array('H')
+        self._outer = None
+
+    def __enter__(self):
+        self._outer, Recorder.active = Recorder.active, self
+        return self
+
+    def __exit__(self, *exc_info):
+        Recorder.active, self._outer = self._outer, None
+
+    def __len__(self):
+        return len(self._steps) // 2
+
+    def __iter__(self):
+        steps = self._steps
+        for i in range(0, len(steps), 2):
+            yield self.boxes[steps[i]], self.digits[steps[i + 1]]
+
+    def record(self, box, digit):
+        """Log the assignment of a digit (by index in digits) to a box (by index in boxes)"""
+        self._steps.append(box)
+        self._steps.append(digit)
+
+    def mark(self):
+        """Return a position that the log can be rewound to"""
+        return len(self._steps)
+
+    def rewind(self, mark):
+        """Discard the assignments recorded after a mark"""
+        del self._steps[mark:]
+
+
+class Hooks(object):
+    """Callbacks and counters for the events of a solve
+
+    Callbacks are registered by event name with `on`, and every event that
+    fires is counted in `counts`, callbacks or not. The events and their
+    arguments are:
+
+        assign         (box, digit, stage)  a box is solved by a stage
+        eliminate      (box, removed, stage)  a stage removes the candidates
+                                              in the bitmask removed from a box
+        round          (stage, removed)     a stage ran and removed that many
+                                            candidates
+        branch         (box, digit)         the search tries a digit in a box
+        backtrack      (box, digit)         ... and the branch failed
+        contradiction  (stage)              a stage found that the board has
+                                            no solution
+
+    Boxes and digits are indices in `boxes` and `digits`, and a stage is
+    'propagate' (eliminate, only choice and naked twins, see
+    `bitboard.propagate`) or the name of a propagation technique.
+
+    Like a Recorder, hooks are only used while they are active: pass them to
+    `solution.solve` (or the bitboard searches) or use a `with` block. When
+    no hooks are active the searches take the same path as before and pay
+    nothing but an `is None` test per node.
+
+    Example
+    -------
+
+    >>> hooks = Hooks()
+    >>> solved_by = Counter()
+    >>> hooks.on('assign', lambda box, digit, stage: solved_by.update([stage]))
+    >>> solve(grid, hooks=hooks)
+    >>> hooks.counts['branch'], solved_by
+    """
+    EVENTS = ('assign', 'eliminate', 'round', 'branch', 'backtrack', 'contradiction')
+    active = None  # the hooks that solution.search reports to
+
+    def __init__(self):
+        self.callbacks = {event: [] for event in self.EVENTS}
+        self.counts = Counter()
+        self._outer = None
+
+    def __enter__(self):
+        self._outer, Hooks.active = Hooks.active, self
+        return self
+
+    def __exit__(self, *exc_info):
+        Hooks.active, self._outer = self._outer, None
+
+    def on(self, event, callback):
+        """Register a callback for an event"""
+        if event not in self.callbacks:
+            raise ValueError("Unknown event '{}'; choose from {}".format(event, ", ".join(self.EVENTS)))
+        self.callbacks[event].append(callback)
+
+    def fire(self, event, *args):
+        """Count an event and call its callbacks"""
+        self.counts[event] += 1
+        for callback in self.callbacks[event]:
+            callback(*args)
+
+    def observe(self, stage, masks, trail, mark, failed):
+        """Fire the events of a propagation stage from the boxes it pushed on
+        an undo trail after mark (see `bitboard.reduce_puzzle`)"""
+        if failed:
+            self.fire('contradiction', stage)
+            return
+        first = {}
+        for i in range(mark, len(trail), 2):
+            first.setdefault(trail[i], trail[i + 1])
+        removed = 0
+        for box, old in first.items():
+            mask = masks[box]
+            gone = old & ~mask
+            if gone:
+                removed += bin(gone).count('1')
+                self.fire('eliminate', box, gone, stage)
+                if not mask & (mask - 1):
+                    self.fire('assign', box, mask.bit_length() - 1, stage)
+        self.fire('round', stage, removed)
+
+
+class UnitTables(namedtuple('UnitTables', ['units', 'members', 'peers', 'boxes', 'digits',
+                                           'full', 'popcount'])):
+    """Integer-indexed unit and peer tables shared by the solver
+
+    Boxes are identified by their position in `boxes` (0 for 'A1' through 80 for
+    'I9' on a standard board) and units by their position in the unitlist.
+
+    Attributes
+    ----------
+    units : tuple
+        units[u] is a tuple containing the indices of the boxes in unit u
+
+    members : tuple
+        members[i] is a tuple containing the indices of the units that box i
+        belongs to (i.e., the "member units")
+
+    peers : tuple
+        peers[i] is a sorted tuple containing the indices of all boxes that are
+        in a unit together with box i
+
+    boxes : list
+        the box names, in index order
+
+    digits : str
+        the symbols that can be placed in a box; bit i of a candidate mask
+        stands for digits[i]
+
+    full : int
+        the candidate mask with every digit allowed
+
+    popcount : bytes or BitCounter
+        popcount[mask] is the number of digits allowed by a candidate mask
+        (see `popcount_table`)
+    """
+    __slots__ = ()
+
+
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+TABLE_WIDTH = 16  # the widest masks counted with a table (64 KiB)
+
+
+class BitCounter(object):
+    """Stands in for a popcount table on boards with more than TABLE_WIDTH
+    digits: counter[mask] counts the set bits of mask without a table"""
+    __slots__ = ()
+
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+@lru_cache(maxsize=8)
+def popcount_table(width):
+    """Return a table of the number of set bits in every int below 2**width
+
+    Up to TABLE_WIDTH digits the table is a bytes object built by doubling,
+    so it takes 2**width bytes (512 bytes for a 9x9 board, 64 KiB for a
+    16x16 board). Wider masks get a BitCounter, which counts the bits of
+    each mask it is indexed with instead of storing 2**width entries.
+    """
+    if width > TABLE_WIDTH:
+        return BitCounter()
+    table = b'\x00'
+    for _ in range(width):
+        table += table.translate(_INCREMENT)
+    return table
+
+
+_INCREMENT = bytes(range(1, 256)) + b'\x00'
+
+
+def extract_tables(unitlist, boxes, digits=digits):
+    """Build the integer-indexed unit, membership and peer tables for a unitlist
+
+    Parameters
+    ----------
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    boxes(list)
+        a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+    digits(str)
+        (optional) the symbols that can be placed in a box, '123456789' by default
+
+    Returns
+    -------
+    UnitTables
+        the unit, member and peer tables for the unitlist
+    """
+    index = {box: i for i, box in enumerate(boxes)}
+    units = tuple(tuple(index[box] for box in unit) for unit in unitlist)
+    members = [[] for _ in boxes]
+    for u, unit in enumerate(units):
+        for i in unit:
+            members[i].append(u)
+    peers = [set() for _ in boxes]
+    for i, member_units in enumerate(members):
+        for u in member_units:
+            peers[i].update(units[u])
+        peers[i].discard(i)
+    return UnitTables(units, tuple(map(tuple, members)), tuple(tuple(sorted(p)) for p in peers),
+                      list(boxes), digits, (1 << len(digits)) - 1, popcount_table(len(digits)))
+
+
+def make_units(order=3, diagonal=False):
+    """Build the boxes and units of a standard (order^2 x order^2) sudoku board
+
+    Rows are labeled with letters starting from 'A' and columns with numbers
+    starting from 1, so order 3 gives the usual 'A1' through 'I9' boxes; a
+    16x16 board (order 4) runs from 'A1' to 'P16'.
+
+    Parameters
+    ----------
+    order(int)
+        the side length of the square blocks (2, 3, 4 or 5 for 4x4, 9x9,
+        16x16 or 25x25 boards)
+
+    diagonal(bool)
+        if True the two main diagonals are added to the units
+
+    Returns
+    -------
+    tuple
+        (boxes, unitlist, digits) for the board
+    """
+    size = order * order
+    if size > len(SYMBOLS):
+        raise ValueError("Boards larger than {0}x{0} are not supported".format(len(SYMBOLS)))
+    row_labels = [chr(ord('A') + i) for i in range(size)]
+    col_labels = [str(i + 1) for i in range(size)]
+    boxes = [r + c for r in row_labels for c in col_labels]
+    row_units = [[r + c for c in col_labels] for r in row_labels]
+    column_units = [[r + c for r in row_labels] for c in col_labels]
+    bands = [row_labels[i:i + order] for i in range(0, size, order)]
+    stacks = [col_labels[i:i + order] for i in range(0, size, order)]
+    square_units = [[r + c for r in rs for c in cs] for rs in bands for cs in stacks]
+    unitlist = row_units + column_units + square_units
+    if diagonal:
+        unitlist += [[r + c for r, c in zip(row_labels, col_labels)],
+                     [r + c for r, c in zip(row_labels, col_labels[::-1])]]
+    return boxes, unitlist, SYMBOLS[:size]
+
+
+def make_tables(order=3, diagonal=False):
+    """Build the UnitTables of a standard (order^2 x order^2) sudoku board
+    (see `make_units`)"""
+    boxes, unitlist, digits = make_units(order, diagonal)
+    return extract_tables(unitlist, boxes, digits)
+
+
+def extract_units(unitlist, boxes, tables=None):
     """Initialize a mapping from box names to the units that the boxes belong to
 
     Parameters
@@ -19,23 +318,26 @@ def extract_units(unitlist, boxes):
     boxes(list)
         a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
 
+    tables(UnitTables)
+        (optional) the integer tables for the unitlist; they are built from
+        the unitlist if they are not provided
+
     Returns
     -------
     dict
         a dictionary with a key for each box (string) whose value is a list
         containing the units that the box belongs to (i.e., the "member units")
     """
+    if tables is None:
+        tables = extract_tables(unitlist, boxes)
     # the value for keys that aren't in the dictionary are initialized as an empty list
     units = defaultdict(list)
-    for current_box in boxes:
-        for unit in unitlist:
-            if current_box in unit:
-                # defaultdict avoids this raising a KeyError when new keys are added
-                units[current_box].append(unit)
+    for box, member_units in zip(boxes, tables.members):
+        units[box].extend(unitlist[u] for u in member_units)
     return units
 
 
-def extract_peers(units, boxes):
+def extract_peers(units, boxes, tables=None):
     """Initialize a mapping from box names to a list of peer boxes (i.e., a flat list
     of boxes that are in a unit together with the key box)
 
@@ -48,6 +350,10 @@ def extract_peers(units, boxes):
     boxes(list)
         a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
 
+    tables(UnitTables)
+        (optional) the integer tables for the units; when they are provided
+        the peers are read from the tables instead of the units dictionary
+
     Returns
     -------
     dict
@@ -57,19 +363,21 @@ def extract_peers(units, boxes):
     """
     # the value for keys that aren't in the dictionary are initialized as an empty list
     peers = defaultdict(set)  # set avoids duplicates
+    if tables is not None:
+        for key_box, peer_indices in zip(boxes, tables.peers):
+            peers[key_box].update(boxes[i] for i in peer_indices)
+        return peers
     for key_box in boxes:
         for unit in units[key_box]:
-            for peer_box in unit:
-                if peer_box != key_box:
-                    # defaultdict avoids this raising a KeyError when new keys are added
-                    peers[key_box].add(peer_box)
+            peers[key_box].update(unit)
+        peers[key_box].discard(key_box)
     return peers
 
 
 def assign_value(values, box, value):
     """You must use this function to update your values dictionary if you want to
     try using the provided visualization tool. This function records each assignment
-    (in order) for later reconstruction.
+    (in order) in the active Recorder, if there is one, for later reconstruction.
 
     Parameters
     ----------
@@ -85,10 +393,10 @@ def assign_value(values, box, value):
     if values[box] == value:
         return values
 
-    prev = values2grid(values)
     values[box] = value
-    if len(value) == 1:
-        history[values2grid(values)] = (prev, (box, value))
+    recorder = Recorder.active
+    if recorder is not None and len(value) == 1:
+        recorder.record(box_index[box], digits.index(value))
     return values
 
 def cross(A, B):
@@ -160,18 +468,13 @@ def display(values):
     print()
 
 
-def reconstruct(values, history):
+def reconstruct(history):
     """Returns the solution as a sequence of value assignments 
 
     Parameters
     ----------
-    values(dict)
-        a dictionary of the form {'box_name': '123456789', ...}
-
-    history(dict)
-        a dictionary of the form {key: (key, (box, value))} encoding a linked
-        list where each element points to the parent and identifies the value
-        assignment that connects from the parent to the current state
+    history(Recorder)
+        the recorder that logged the assignments while the puzzle was solved
 
     Returns
     -------
@@ -179,9 +482,4 @@ def reconstruct(values, history):
         a list of (box, value) assignments that can be applied in order to the
         starting Sudoku puzzle to reach the solution
     """
-    path = []
-    prev = values2grid(values)
-    while prev in history:
-        prev, step = history[prev]
-        path.append(step)
-    return path[::-1]
+    return list(history)
@@ -0,0 +1,176 @@
+"""Batch constraint propagation over many boards at once with NumPy
+
+A batch of B boards is a (B, boxes, digits) boolean array of candidates
+(B x 81 x 9 on a standard board). Both propagation strategies run on the
+whole batch as array operations:
+
+    eliminate    the solved boxes of every board are multiplied by the
+                 (boxes x boxes) peer matrix, which marks the digits that
+                 each box loses to a solved peer
+    only choice  the candidates are gathered unit by unit with a
+                 (units x unit size) index array and counted, and the
+                 digits that fit in a single place of a unit are scattered
+                 back to their boxes through a membership matrix
+
+The two steps repeat on the boards that are still changing until every
+board is solved, stuck or contradicted. Boards that propagation alone does
+not solve fall back to `bitboard.search_trail` one at a time, so the
+batch mode pays off on workloads where most puzzles solve by propagation.
+
+NumPy is an optional dependency of the project; `BatchSolver` raises an
+ImportError when it is not installed.
+
+Example
+-------
+
+    >>> solver = BatchSolver(tables)
+    >>> solutions = solver.solve(grids)
+"""
+import bitboard
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+SOLVED, STUCK, CONTRADICTION = 1, 0, -1
+
+
+def _count(candidates, axis):
+    # counting in bytes is several times faster than summing booleans
+    return candidates.view(np.uint8).sum(axis=axis, dtype=np.uint8)
+
+
+class BatchSolver(object):
+    """Vectorized propagation and solving for batches of boards
+
+    Parameters
+    ----------
+    tables(UnitTables)
+        the integer unit and peer tables of the board (see `utils.make_tables`);
+        every unit must have one box per digit
+    """
+    def __init__(self, tables):
+        if np is None:
+            raise ImportError("vectorized.py requires numpy")
+        self.tables = tables
+        nboxes, width = len(tables.boxes), len(tables.digits)
+        self.units = np.array(tables.units, dtype=np.intp)
+        if self.units.shape[1] != width:
+            raise ValueError("Every unit must have one box per digit")
+
+        self.peers = np.zeros((nboxes, nboxes), dtype=np.float32)
+        for box, peers in enumerate(tables.peers):
+            self.peers[box, list(peers)] = 1
+        self.members = np.zeros((nboxes, self.units.size), dtype=np.float32)
+        self.members[self.units.ravel(), np.arange(self.units.size)] = 1
+        self.bits = 1 << np.arange(width, dtype=np.int64)
+
+    def grids2array(self, grids):
+        """Convert a list of grid strings to a (B, boxes, digits) candidate array"""
+        symbols = self.tables.digits
+        index = {d: i for i, d in enumerate(symbols)}
+        codes = np.array([[index.get(c, -1) for c in grid] for grid in grids], dtype=np.intp)
+        codes = codes.reshape(len(grids), len(self.tables.boxes))
+        candidates = np.ones(codes.shape + (len(symbols),), dtype=bool)
+        given = codes >= 0
+        candidates[given] = False
+        candidates[given, codes[given]] = True
+        return candidates
+
+    def array2masks(self, candidates):
+        """Convert a (boxes, digits) candidate array of one board to a list of masks"""
+        return (candidates * self.bits).sum(axis=-1).tolist()
+
+    def step(self, candidates):
+        """Apply eliminate and only choice once to every board in a batch
+
+        Returns
+        -------
+        tuple
+            (candidates, contradiction) with the new candidate array and a
+            boolean array that is True for the boards that have no solution
+        """
+        solved = candidates & (_count(candidates, -1) == 1)[..., None]
+        candidates = candidates & ~(self._spread(self.peers, solved) > 0)
+
+        by_unit = candidates[:, self.units]                   # (B, units, size, digits)
+        counts = _count(by_unit, 2)                           # (B, units, digits)
+        forced = by_unit & (counts == 1)[:, :, None, :]
+        forced = forced.reshape(len(candidates), -1, forced.shape[-1])
+        hidden = self._spread(self.members, forced) > 0       # (B, boxes, digits)
+        candidates = np.where(hidden.any(axis=-1, keepdims=True), candidates & hidden, candidates)
+
+        contradiction = ((_count(candidates, -1) == 0).any(axis=1) |
+                         (counts == 0).any(axis=(1, 2)))
+        return candidates, contradiction
+
+    @staticmethod
+    def _spread(matrix, values):
+        # matrix @ values[b] for every board b as a single matrix product
+        product = np.tensordot(matrix, values.astype(np.float32), axes=([1], [1]))
+        return product.transpose(1, 0, 2)
+
+    def propagate(self, candidates):
+        """Propagate every board in a batch until none of them changes
+
+        Parameters
+        ----------
+        candidates(ndarray)
+            a (B, boxes, digits) boolean candidate array; it is not modified
+
+        Returns
+        -------
+        tuple
+            (candidates, status) with the propagated candidates and an int
+            array with SOLVED, STUCK or CONTRADICTION for every board
+        """
+        candidates = candidates.copy()
+        status = np.full(len(candidates), STUCK, dtype=np.int8)
+        active = np.arange(len(candidates))
+        while len(active):
+            before = candidates[active]
+            after, contradiction = self.step(before)
+            candidates[active] = after
+            status[active[contradiction]] = CONTRADICTION
+            changed = (after != before).any(axis=(1, 2))
+            active = active[changed & ~contradiction]
+        solved = (_count(candidates, -1) == 1).all(axis=1) & (status != CONTRADICTION)
+        status[solved] = SOLVED
+        return candidates, status
+
+    def solve(self, grids, stats=None):
+        """Solve a batch of puzzles, searching the boards that propagation
+        does not solve one at a time
+
+        Parameters
+        ----------
+        grids(list)
+            puzzle grid strings
+
+        stats(Counter)
+            (optional) receives the number of boards 'propagated' to a
+            solution, 'searched' and found 'unsolvable'
+
+        Returns
+        -------
+        list
+            the solved grid string of each puzzle, or None if it has no
+            solution
+        """
+        tables = self.tables
+        candidates, status = self.propagate(self.grids2array(grids))
+        symbols = np.array(list(tables.digits))
+        solutions = [None] * len(grids)
+        for i in np.flatnonzero(status == SOLVED):
+            solutions[i] = ''.join(symbols[candidates[i].argmax(axis=-1)])
+        for i in np.flatnonzero(status == STUCK):
+            masks = bitboard.search_trail(self.array2masks(candidates[i]), tables)
+            if masks:
+                solutions[i] = bitboard.masks2grid(masks, tables)
+        if stats is not None:
+            stats['propagated'] += int((status == SOLVED).sum())
+            stats['searched'] += int((status == STUCK).sum())
+            stats['unsolvable'] += solutions.count(None)
+        return solutions
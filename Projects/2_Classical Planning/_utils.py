@@ -159,3 +159,39 @@ def decode_state(state, fluent_map):
         else:
             fs.neg.append(fluent_map[idx])
     return fs
+
+
+def encode_bits(fs, fluent_map):
+    """ Convert a FluentState into an int bitset with bit i set when the
+    fluent fluent_map[i] is True
+
+    The bitset encoding lets planning problems test preconditions and apply
+    effects with a few bitwise operations (see `planning_problem.ActionMasks`).
+
+    Parameters
+    ----------
+    fs: FluentState
+        A state object represented as a FluentState
+
+    fluent_map:
+        An ordered sequence of fluents
+
+    Returns
+    -------
+    int with one bit per fluent in fluent_map
+    """
+    return fluent_mask(fs.pos, fluent_map)
+
+
+def decode_bits(state, fluent_map):
+    """ Convert an int bitset state into an ordered tuple of True/False values
+    (see `encode_bits` and `encode_state`)
+    """
+    return tuple([bool(state >> idx & 1) for idx in range(len(fluent_map))])
+
+
+def fluent_mask(fluents, fluent_map):
+    """ Return the int bitset of the fluents from fluent_map that appear in
+    the fluents collection """
+    fluents = set(fluents)
+    return sum(1 << idx for idx, f in enumerate(fluent_map) if f in fluents)
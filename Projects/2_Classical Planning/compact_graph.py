@@ -0,0 +1,389 @@
+""" Planning graph engine over integer ids and bitsets
+
+`PlanningGraph` builds a new ActionLayer and LiteralLayer for every level,
+each with its own copies of the edge dicts and a dict of Expr mutex sets.
+`CompactPlanningGraph` computes the same graph with a bi-level structure
+(see the Project Enhancements section of the README):
+
+    - every literal and action of a problem is interned to an integer id
+      once, and the preconditions, effects and static mutexes (inconsistent
+      effects and interference) of each action are precomputed as int
+      bitsets (`GraphIndex`)
+    - a graph only records the level at which each literal and action first
+      appears, since layers grow monotonically, so a layer is the bitset of
+      the items whose first level is not above it
+    - the mutexes of each item are a bitset stamped with the level where it
+      was computed, and a new stamp is only stored when the bitset changes
+      (mutexes only disappear as the graph grows)
+
+so the memory of a graph grows with the size of the problem and the number
+of mutex changes instead of the number of levels times the size of the
+problem, and the mutex tests of a level are bitwise operations instead of
+Expr set operations.
+
+Literal 2*i is the fluent problem.state_map[i] and literal 2*i+1 is its
+negation, so the negation of a literal id is id ^ 1. Action ids 0 to
+2*len(state_map)-1 are the no-op actions of the literal with the same id,
+and the actions of problem.actions_list follow them.
+
+Example
+-------
+
+    >>> pg = CompactPlanningGraph(problem, problem.initial)
+    >>> pg.h_setlevel()
+    >>> problem.planning_graph = CompactPlanningGraph  # used by h_pg_*
+"""
+from bisect import bisect_right
+from itertools import chain
+from weakref import WeakKeyDictionary
+
+from layers import makeNoOp, make_node
+
+
+def _ids(mask):
+    """ Yield the indices of the set bits of an int """
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+class GraphIndex(object):
+    """ The integer ids and static bitsets of the planning graphs of a problem
+
+    Actions with a precondition outside of state_map can never be added to a
+    graph and are left out, and effects outside of state_map are ignored.
+
+    Attributes
+    ----------
+    literals : list
+        The Expr of each literal id
+
+    literal_ids : dict
+        Mapping from literal Expr to literal id
+
+    nodes : list
+        The layers.ActionNode of each action id
+
+    pre, eff : list
+        The literal bitsets of the preconditions and effects of each action
+
+    producers, consumers : list
+        The action bitsets of the actions with each literal as an effect
+        and as a precondition
+
+    static : list
+        The action bitset of the actions mutex with each action by
+        inconsistent effects or interference
+
+    real : int
+        The action bitset of the actions that are not no-ops
+    """
+    def __init__(self, problem):
+        self.actions_list = problem.actions_list
+        self.literals = list(chain(*((s, ~s) for s in problem.state_map)))
+        self.literal_ids = {literal: idx for idx, literal in enumerate(self.literals)}
+        self._odd = sum(1 << idx for idx in range(1, len(self.literals), 2))
+
+        self.nodes = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
+        for action in problem.actions_list:
+            node = make_node(action)
+            if all(p in self.literal_ids for p in node.preconditions):
+                self.nodes.append(node)
+        self.pre = [self.mask(node.preconditions) for node in self.nodes]
+        self.eff = [self.mask(node.effects) for node in self.nodes]
+        self.real = sum(1 << idx for idx, node in enumerate(self.nodes) if not node.no_op)
+
+        self.producers = [0] * len(self.literals)
+        self.consumers = [0] * len(self.literals)
+        for idx, (pre, eff) in enumerate(zip(self.pre, self.eff)):
+            for lit in _ids(pre):
+                self.consumers[lit] |= 1 << idx
+            for lit in _ids(eff):
+                self.producers[lit] |= 1 << idx
+
+        self.static = []
+        for idx, (pre, eff) in enumerate(zip(self.pre, self.eff)):
+            mutex = 0
+            for lit in _ids(self.negate(eff)):  # inconsistent effects, and interference both ways
+                mutex |= self.producers[lit] | self.consumers[lit]
+            for lit in _ids(self.negate(pre)):
+                mutex |= self.producers[lit]
+            self.static.append(mutex & ~(1 << idx))
+
+    def mask(self, literals):
+        """ Return the bitset of the literal Exprs that have ids """
+        ids = self.literal_ids
+        return sum(1 << ids[lit] for lit in set(literals) if lit in ids)
+
+    def negate(self, mask):
+        """ Return the bitset of the negations of the literals of a bitset """
+        odd = self._odd
+        return (mask & odd) >> 1 | (mask & (odd >> 1)) << 1
+
+    def state_literals(self, state):
+        """ Return the literal bitset of a state (an int bitset or a tuple of
+        bools over state_map) """
+        if not isinstance(state, int):
+            return sum(1 << (2 * idx + (not f)) for idx, f in enumerate(state))
+        return sum(1 << (2 * idx + (not state >> idx & 1)) for idx in range(len(self.literals) // 2))
+
+
+_INDEXES = WeakKeyDictionary()
+
+
+def graph_index(problem):
+    """ Return the GraphIndex of a problem, built on first use and rebuilt if
+    problem.actions_list is replaced """
+    index = _INDEXES.get(problem)
+    if index is None or index.actions_list is not problem.actions_list:
+        index = _INDEXES[problem] = GraphIndex(problem)
+    return index
+
+
+class _Stamped(object):
+    """ The mutex bitset of every item at every level, stored as a list of
+    (level, bitset) stamps per item that only grows when the bitset changes """
+    __slots__ = ['levels', 'masks', 'current']
+
+    def __init__(self, size):
+        self.levels = [[] for _ in range(size)]
+        self.masks = [[] for _ in range(size)]
+        self.current = [0] * size
+
+    def stamp(self, idx, level, mask):
+        """ Record the mutexes of an item at a level, returning True if they
+        changed since the last stamp """
+        if self.levels[idx] and self.current[idx] == mask:
+            return False
+        self.levels[idx].append(level)
+        self.masks[idx].append(mask)
+        self.current[idx] = mask
+        return True
+
+    def at(self, idx, level):
+        """ Return the mutex bitset of an item at a level """
+        pos = bisect_right(self.levels[idx], level)
+        return self.masks[idx][pos - 1] if pos else 0
+
+
+class CompactPlanningGraph(object):
+    """ A planning graph with the levels, mutexes and heuristics of
+    `my_planning_graph.PlanningGraph` (see the module docstring)
+
+    Parameters
+    ----------
+    problem : PlanningProblem
+        An instance of the PlanningProblem class
+
+    state : int or tuple(bool)
+        A bitset (see `_utils.encode_bits`) or an ordered sequence of True/False
+        values indicating the literal value of the corresponding fluent in
+        problem.state_map
+
+    serialize : bool
+        Flag indicating whether to serialize non-persistence actions
+
+    ignore_mutexes : bool
+        If True only the static mutexes (negation, inconsistent effects and
+        interference) are enforced, and the dynamic mutexes are not computed
+    """
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False):
+        self._index = index = graph_index(problem)
+        self._serialize = serialize
+        self._ignore_mutexes = ignore_mutexes
+        self._is_leveled = False
+        self.goal = set(problem.goal)
+
+        self.literal_levels = [None] * len(index.literals)
+        self.action_levels = [None] * len(index.nodes)
+        self._literals = index.state_literals(state)
+        self._actions = 0
+        self._new_literals = self._literals
+        self._level = 0
+        for lit in _ids(self._literals):
+            self.literal_levels[lit] = 0
+
+        # dynamic mutexes; with ignore_mutexes only the static ones are used
+        self._literal_mutexes = self._action_mutexes = None
+        if not ignore_mutexes:
+            self._literal_mutexes = _Stamped(len(index.literals))
+            self._action_mutexes = _Stamped(len(index.nodes))
+            for lit in _ids(self._literals):
+                self._literal_mutexes.stamp(lit, 0, self._literals & 1 << (lit ^ 1))
+
+    @property
+    def levels(self):
+        """ The number of literal layers in the graph """
+        return self._level + 1
+
+    def literals(self, level=-1):
+        """ Return the set of literal Exprs in a literal layer """
+        level = self._level if level < 0 else level
+        return {lit for lit, first in zip(self._index.literals, self.literal_levels)
+                if first is not None and first <= level}
+
+    def actions(self, level=-1):
+        """ Return the set of ActionNodes in an action layer """
+        level = self._level - 1 if level < 0 else level
+        return {node for node, first in zip(self._index.nodes, self.action_levels)
+                if first is not None and first <= level}
+
+    def is_mutex(self, literalA, literalB, level=-1):
+        """ Return True if two literals are mutex in a literal layer """
+        ids = self._index.literal_ids
+        a, b = ids[literalA], ids[literalB]
+        level = self._level if level < 0 else level
+        if self._literal_mutexes is None or level > self._level:
+            return a ^ 1 == b
+        return bool(self._literal_mutexes.at(a, level) >> b & 1)
+
+    def is_action_mutex(self, actionA, actionB, level=-1):
+        """ Return True if two ActionNodes are mutex in an action layer """
+        a, b = self._index.nodes.index(actionA), self._index.nodes.index(actionB)
+        level = self._level - 1 if level < 0 else level
+        if self._action_mutexes is None:
+            return bool(self._static_mutexes(a) >> b & 1)
+        return bool(self._action_mutexes.at(a, level) >> b & 1)
+
+    def _static_mutexes(self, action):
+        index = self._index
+        mutexes = index.static[action]
+        if self._serialize and index.real >> action & 1:
+            mutexes |= index.real & ~(1 << action)
+        return mutexes
+
+    def _goal_ids(self):
+        ids = self._index.literal_ids
+        return [ids.get(goal) for goal in self.goal]
+
+    def level_cost(self, literal):
+        """ Return the first level of a literal, extending the graph until it
+        appears, or None if it never does """
+        lit = self._index.literal_ids.get(literal)
+        if lit is None:
+            return None
+        while self.literal_levels[lit] is None and not self._is_leveled:
+            self._extend()
+        return self.literal_levels[lit]
+
+    def h_levelsum(self):
+        """ Calculate the level sum heuristic for the planning graph, or
+        float('inf') if a goal never appears
+
+        See Also
+        --------
+        my_planning_graph.PlanningGraph.h_levelsum
+        """
+        costs = [self.level_cost(goal) for goal in self.goal]
+        return float('inf') if None in costs else sum(costs)
+
+    def h_maxlevel(self):
+        """ Calculate the max level heuristic for the planning graph, or
+        float('inf') if a goal never appears
+
+        See Also
+        --------
+        my_planning_graph.PlanningGraph.h_maxlevel
+        """
+        costs = [self.level_cost(goal) for goal in self.goal]
+        return float('inf') if None in costs else max(costs, default=0)
+
+    def h_setlevel(self):
+        """ Calculate the set level heuristic for the planning graph, or
+        float('inf') if the goals are never all present and pairwise non-mutex
+
+        See Also
+        --------
+        my_planning_graph.PlanningGraph.h_setlevel
+        """
+        goals = self._goal_ids()
+        if None in goals:
+            return float('inf')
+        mask = sum(1 << goal for goal in goals)
+        level = 0
+        while True:
+            while level > self._level:
+                if self._is_leveled:
+                    return float('inf')
+                self._extend()
+            if self._literals & mask == mask and not any(self._mutexes_at(goal, level) & mask for goal in goals):
+                return level
+            level += 1
+
+    def _mutexes_at(self, lit, level):
+        if self._literal_mutexes is None:
+            first = self.literal_levels[lit ^ 1]
+            return 1 << (lit ^ 1) if first is not None and first <= level else 0
+        return self._literal_mutexes.at(lit, level)
+
+    def fill(self, maxlevels=-1):
+        """ Extend the planning graph until it is leveled, or until a specified
+        number of levels have been added (see `PlanningGraph.fill`) """
+        while not self._is_leveled:
+            if maxlevels == 0: break
+            self._extend()
+            maxlevels -= 1
+        return self
+
+    def _extend(self):
+        """ Add the next action layer and literal layer to the graph """
+        if self._is_leveled: return
+        index, level = self._index, self._level
+        literals, actions = self._literals, self._actions
+
+        # only the actions that need a literal added at the last level can be new
+        candidates = 0
+        for lit in _ids(self._new_literals):
+            candidates |= index.consumers[lit]
+        if level == 0:
+            candidates |= sum(1 << a for a, pre in enumerate(index.pre) if not pre)
+        added, effects = 0, 0
+        for a in _ids(candidates & ~actions):
+            if not index.pre[a] & ~literals:
+                added |= 1 << a
+                effects |= index.eff[a]
+                self.action_levels[a] = level
+        actions |= added
+        new_literals = effects & ~literals
+        for lit in _ids(new_literals):
+            self.literal_levels[lit] = level + 1
+        self._actions, self._literals, self._new_literals = actions, literals | new_literals, new_literals
+        self._level = level + 1
+
+        changed = False
+        if not self._ignore_mutexes:
+            changed = self._update_mutexes(level, actions, literals | new_literals)
+        self._is_leveled = not new_literals and not changed
+
+    def _update_mutexes(self, level, actions, literals):
+        """ Compute the mutexes of action layer `level` and literal layer
+        `level + 1`, returning True if a literal mutex bitset changed """
+        index = self._index
+        action_mutexes, literal_mutexes = self._action_mutexes, self._literal_mutexes
+        parent = literal_mutexes.current  # the literal mutexes of the previous level
+        consumers = index.consumers
+        for a in _ids(actions):
+            needs = 0
+            for p in _ids(index.pre[a]):
+                needs |= parent[p]
+            mutexes = self._static_mutexes(a)
+            for q in _ids(needs):  # competing needs
+                mutexes |= consumers[q]
+            action_mutexes.stamp(a, level, mutexes & actions & ~(1 << a))
+        current = action_mutexes.current
+
+        changed = False
+        producers, eff = index.producers, index.eff
+        for lit in _ids(literals):
+            # inconsistent support: every achiever of the other literal is
+            # mutex with every achiever of lit
+            common = actions
+            for a in _ids(producers[lit] & actions):
+                common &= current[a]
+            supported = 0
+            for b in _ids(actions & ~common):
+                supported |= eff[b]
+            mutexes = (literals & ~supported & ~(1 << lit)) | (literals & 1 << (lit ^ 1))
+            changed |= literal_mutexes.stamp(lit, level + 1, mutexes)
+        return changed
@@ -2,11 +2,17 @@
 from copy import deepcopy
 from functools import lru_cache
 from itertools import combinations
-from collections import defaultdict, MutableSet
+from collections import defaultdict
+from collections.abc import MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
 
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for vectorized layers
+    np = None
+
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
     ##############################################################################
@@ -114,8 +120,28 @@ class BaseLayer(MutableSet):
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
         mutexes are *always* enforced). For example, a literal X is always mutex
         with ~X, but "competing needs" or "inconsistent support" can be skipped
+
+    _vectorized : bool
+        If _vectorized is True then update_mutexes() computes the mutexes of the
+        whole layer with NumPy matrix products over boolean incidence matrices
+        (items x literals or literals x actions) instead of testing each pair
+        of items with the _inconsistent_effects(), _interference(),
+        _competing_needs(), _negation() and _inconsistent_support() methods.
+        Layers copied from a vectorized layer or built on a vectorized parent
+        layer are vectorized too.
+
+    _previous : BaseLayer (or subclass)
+        The layer of the same kind this layer was copied from (the same layer
+        one level earlier in a planning graph), or None. Mutexes only disappear
+        as a planning graph grows, so once the mutexes of the previous layer
+        are computed, update_mutexes() only tests the pairs of items that were
+        mutex there and the pairs with a new item (see _mutex_candidates)
+
+    _static_mutexes : set
+        The pairs (as frozensets) found mutex by negation, inconsistent effects,
+        interference or serialization, shared with the previous layer
     """
-    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False):
+    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False, vectorized=None):
         """
         Parameters
         ----------
@@ -127,14 +153,29 @@ class BaseLayer(MutableSet):
 
         ignore_mutexes : bool
             See _ignore_mutexes attribute
+
+        vectorized : bool
+            See _vectorized attribute (by default it is inherited from items
+            or parent_layer)
         """
         super().__init__()
+        if vectorized is None:
+            vectorized = getattr(items, '_vectorized', False) or getattr(parent_layer, '_vectorized', False)
+        if vectorized and np is None:
+            raise ImportError("vectorized planning graph layers require numpy")
         self.__store = set(iter(items))
         self.parents = defaultdict(set)
         self.children = defaultdict(set)
         self._mutexes = defaultdict(set)
+        self._matrix = None
+        self._previous = None
+        self._mutexes_updated = False
+        self._static_mutexes = getattr(items, '_static_mutexes', None) if isinstance(items, BaseLayer) else None
+        if self._static_mutexes is None:
+            self._static_mutexes = set()
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
+        self._vectorized = vectorized
 
     def __contains__(self, item):
         return item in self.__store
@@ -162,31 +203,127 @@ class BaseLayer(MutableSet):
     def set_mutex(self, itemA, itemB):
         self._mutexes[itemA].add(itemB)
         self._mutexes[itemB].add(itemA)
+        self._matrix = None
 
     def is_mutex(self, itemA, itemB):
         return itemA in self._mutexes.get(itemB, [])
 
+    def mutex_matrix(self, items):
+        """ Return a float32 matrix with a 1 at [i, j] when items[i] and items[j]
+        are mutex in this layer (items may include items outside the layer) """
+        index = {item: idx for idx, item in enumerate(items)}
+        matrix = np.zeros((len(items), len(items)), dtype=np.float32)
+        if self._matrix is not None:
+            # the layer was vectorized, so reuse its matrix instead of the dicts
+            own, own_matrix = self._matrix
+            pos = np.array([index.get(item, -1) for item in own], dtype=np.intp)
+            keep = pos >= 0
+            matrix[np.ix_(pos[keep], pos[keep])] = own_matrix[np.ix_(keep, keep)]
+        else:
+            for item, others in self._mutexes.items():
+                if item in index:
+                    matrix[index[item], [index[o] for o in others if o in index]] = 1
+        return matrix
+
+    def _mutex_candidates(self):
+        """ Return the pairs of items that update_mutexes() has to test
+
+        Without the computed mutexes of a previous layer every pair is tested.
+        Otherwise a pair of items that were both in the previous layer and not
+        mutex there stays non-mutex (e.g., two literals that are not mutex keep
+        their non-mutex no-op achievers), so only the pairs that were mutex and
+        the pairs with a new item are tested. The static mutexes found in
+        earlier layers never disappear, so they are copied without a test.
+        """
+        previous = self._previous
+        if previous is None or not previous._mutexes_updated:
+            return combinations(iter(self), 2)
+        new = [item for item in self if item not in previous]
+        pairs = list(combinations(new, 2))
+        pairs.extend((itemA, itemB) for itemA in new for itemB in previous)
+        static = self._static_mutexes
+        seen = set()
+        for itemA, others in previous._mutexes.items():
+            seen.add(itemA)
+            for itemB in others - seen:
+                if frozenset((itemA, itemB)) in static:
+                    self.set_mutex(itemA, itemB)
+                else:
+                    pairs.append((itemA, itemB))
+        return pairs
+
+    def _set_static_mutex(self, itemA, itemB):
+        """ Set a mutex that holds in every layer where both items appear """
+        self.set_mutex(itemA, itemB)
+        self._static_mutexes.add(frozenset((itemA, itemB)))
+
+    def _set_mutex_matrix(self, items, matrix):
+        """ Set the mutexes of a boolean matrix over a list of items """
+        np.fill_diagonal(matrix, False)
+        fresh = not self._mutexes
+        for i in np.flatnonzero(matrix.any(axis=1)):
+            self._mutexes[items[i]].update(items[j] for j in np.flatnonzero(matrix[i]))
+        self._matrix = (items, matrix) if fresh else None
+
+
+def _incidence(items, columns, edges):
+    """ Return a float32 matrix with a 1 at [i, j] when the item columns[j] is
+    in edges[items[i]] """
+    index = {item: idx for idx, item in enumerate(columns)}
+    matrix = np.zeros((len(items), len(columns)), dtype=np.float32)
+    for row, item in enumerate(items):
+        matrix[row, [index[x] for x in edges.get(item, ()) if x in index]] = 1
+    return matrix
+
 
 class BaseActionLayer(BaseLayer):
-    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
-        super().__init__(actions, parent_layer, ignore_mutexes)
+    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False, vectorized=None):
+        super().__init__(actions, parent_layer, ignore_mutexes, vectorized)
         self._serialize=serialize
         if isinstance(actions, BaseActionLayer):
+            self._previous = actions
             self.parents.update({k: set(v) for k, v in actions.parents.items()})
             self.children.update({k: set(v) for k, v in actions.children.items()})
 
     def update_mutexes(self):
-        for actionA, actionB in combinations(iter(self), 2):
+        self._mutexes_updated = True
+        if self._vectorized:
+            return self._update_mutexes_vectorized()
+        for actionA, actionB in self._mutex_candidates():
             if self._serialize and actionA.no_op == actionB.no_op == False:
-                self.set_mutex(actionA, actionB)
+                self._set_static_mutex(actionA, actionB)
             elif (self._inconsistent_effects(actionA, actionB)
                     or self._interference(actionA, actionB)):
-                self.set_mutex(actionA, actionB)
+                self._set_static_mutex(actionA, actionB)
             elif self._ignore_mutexes:
                 continue
             elif self._competing_needs(actionA, actionB):
                 self.set_mutex(actionA, actionB)
 
+    def _update_mutexes_vectorized(self):
+        # P[a, j] / E[a, j]: literal j is a precondition / effect of action a,
+        # and the columns in `negated` order hold the negated literals
+        actions = list(self)
+        literals = set(self.parent_layer or ())
+        for action in actions:
+            literals |= self.parents.get(action, set()) | self.children.get(action, set())
+        literals = list(literals | {~x for x in literals})
+        index = {literal: idx for idx, literal in enumerate(literals)}
+        negated = [index[~x] for x in literals]
+        pre = _incidence(actions, literals, self.parents)
+        eff = _incidence(actions, literals, self.children)
+
+        mutex = (eff @ eff[:, negated].T) > 0            # inconsistent effects
+        interference = (eff @ pre[:, negated].T) > 0
+        mutex |= interference | interference.T
+        if self._serialize:
+            real = np.array([not action.no_op for action in actions])
+            mutex |= np.outer(real, real)
+        if not self._ignore_mutexes and self.parent_layer is not None:
+            needs = self.parent_layer.mutex_matrix(literals)
+            mutex |= (pre @ needs @ pre.T) > 0            # competing needs
+        self._set_mutex_matrix(actions, mutex)
+
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
         self.parents[action] |= set(literals)
@@ -197,21 +334,43 @@ class BaseActionLayer(BaseLayer):
 
 
 class BaseLiteralLayer(BaseLayer):
-    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False):
-        super().__init__(literals, parent_layer, ignore_mutexes)
+    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False, vectorized=None):
+        super().__init__(literals, parent_layer, ignore_mutexes, vectorized)
         if isinstance(literals, BaseLiteralLayer):
+            self._previous = literals
             self.parents.update({k: set(v) for k, v in literals.parents.items()})
             self.children.update({k: set(v) for k, v in literals.children.items()})
 
     def update_mutexes(self):
-        for literalA, literalB in combinations(iter(self), 2):
+        self._mutexes_updated = True
+        if self._vectorized:
+            return self._update_mutexes_vectorized()
+        for literalA, literalB in self._mutex_candidates():
             if self._negation(literalA, literalB):
-                self.set_mutex(literalA, literalB)
+                self._set_static_mutex(literalA, literalB)
             elif self._ignore_mutexes:
                 continue
             elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
                 self.set_mutex(literalA, literalB)
 
+    def _update_mutexes_vectorized(self):
+        literals = list(self)
+        index = {literal: idx for idx, literal in enumerate(literals)}
+        mutex = np.zeros((len(literals), len(literals)), dtype=bool)
+        for idx, literal in enumerate(literals):               # negation
+            if ~literal in index:
+                mutex[idx, index[~literal]] = True
+        if not self._ignore_mutexes and self.parent_layer is not None and len(self.parent_layer):
+            # R[x, a]: action a achieves literal x; two literals have
+            # inconsistent support when no pair of their achievers is
+            # non-mutex (an action is never mutex with itself)
+            actions = list(self.parent_layer)
+            achievers = _incidence(literals, actions, self.parents)
+            allowed = 1 - self.parent_layer.mutex_matrix(actions)
+            np.fill_diagonal(allowed, 1)
+            mutex |= (achievers @ allowed @ achievers.T) == 0
+        self._set_mutex_matrix(literals, mutex)
+
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
         for literal in literals:
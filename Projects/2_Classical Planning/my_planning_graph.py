@@ -3,6 +3,7 @@ from itertools import chain, combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
+from _utils import decode_bits
 from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
 
 
@@ -76,22 +77,27 @@ class LiteralLayer(BaseLiteralLayer):
 
 
 class PlanningGraph:
-    def __init__(self, problem, state, serialize=True, ignore_mutexes=False):
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False, vectorized=False):
         """
         Parameters
         ----------
         problem : PlanningProblem
             An instance of the PlanningProblem class
 
-        state : tuple(bool)
-            An ordered sequence of True/False values indicating the literal value
-            of the corresponding fluent in problem.state_map
+        state : int or tuple(bool)
+            A bitset (see `_utils.encode_bits`) or an ordered sequence of True/False
+            values indicating the literal value of the corresponding fluent in
+            problem.state_map
 
         serialize : bool
             Flag indicating whether to serialize non-persistence actions. Actions
             should NOT be serialized for regression search (e.g., GraphPlan), and
             _should_ be serialized if the planning graph is being used to estimate
             a heuristic
+
+        vectorized : bool
+            Flag indicating whether to compute the mutexes of each layer with
+            NumPy matrix products (see `layers.BaseLayer`)
         """
         self._serialize = serialize
         self._is_leveled = False
@@ -104,8 +110,10 @@ class PlanningGraph:
         
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
+        if isinstance(state, int):  # bitset states of BasePlanningProblem
+            state = decode_bits(state, problem.state_map)
         literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
-        layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
+        layer = LiteralLayer(literals, ActionLayer(vectorized=vectorized), self._ignore_mutexes)
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
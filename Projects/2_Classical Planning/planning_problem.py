@@ -1,10 +1,11 @@
 
+from collections import defaultdict, namedtuple
 from functools import lru_cache
 
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
+from _utils import encode_bits, fluent_mask
 from my_planning_graph import PlanningGraph
 
     ##############################################################################
@@ -12,12 +13,122 @@ from my_planning_graph import PlanningGraph
     ##############################################################################
 
 
+class ActionMasks(namedtuple('ActionMasks', ['action', 'pos', 'neg', 'add', 'rem'])):
+    """ Int bitsets of the preconditions and effects of a grounded action over
+    the fluents of a problem's state_map (see `_utils.encode_bits`)
+
+    An action applies in a state when every bit of pos is set and no bit of
+    neg is, and the next state is (state & ~rem) | add.
+    """
+    __slots__ = ()
+
+
+class SuccessorGenerator(object):
+    """ Index that finds the applicable actions of a state without testing
+    every grounded action
+
+    Every action is filed under one of its positive preconditions, the one
+    shared by the fewest actions, so an action can only apply in states where
+    its bucket's fluent is True. A query visits the buckets of the True
+    fluents of the state and tests the actions in them (plus the few actions
+    without a positive precondition), so its cost grows with the actions
+    that could apply rather than with the whole action list. In the air
+    cargo problems a Load action is filed under the At fluent of its cargo,
+    for instance, so a state only checks the loads of the cargo that is
+    actually at each airport.
+
+    Parameters
+    ----------
+    action_masks : list
+        The ActionMasks of the actions; the applicable actions are returned
+        in this order
+    """
+    def __init__(self, action_masks):
+        sharing = defaultdict(int)
+        for m in action_masks:
+            for bit in _bits(m.pos):
+                sharing[bit] += 1
+        self._buckets = defaultdict(list)
+        self._unconditional = []
+        for idx, m in enumerate(action_masks):
+            entry = (idx, m.action, m.pos, m.neg)
+            if m.pos:
+                self._buckets[min(_bits(m.pos), key=sharing.__getitem__)].append(entry)
+            else:
+                self._unconditional.append(entry)
+        self._buckets = dict(self._buckets)
+        self._triggers = sum(self._buckets)
+
+    def applicable(self, state):
+        """ Return the actions whose preconditions hold in the state """
+        found = [(idx, action) for idx, action, pos, neg in self._unconditional if not state & neg]
+        buckets = self._buckets
+        bits = state & self._triggers
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            for idx, action, pos, neg in buckets[bit]:
+                if state & pos == pos and not state & neg:
+                    found.append((idx, action))
+        found.sort()
+        return [action for _, action in found]
+
+
+def _bits(mask):
+    """ Yield the single-bit masks of the set bits of an int """
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
 class BasePlanningProblem(Problem):
+    """ Planning problem whose states are int bitsets over state_map
+
+    Bit i of a state is set when the fluent state_map[i] is True, so testing
+    the preconditions of an action, applying its effects and testing the goal
+    are each a few bitwise operations on precomputed masks.
+
+    The h_pg_* heuristics build their planning graphs with the class in the
+    planning_graph attribute; assign `compact_graph.CompactPlanningGraph`
+    to a problem (or a subclass) to use the integer-indexed engine, or
+    `functools.partial(PlanningGraph, vectorized=True)` to compute the layer
+    mutexes with NumPy.
+    """
+    planning_graph = PlanningGraph
+
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
-        self.initial_state_TF = encode_state(initial, self.state_map)
+        self.initial_state_TF = encode_bits(initial, self.state_map)
+        self.goal_mask = fluent_mask(goal, self.state_map)
+        self._masks = None
         super().__init__(self.initial_state_TF, goal=goal)
 
+    @property
+    def action_masks(self):
+        """ The ActionMasks of every action in actions_list that can ever
+        apply (a precondition on a fluent outside of state_map never holds) """
+        return self._action_table()[1]
+
+    def encode_action(self, action):
+        """ Return the ActionMasks of an action over state_map """
+        return ActionMasks(action,
+                           fluent_mask(action.precond_pos, self.state_map),
+                           fluent_mask(action.precond_neg, self.state_map),
+                           fluent_mask(action.effect_add, self.state_map),
+                           fluent_mask(action.effect_rem, self.state_map))
+
+    def _action_table(self):
+        # built on first use, since subclasses set actions_list after calling
+        # the base constructor, and rebuilt if actions_list is replaced
+        if self._masks is None or self._masks[0] is not self.actions_list:
+            known = set(self.state_map)
+            masks = [self.encode_action(action) for action in self.actions_list
+                     if known.issuperset(action.precond_pos | action.precond_neg)]
+            self._masks = (self.actions_list, masks, {m.action: m for m in masks},
+                           SuccessorGenerator(masks))
+        return self._masks
+
     @lru_cache()
     def h_unmet_goals(self, node):
         """ This heuristic estimates the minimum number of actions that must be
@@ -25,7 +136,7 @@ class BasePlanningProblem(Problem):
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
-        return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
+        return bin(self.goal_mask & ~node.state).count('1')
 
     @lru_cache()
     def h_pg_levelsum(self, node):
@@ -38,7 +149,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = self.planning_graph(self, node.state, serialize=True, ignore_mutexes=True)
         score = pg.h_levelsum()
         return score
 
@@ -53,7 +164,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = self.planning_graph(self, node.state, serialize=True, ignore_mutexes=True)
         score = pg.h_maxlevel()
         return score
 
@@ -67,37 +178,21 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
+        pg = self.planning_graph(self, node.state, serialize=True)
         score = pg.h_setlevel()
         return score
 
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        return self._action_table()[3].applicable(state)
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
         given state. The action must be one of self.actions(state).
         """
-        return tuple([
-            (f and s not in action.effect_rem) or (s in action.effect_add)
-            for f, s in zip(state, self.state_map)
-        ])
+        masks = self._action_table()[2].get(action) or self.encode_action(action)
+        return state & ~masks.rem | masks.add
 
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: int) -> bool:
         """ Test the state to see if goal is reached """
-        return all(f for f, c in zip(state, self.state_map) if c in self.goal)
+        return state & self.goal_mask == self.goal_mask
@@ -1,6 +1,8 @@
 
 import argparse
 
+from functools import partial
+
 from aimacode.search import (breadth_first_search, astar_search,
     breadth_first_tree_search, depth_first_graph_search, uniform_cost_search,
     greedy_best_first_graph_search, depth_limited_search,
@@ -8,6 +10,8 @@ from aimacode.search import (breadth_first_search, astar_search,
 from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
 
 from _utils import run_search
+from compact_graph import CompactPlanningGraph
+from my_planning_graph import PlanningGraph
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -66,7 +70,7 @@ def manual():
         __file__, " ".join(p_choices), " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, compact=False, vectorized=False):
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
 
@@ -76,6 +80,10 @@ def main(p_choices, s_choices):
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
             problem_instance = problem_fn()
+            if compact:
+                problem_instance.planning_graph = CompactPlanningGraph
+            elif vectorized:
+                problem_instance.planning_graph = partial(PlanningGraph, vectorized=True)
             heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
             run_search(problem_instance, search_fn, heuristic_fn)
 
@@ -86,6 +94,10 @@ if __name__=="__main__":
         "and informed heuristic search.")
     parser.add_argument('-m', '--manual', action="store_true",
                         help="Interactively select the problems and searches to run.")
+    parser.add_argument('-c', '--compact', action="store_true",
+                        help="Compute the planning graph heuristics with the integer-indexed engine in compact_graph.py.")
+    parser.add_argument('-v', '--vectorized', action="store_true",
+                        help="Compute the mutexes of each planning graph layer with NumPy matrix products.")
     parser.add_argument('-p', '--problems', nargs="+", choices=range(1, len(PROBLEMS)+1), type=int, metavar='',
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
@@ -95,7 +107,8 @@ if __name__=="__main__":
     if args.manual:
         manual()
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))), args.compact,
+             args.vectorized)
     else:
         print()
         parser.print_help()
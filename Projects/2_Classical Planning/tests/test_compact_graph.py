@@ -0,0 +1,99 @@
+import unittest
+
+from aimacode.search import Node, astar_search
+from aimacode.utils import expr
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
+from _utils import decode_bits
+from compact_graph import CompactPlanningGraph, graph_index
+from example_have_cake import have_cake
+from layers import make_node
+
+
+class TestGraphIndex(unittest.TestCase):
+    def test_literal_ids(self):
+        problem = have_cake()
+        index = graph_index(problem)
+        self.assertIs(graph_index(problem), index)
+        for idx, fluent in enumerate(problem.state_map):
+            self.assertEqual(index.literals[2 * idx], fluent)
+            self.assertEqual(index.literals[2 * idx + 1], ~fluent)
+            self.assertEqual(index.negate(1 << 2 * idx), 1 << 2 * idx + 1)
+
+    def test_static_mutexes(self):
+        problem = have_cake()
+        index = graph_index(problem)
+        eat, bake = [index.nodes.index(make_node(a)) for a in problem.actions_list]
+        # Eat(Cake) removes Have(Cake), which Bake(Cake) adds
+        self.assertTrue(index.static[eat] >> bake & 1)
+        self.assertTrue(index.static[bake] >> eat & 1)
+        for idx, mask in enumerate(index.static):
+            self.assertFalse(mask >> idx & 1)
+
+
+class TestMutexes(unittest.TestCase):
+    def test_competing_needs(self):
+        problem = have_cake()
+        pg = CompactPlanningGraph(problem, problem.initial, serialize=False).fill()
+        eat, bake = [make_node(a) for a in problem.actions_list]
+        for level in range(pg.levels - 1):
+            if {eat, bake} <= pg.actions(level):
+                self.assertTrue(pg.is_action_mutex(eat, bake, level))
+
+    def test_inconsistent_support(self):
+        problem = air_cargo_p1()
+        pg = CompactPlanningGraph(problem, problem.initial).fill()
+        literals = expr("In(C1, P2)"), expr("In(C2, P1)")
+        self.assertTrue(pg.is_mutex(*literals, level=2))
+        self.assertFalse(pg.is_mutex(*literals, level=pg.levels - 2))
+
+    def test_negation(self):
+        problem = air_cargo_p1()
+        pg = CompactPlanningGraph(problem, problem.initial, ignore_mutexes=True).fill()
+        fluent = expr("At(C1, SFO)")
+        self.assertTrue(pg.is_mutex(fluent, ~fluent))
+        self.assertFalse(pg.is_mutex(fluent, expr("At(C2, JFK)")))
+
+    def test_levels_are_monotonic(self):
+        problem = air_cargo_p2()
+        pg = CompactPlanningGraph(problem, problem.initial).fill()
+        for level in range(1, pg.levels):
+            self.assertLessEqual(pg.literals(level - 1), pg.literals(level))
+        values = decode_bits(problem.initial, problem.state_map)
+        self.assertEqual(pg.literals(0), {s if f else ~s for f, s in zip(values, problem.state_map)})
+
+
+class TestHeuristics(unittest.TestCase):
+    # the same expected values as tests/test_my_planning_graph.py
+    def setUp(self):
+        self.problems = [have_cake(), air_cargo_p1(), air_cargo_p2(), air_cargo_p3(), air_cargo_p4()]
+        for problem in self.problems:
+            problem.planning_graph = CompactPlanningGraph
+
+    def check(self, heuristic, expected):
+        for problem, value in zip(self.problems, expected):
+            self.assertEqual(getattr(problem, heuristic)(Node(problem.initial)), value)
+
+    def test_maxlevel(self):
+        self.check('h_pg_maxlevel', [1, 2, 2, 3, 3])
+
+    def test_levelsum(self):
+        self.check('h_pg_levelsum', [1, 4, 6, 10, 13])
+
+    def test_setlevel(self):
+        self.check('h_pg_setlevel', [2, 4, 4, 6, 6])
+
+    def test_unreachable_goal(self):
+        problem = have_cake()
+        pg = CompactPlanningGraph(problem, problem.initial)
+        pg.goal = {expr('Have(Pie)')}
+        self.assertEqual(pg.h_levelsum(), float('inf'))
+        self.assertEqual(pg.h_setlevel(), float('inf'))
+
+    def test_astar_setlevel(self):
+        problem = self.problems[1]
+        node = astar_search(problem, problem.h_pg_setlevel)
+        self.assertEqual(len(node.solution()), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+from itertools import combinations
+
+from aimacode.planning import Action
+from aimacode.utils import expr
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from compact_graph import CompactPlanningGraph
+from example_have_cake import have_cake
+from layers import make_node, np
+from my_planning_graph import ActionLayer, LiteralLayer, PlanningGraph
+
+
+class TestIncrementalMutexes(unittest.TestCase):
+    def setUp(self):
+        self.A, self.B, self.C, self.D = expr('A'), expr('B'), expr('C'), expr('D')
+        self.layer = LiteralLayer([self.A, ~self.A, self.B, self.C], ActionLayer())
+        self.layer._set_static_mutex(self.A, ~self.A)
+        self.layer.set_mutex(self.B, self.C)
+        self.layer._mutexes_updated = True
+
+    def test_first_layer_tests_every_pair(self):
+        self.assertEqual(len(list(self.layer._mutex_candidates())), 6)
+
+    def test_only_mutex_and_new_pairs(self):
+        layer = LiteralLayer(self.layer, ActionLayer())
+        layer.add(self.D)
+        pairs = {frozenset(pair) for pair in layer._mutex_candidates()}
+        expected = {frozenset((self.D, x)) for x in self.layer} | {frozenset((self.B, self.C))}
+        self.assertEqual(pairs, expected)
+        # the static negation mutex is copied without a test
+        self.assertTrue(layer.is_mutex(self.A, ~self.A))
+        self.assertFalse(layer.is_mutex(self.B, self.C))
+
+    def test_previous_layer_without_mutexes(self):
+        self.layer._mutexes_updated = False
+        layer = LiteralLayer(self.layer, ActionLayer())
+        self.assertEqual(len(list(layer._mutex_candidates())), 6)
+
+
+@unittest.skipIf(np is None, "vectorized layers require numpy")
+class TestVectorizedMutexes(unittest.TestCase):
+    def test_inherited(self):
+        problem = have_cake()
+        pg = PlanningGraph(problem, problem.initial, vectorized=True).fill()
+        for layer in pg.literal_layers + pg.action_layers:
+            self.assertTrue(layer._vectorized)
+
+    def test_cake_mutexes(self):
+        problem = have_cake()
+        pg = PlanningGraph(problem, problem.initial, serialize=False, vectorized=True).fill()
+        eat, bake = [make_node(a) for a in problem.actions_list]
+        no_ops = [a for a in pg._actionNodes if a.no_op]
+        for layer in pg.action_layers:
+            if {eat, bake} <= layer:
+                self.assertTrue(layer.is_mutex(eat, bake))          # competing needs
+            if {bake, no_ops[3]} <= layer:
+                self.assertTrue(layer.is_mutex(bake, no_ops[3]))    # inconsistent effects
+        for layer in pg.literal_layers:
+            for literal in layer:
+                if ~literal in layer:
+                    self.assertTrue(layer.is_mutex(literal, ~literal))
+
+    def test_competing_needs(self):
+        A, B, C = expr('FakeFluent_A'), expr('FakeFluent_B'), expr('FakeFluent_C')
+        actions = [make_node(Action(expr('FakeAction({})'.format(x)), [set([x]), set()], [set([x]), set()]))
+                   for x in (A, B, C)]
+        for competing in (False, True):
+            literals = LiteralLayer([A, B, C], ActionLayer(vectorized=True))
+            if competing:
+                for a1, a2 in combinations([A, B, C], 2):
+                    literals.set_mutex(a1, a2)
+            layer = ActionLayer(literals.parent_layer, literals, False, False)
+            for action in actions:
+                layer.add(action)
+                layer.add_inbound_edges(action, action.preconditions)
+                layer.add_outbound_edges(action, action.effects)
+            layer.update_mutexes()
+            for a1, a2 in combinations(actions, 2):
+                self.assertEqual(layer.is_mutex(a1, a2), competing)
+
+    def test_inconsistent_support(self):
+        problem = air_cargo_p1()
+        pg = PlanningGraph(problem, problem.initial, vectorized=True).fill()
+        literals = expr("In(C1, P2)"), expr("In(C2, P1)")
+        self.assertTrue(pg.literal_layers[2].is_mutex(*literals))
+        self.assertFalse(pg.literal_layers[-2].is_mutex(*literals))
+
+    def test_matches_compact_graph(self):
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            for serialize, ignore_mutexes in ((True, False), (False, False), (True, True)):
+                pg = PlanningGraph(problem, problem.initial, serialize, ignore_mutexes, vectorized=True).fill()
+                cg = CompactPlanningGraph(problem, problem.initial, serialize, ignore_mutexes).fill()
+                self.assertEqual(len(pg.literal_layers), cg.levels)
+                for level, layer in enumerate(pg.literal_layers):
+                    self.assertEqual(set(layer), cg.literals(level))
+                    for a, b in combinations(layer, 2):
+                        self.assertEqual(layer.is_mutex(a, b), cg.is_mutex(a, b, level))
+                for level, layer in enumerate(pg.action_layers):
+                    self.assertEqual(set(layer), cg.actions(level))
+
+
+if __name__ == '__main__':
+    unittest.main()
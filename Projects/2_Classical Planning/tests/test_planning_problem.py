@@ -0,0 +1,104 @@
+import random
+import unittest
+
+from aimacode.search import Node, breadth_first_search
+from aimacode.utils import expr
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3
+from example_have_cake import have_cake
+from planning_problem import ActionMasks, SuccessorGenerator
+from _utils import decode_bits, decode_state, fluent_mask
+
+
+def reference_actions(problem, state):
+    """ The applicable actions by testing every precondition on a FluentState """
+    fluent = decode_state(decode_bits(state, problem.state_map), problem.state_map)
+    return [a for a in problem.actions_list
+            if all(c in fluent.pos for c in a.precond_pos) and all(c in fluent.neg for c in a.precond_neg)]
+
+
+def reference_result(problem, state, action):
+    values = decode_bits(state, problem.state_map)
+    return tuple([(f and s not in action.effect_rem) or (s in action.effect_add)
+                  for f, s in zip(values, problem.state_map)])
+
+
+class TestBitsetStates(unittest.TestCase):
+    def test_initial_state(self):
+        problem = air_cargo_p1()
+        self.assertIsInstance(problem.initial, int)
+        self.assertEqual(decode_bits(problem.initial, problem.state_map),
+                         tuple(str(f) in ('At(C1, SFO)', 'At(C2, JFK)', 'At(P1, SFO)', 'At(P2, JFK)')
+                               for f in problem.state_map))
+
+    def test_matches_fluent_semantics(self):
+        rng = random.Random(0)
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            state = problem.initial
+            for _ in range(50):
+                actions = problem.actions(state)
+                self.assertEqual(actions, reference_actions(problem, state))
+                if not actions:
+                    break
+                action = rng.choice(actions)
+                expected = reference_result(problem, state, action)
+                state = problem.result(state, action)
+                self.assertEqual(decode_bits(state, problem.state_map), expected)
+                goal = all(f for f, c in zip(expected, problem.state_map) if c in problem.goal)
+                self.assertEqual(problem.goal_test(state), goal)
+
+    def test_unmet_goals(self):
+        problem = air_cargo_p1()
+        self.assertEqual(problem.h_unmet_goals(Node(problem.initial)), 2)
+
+    def test_search(self):
+        self.assertEqual(len(breadth_first_search(have_cake()).solution()), 2)
+        self.assertEqual(len(breadth_first_search(air_cargo_p1()).solution()), 6)
+
+
+def linear_scan(action_masks, state):
+    """ The applicable actions by testing the masks of every action in turn """
+    return [m.action for m in action_masks if state & m.pos == m.pos and not state & m.neg]
+
+
+class TestSuccessorGenerator(unittest.TestCase):
+    def test_matches_linear_scan(self):
+        rng = random.Random(1)
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2(), air_cargo_p3()):
+            masks = problem.action_masks
+            states = [problem.initial] + [rng.getrandbits(len(problem.state_map)) for _ in range(200)]
+            for state in states:
+                self.assertEqual(problem.actions(state), linear_scan(masks, state))
+            self.assertEqual(problem.actions(problem.initial), reference_actions(problem, problem.initial))
+
+    def test_unconditional_and_negative_preconditions(self):
+        masks = [ActionMasks('Always', 0, 0, 0b1, 0),
+                 ActionMasks('UnlessA', 0, 0b1, 0b1, 0),
+                 ActionMasks('BUnlessC', 0b10, 0b100, 0, 0),
+                 ActionMasks('AB', 0b11, 0, 0, 0b1)]
+        generator = SuccessorGenerator(masks)
+        self.assertEqual([entry[1] for entry in generator._unconditional], ['Always', 'UnlessA'])
+        for state in range(8):
+            self.assertEqual(generator.applicable(state), linear_scan(masks, state))
+        self.assertEqual(generator.applicable(0b000), ['Always', 'UnlessA'])
+        self.assertEqual(generator.applicable(0b011), ['Always', 'BUnlessC', 'AB'])
+        self.assertEqual(generator.applicable(0b111), ['Always', 'AB'])
+
+    def test_least_shared_bucket(self):
+        masks = [ActionMasks('A1', 0b01, 0, 0, 0),
+                 ActionMasks('A2', 0b01, 0, 0, 0),
+                 ActionMasks('AB', 0b11, 0, 0, 0)]
+        buckets = SuccessorGenerator(masks)._buckets
+        self.assertEqual([entry[1] for entry in buckets[0b01]], ['A1', 'A2'])
+        self.assertEqual([entry[1] for entry in buckets[0b10]], ['AB'])
+
+        # a load is filed under where its cargo is, which fewer actions share than its plane
+        problem = air_cargo_p1()
+        buckets = SuccessorGenerator(problem.action_masks)._buckets
+        cargo = fluent_mask([expr('At(C1, SFO)')], problem.state_map)
+        self.assertIn('Load(C1, P1, SFO)', [str(entry[1]) for entry in buckets[cargo]])
+        plane = fluent_mask([expr('At(P1, SFO)')], problem.state_map)
+        self.assertNotIn('Load(C1, P1, SFO)', [str(entry[1]) for entry in buckets[plane]])
+
+
+if __name__ == '__main__':
+    unittest.main()